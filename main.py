@@ -1,6 +1,81 @@
-def main():
-    print("Hello from skill-dev!")
+"""
+Single entry point for every skill:
+
+    python main.py <command> [args...]
+    naver-stocks <command> [args...]      (console script, see pyproject.toml)
+
+Only the selected skill module is imported, and the skills import pandas /
+numpy / bs4 / requests on the code paths that use them, so `--help`, listing
+and cache-only commands start without loading them.
+"""
+import os
+import sys
+import importlib
+
+SKILLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skills')
+PROG = 'naver-stocks'
+
+# command -> (skill directory under skills/, module, summary); None: module next to main.py
+COMMANDS = {
+    'uprise': ('stock_uprise', 'scanner', 'Uprise scanner: rising stocks in the safe zone, no deficit'),
+    'uprise-backtest': ('stock_uprise', 'backtest', 'Replay the uprise rules over the OHLCV store'),
+    'fundamental': ('stock_fundamental', 'analysis', 'Fundamental traffic light (single code or batch screen)'),
+    'statements': ('stock_fundamental', 'statements', 'WiseReport balance sheet / valuation series'),
+    'industry': ('stock_fundamental', 'industry', 'Daily industry PER table'),
+    'technical': ('stock_technical', 'screener', 'MACD / Stochastic / RSI / OBV cross-check'),
+    'walkforward': ('stock_technical', 'walkforward', 'Walk-forward evaluation of the technical score'),
+    'recommand': ('stock_recommand', 'checker', 'Brokerage report fact checker'),
+    'event': ('stock_event', 'planner', 'Seasonal theme calendar and preemption alerts'),
+    'seasonality': ('stock_event', 'seasonality', 'Historical validation of the theme calendar'),
+    'alert': ('stock_alert', 'engine', 'Watchlist alert engine over live price updates'),
+    'ohlcv': ('', 'common.ohlcv_store', 'Download / update the local OHLCV store'),
+    'archive': ('', 'common.archive', 'Inspect the raw response archive'),
+    'universe': ('', 'common.universe_index', 'Build / query the listed-code index (name, market, industry, themes)'),
+    'sweep': (None, 'sweep', 'Sharded full-market sweep over worker processes and hosts'),
+    'parsecheck': (None, 'parsecheck', 'Check the fast table parsers against the soup ones over archived pages'),
+    'schedule': (None, 'scheduler', 'KRX session aware cache prewarming and freshness status'),
+    'serve': (None, 'server', 'Resident local JSON API serving the skills'),
+}
+
+
+def load(command):
+    """
+    Imports the skill module for a command. Skill scripts import their
+    siblings by bare name and `common` from skills/, so both go on sys.path.
+    """
+    skill, module, _ = COMMANDS[command]
+    paths = [SKILLS_DIR] if skill is None else [SKILLS_DIR, os.path.join(SKILLS_DIR, skill)]
+    for path in paths:
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    return importlib.import_module(module)
+
+
+def usage(out=sys.stdout):
+    print(f"usage: {PROG} <command> [args...]\n", file=out)
+    print("commands:", file=out)
+    width = max(len(c) for c in COMMANDS)
+    for command, (_, _, summary) in COMMANDS.items():
+        print(f"  {command:<{width}}  {summary}", file=out)
+    print(f"\n`{PROG} <command> --help` shows the options of a command.", file=out)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ('-h', '--help', 'help'):
+        usage()
+        return 0
+
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"{PROG}: unknown command '{command}'\n", file=sys.stderr)
+        usage(sys.stderr)
+        return 2
+
+    module = load(command)
+    sys.argv = [f"{PROG} {command}"] + rest
+    return module.main()
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
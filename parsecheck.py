@@ -0,0 +1,86 @@
+"""
+Differential check of the fast listing-table parsers (common/tables.py)
+against the BeautifulSoup parsers they replaced, over archived pages.
+
+    NAVER_STOCKS_ARCHIVE=record python main.py sweep run uprise   (collect pages)
+    python main.py parsecheck
+    python main.py parsecheck --parser rising --limit 200
+
+Every archived page of a parser's URL pattern goes through both versions;
+a page where the results differ is reported with its URL, and the command
+exits with status 1. The timing columns show what the fast path saves.
+"""
+import sys
+import time
+import argparse
+import importlib
+
+import main as cli
+
+sys.path.append(cli.SKILLS_DIR)
+from common.archive import Archive
+
+# name -> (archived URL glob, main.py command or common module, fast parser; reference is <fast>_soup)
+PARSERS = {
+    'market_sum': ('*sise/sise_market_sum.naver*', 'common.universe', 'parse_market_sum'),
+    'rising': ('*sise/sise_rise.naver*', 'uprise', 'parse_rising'),
+    'reports': ('*research/company_list.naver*', 'recommand', 'parse_reports'),
+    'theme': ('*sise/sise_group_detail.naver?type=theme*', 'event', 'parse_theme_stocks'),
+}
+
+
+def parser_pair(name):
+    _, where, func = PARSERS[name]
+    module = cli.load(where) if where in cli.COMMANDS else importlib.import_module(where)
+    return getattr(module, func), getattr(module, func + '_soup')
+
+
+def check(name, pages, fast=None, reference=None):
+    """
+    Runs both parsers over (url, html) pages.
+    Returns {'pages', 'diverged': [url], 'fast', 'soup'} (seconds spent).
+    """
+    default_fast, default_reference = parser_pair(name)
+    fast, reference = fast or default_fast, reference or default_reference
+    report = {'pages': 0, 'diverged': [], 'fast': 0.0, 'soup': 0.0}
+    for url, html in pages:
+        start = time.perf_counter()
+        got = fast(html)
+        mid = time.perf_counter()
+        want = reference(html)
+        report['fast'] += mid - start
+        report['soup'] += time.perf_counter() - mid
+        report['pages'] += 1
+        if got != want:
+            report['diverged'].append(url)
+    return report
+
+
+def archived_pages(archive, name, limit=None):
+    for i, (entry, html) in enumerate(archive.scan(PARSERS[name][0])):
+        if limit is not None and i >= limit: return
+        yield entry['url'], html
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fast vs soup parser differential check over archived pages')
+    parser.add_argument('--parser', choices=list(PARSERS), action='append', default=None)
+    parser.add_argument('--limit', type=int, default=None, help='Pages per parser')
+    parser.add_argument('--root', type=str, default=None, help='Archive directory (default: <data root>/archive)')
+    args = parser.parse_args()
+
+    archive = Archive(args.root)
+    failed = False
+    for name in args.parser or list(PARSERS):
+        r = check(name, archived_pages(archive, name, args.limit))
+        speedup = r['soup'] / r['fast'] if r['fast'] else 0
+        print(f"{name:<11} {r['pages']:>6} pages  diverged {len(r['diverged']):>4}  "
+              f"fast {r['fast']:.3f}s  soup {r['soup']:.3f}s  (x{speedup:.1f})")
+        for url in r['diverged'][:10]:
+            print(f"    {url}")
+        failed = failed or bool(r['diverged'])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Tiered refresh: fetches the slow-changing data ahead of time so skill runs
+during the session find it cached (common/schedule.py has the KRX calendar
+and how long each kind of page stays valid).
+
+    python main.py schedule status
+    python main.py schedule prewarm --market ALL          (now)
+    python main.py schedule run                           (daemon: before the open and after the close)
+    NAVER_STOCKS_FRESH=1 python main.py uprise            (use pages still valid for their tier)
+
+Before the open: the universe index, the daily industry PER table, the
+financial statements that may have a new filing, and the OHLCV store up to
+yesterday's bar. After the close: the OHLCV store again, with today's final
+bar. With the freshness cache on, every page fetched here also lands in it.
+"""
+import sys
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import main as cli
+
+sys.path.append(cli.SKILLS_DIR)
+from common import schedule
+from common.metrics import timed
+
+JOBS = ('universe', 'industry', 'statements', 'ohlcv')
+UPDATE_BARS = 30       # bars fetched for a code already in the OHLCV store
+FULL_BARS = 3000       # first download of a code
+
+
+def update_ohlcv(codes, workers=8):
+    from common.ohlcv_store import OHLCVStore
+    store = OHLCVStore()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        counts = pool.map(lambda c: store.update(c, UPDATE_BARS if store.has(c) else FULL_BARS), codes)
+        return sum(1 for n in counts if n)
+
+
+@timed('schedule.prewarm')
+def prewarm(market='ALL', jobs=JOBS, workers=8):
+    """
+    Runs the selected jobs now. Returns {job: items refreshed or checked}.
+    """
+    from common.universe_index import UniverseIndex
+    index = UniverseIndex.load(workers=workers)
+    codes = index.codes(market)
+    done = {'universe': len(index)}
+
+    if 'industry' in jobs:
+        table = cli.load('industry').IndustryTable.load(workers=workers)
+        done['industry'] = len(table.industries)
+    if 'statements' in jobs:
+        # only codes whose cached statements may have a new filing hit the network
+        client = cli.load('statements').StatementsClient()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            done['statements'] = sum(1 for data in pool.map(client.get, codes) if data)
+    if 'ohlcv' in jobs:
+        done['ohlcv'] = update_ohlcv(codes, workers)
+    return done
+
+
+def next_run(at=None):
+    """
+    (when, kind) of the next scheduled run: 'prewarm' at PREWARM or
+    'close' at AFTER_CLOSE on a trading day.
+    """
+    at = at or schedule.now()
+    day = at.date()
+    if not schedule.is_trading_day(day):
+        day = schedule.next_trading_day(day)
+    for moment, kind in ((schedule.PREWARM, 'prewarm'), (schedule.AFTER_CLOSE, 'close')):
+        when = datetime.combine(day, moment)
+        if when > at: return when, kind
+    return datetime.combine(schedule.next_trading_day(day), schedule.PREWARM), 'prewarm'
+
+
+def run(market='ALL', jobs=JOBS, workers=8):
+    while True:
+        when, kind = next_run()
+        print(f"다음 실행: {when:%Y-%m-%d %H:%M} ({kind})", file=sys.stderr)
+        time.sleep(max(0.0, (when - schedule.now()).total_seconds()))
+        try:
+            if kind == 'prewarm':
+                done = prewarm(market, jobs, workers)
+            else:
+                from common.universe_index import UniverseIndex
+                done = {'ohlcv': update_ohlcv(UniverseIndex.load(workers=workers).codes(market), workers)}
+        except Exception as e:
+            print(f"Error in {kind} run: {e}", file=sys.stderr)
+            continue
+        print(f"{kind} 완료: {done}", file=sys.stderr)
+
+
+def status():
+    at = schedule.now()
+    labels = {'pre': '장 시작 전', 'open': '장중', 'closed': '장 마감 / 휴장'}
+    print(f"현재 (KST) {at:%Y-%m-%d %H:%M}  {labels[schedule.session_state(at)]}"
+          f"  (정규장 {schedule.OPEN:%H:%M}-{schedule.CLOSE:%H:%M})")
+    print(f"다음 개장   {schedule.next_open(at):%Y-%m-%d %H:%M}")
+    when, kind = next_run(at)
+    print(f"다음 예약   {when:%Y-%m-%d %H:%M} ({kind})\n")
+    print("지금 받은 페이지의 유효 기한:")
+    for tier in schedule.TIERS:
+        print(f"  {tier:<10} {schedule.expires_at(tier, at):%Y-%m-%d %H:%M}")
+    store = schedule.FreshStore()
+    stats = store.stats()
+    print(f"\n캐시 {stats['pages']}개 페이지, {stats['bytes'] / 1e6:.1f}MB ({store.root})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tiered refresh scheduler (KRX session aware cache prewarming)')
+    parser.add_argument('mode', choices=['status', 'prewarm', 'run'])
+    parser.add_argument('--market', choices=['KOSPI', 'KOSDAQ', 'ALL'], default='ALL')
+    parser.add_argument('--jobs', type=str, default=','.join(JOBS), help=f"Comma separated subset of {','.join(JOBS)}")
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+    jobs = [j.strip() for j in args.jobs.split(',') if j.strip()]
+    unknown = set(jobs) - set(JOBS)
+    if unknown:
+        parser.error(f"unknown jobs: {', '.join(sorted(unknown))}")
+
+    if args.mode == 'status':
+        status()
+        return
+    # everything fetched ahead of time also serves later runs from the freshness cache
+    schedule.use(True)
+    if args.mode == 'prewarm':
+        print(prewarm(args.market, jobs, args.workers))
+    else:
+        try:
+            run(args.market, jobs, args.workers)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Resident service: keeps skill objects, HTTP keep-alive sessions, caches and
+recent results warm and serves the skills as JSON on a local port.
+
+    python main.py serve --port 8765
+    curl 'http://127.0.0.1:8765/technical?code=005930'
+
+Endpoints (query parameters in brackets):
+    /health
+    /metrics               [format=json|prom]
+    /uprise                [limit] [deadline] [intraday=1]
+    /technical             code [count]
+    /fundamental           code | codes=a,b,c [deadline]
+    /recommand             [pages]
+    /event                 [month] [limit]
+"""
+import sys
+import json
+import time
+import inspect
+import argparse
+import threading
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+import main as cli
+
+sys.path.append(cli.SKILLS_DIR)
+from common.fetch import SingleFlight
+from common.metrics import METRICS, record_cache
+from common.deadline import Deadline
+from common import schedule
+
+DEFAULT_TTL = 60   # seconds a result is served from memory
+
+
+class BadRequest(Exception):
+    """
+    Missing, unknown or malformed query parameters (HTTP 400). Anything else
+    a skill raises is a server error (500).
+    """
+
+
+def number(name, value, kind=int):
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise BadRequest(f"{name} must be a number, got {value!r}") from None
+
+
+class SkillService:
+    """
+    Skill objects are built once per process and reused across requests.
+    Skill calls run on a fixed thread pool, so the per-thread keep-alive
+    sessions in common.fetch survive between requests. Results are kept for
+    `ttl` seconds per (endpoint, parameters), and identical requests that
+    arrive while one is running share that run.
+    """
+    def __init__(self, ttl=DEFAULT_TTL, workers=8):
+        self.ttl = ttl
+        self.started = time.time()
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self._flights = SingleFlight('service.inflight')
+        self._lock = threading.RLock()   # factories may build other shared objects
+        self._objects = {}
+        self._results = {}
+        self.routes = {
+            '/uprise': self.uprise,
+            '/technical': self.technical,
+            '/fundamental': self.fundamental,
+            '/recommand': self.recommand,
+            '/event': self.event,
+        }
+
+    def obj(self, name, factory):
+        with self._lock:
+            if name not in self._objects:
+                self._objects[name] = factory()
+            return self._objects[name]
+
+    def call(self, path, params):
+        """
+        Runs (or serves from memory) one endpoint. Raises KeyError for an
+        unknown path and BadRequest for bad parameters.
+        """
+        handler = self.routes[path]
+        try:
+            inspect.signature(handler).bind(**params)
+        except TypeError as e:
+            raise BadRequest(str(e)) from None
+        key = (path, tuple(sorted(params.items())))
+        now = time.monotonic()
+        with self._lock:
+            hit = self._results.get(key)
+        if hit and hit[0] > now:
+            record_cache('service', True)
+            return hit[1]
+        record_cache('service', False)
+
+        value = self._flights.do(key, lambda: self.pool.submit(handler, **params).result())
+        with self._lock:
+            if not (isinstance(value, dict) and value.get('partial')):
+                self._results[key] = (time.monotonic() + self.ttl, value)
+            # drop expired entries so polling many codes does not grow forever
+            for k in [k for k, (expires, _) in self._results.items() if expires <= now]:
+                del self._results[k]
+        return value
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+    # --- endpoints -------------------------------------------------------
+
+    def uprise(self, limit='50', deadline=None, intraday=None):
+        scanner = cli.load('uprise')
+        client = self.obj('uprise.client', lambda: scanner.NaverFinanceClient(pit_store=self.pit_store()))
+        analyzer = self.obj('uprise.analyzer', lambda: scanner.StockAnalyzer(client))
+        verdicts = self.obj('uprise.verdicts', scanner.VerdictCache)
+        memo = self.obj('uprise.memo', scanner.uprise_memo)
+        book = None
+        if intraday:
+            # one book for the whole session: later polls only fetch the new minutes
+            from common.intraday import IntradayBook
+            book = self.obj('uprise.intraday', IntradayBook)
+        pipeline = scanner.scan_pipeline(client, analyzer, verdicts, intraday=book, memo=memo)
+        limit = number('limit', limit)
+        budget = Deadline(number('deadline', deadline, float) if deadline else None)
+        with budget.active():
+            rising = scanner.prioritize(client.get_rising_stocks(limit=limit), 'diff_rate' if deadline else None)
+        candidates = list(scanner.iter_scan(client, analyzer, rising, verdicts, pipeline, budget))
+        result = {'rising': len(rising), 'candidates': candidates}
+        if budget.partial:
+            result.update(partial=True, unchecked=[s['code'] for s in budget.unchecked])
+        return result
+
+    def technical(self, code, count='500'):
+        count = number('count', count)
+        screener = cli.load('technical')
+        tech = self.obj('technical', lambda: screener.TechnicalScreener(screener.technical_memo()))
+        result = tech.score(code, count)
+        return dict(result, code=code) if result else {'code': code, 'error': 'no data'}
+
+    def fundamental(self, code=None, codes=None, deadline=None):
+        if not code and not codes:
+            raise BadRequest("code or codes is required")
+        deadline = number('deadline', deadline, float) if deadline else None
+        analysis = cli.load('fundamental')
+        analyzer = self.obj('fundamental', lambda: analysis.FundamentalAnalyzer(pit_store=self.pit_store()))
+        if codes and deadline:
+            budget = Deadline(deadline)
+            rows = list(analyzer.iter_screen(codes.split(','), industry=self.industry(), deadline=budget))
+            return {'rows': rows, 'partial': budget.partial, 'unchecked': budget.unchecked}
+        if codes:
+            return analyzer.screen(codes.split(','), industry=self.industry())
+        data = analyzer.get_data(code, verbose=False)
+        if not data:
+            return {'code': code, 'error': 'fetch failed'}
+        return {'data': data, 'signals': analyzer.evaluate(data)}
+
+    def recommand(self, pages='3'):
+        pages = number('pages', pages)
+        checker_mod = cli.load('recommand')
+        checker = self.obj('recommand', checker_mod.RecommendationChecker)
+        return checker.analyze_risks(checker.fetch_reports(pages=pages))
+
+    def event(self, month=None, limit='10'):
+        month = number('month', month) if month else None
+        limit = number('limit', limit)
+        planner_mod = cli.load('event')
+        planner = self.obj('event', planner_mod.ThemePlanner)
+        return planner.plan(month, limit)
+
+    # --- shared state ----------------------------------------------------
+
+    def pit_store(self):
+        from common.pit_store import PointInTimeStore
+        return self.obj('pit_store', PointInTimeStore)
+
+    def industry(self):
+        """
+        IndustryTable for today; rebuilt (from its daily cache) after midnight.
+        """
+        IndustryTable = cli.load('industry').IndustryTable
+        today = date.today()
+        with self._lock:
+            cached = self._objects.get('industry')
+        if cached and cached.as_of == today.isoformat():
+            return cached
+        table = IndustryTable.load(today=today)
+        with self._lock:
+            self._objects['industry'] = table
+        return table
+
+
+class Handler(BaseHTTPRequestHandler):
+    service = None
+    verbose = False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if url.path == '/health':
+            return self.reply(200, {'status': 'ok', 'uptime': time.time() - self.service.started,
+                                    'endpoints': sorted(self.service.routes)})
+        if url.path == '/metrics':
+            if params.get('format') == 'prom':
+                return self.reply(200, METRICS.prometheus(), 'text/plain; version=0.0.4')
+            return self.reply(200, METRICS.snapshot())
+
+        if url.path not in self.service.routes:
+            return self.reply(404, {'error': f"unknown endpoint {url.path}"})
+        try:
+            with METRICS.stage(f"serve {url.path}"):
+                value = self.service.call(url.path, params)
+        except BadRequest as e:
+            return self.reply(400, {'error': str(e)})
+        except Exception as e:
+            return self.reply(500, {'error': f"{type(e).__name__}: {e}"})
+        self.reply(200, value)
+
+    def reply(self, status, body, content_type='application/json; charset=utf-8'):
+        if not isinstance(body, str):
+            body = json.dumps(body, ensure_ascii=False, default=str)
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(host='127.0.0.1', port=8765, service=None, verbose=False):
+    handler = type('BoundHandler', (Handler,), {'service': service or SkillService(), 'verbose': verbose})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the skills as a local JSON API')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--ttl', type=int, default=DEFAULT_TTL, help='Seconds a result is reused (0: always recompute)')
+    parser.add_argument('--workers', type=int, default=8, help='Threads running skill calls')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Serve pages from the freshness cache while valid for their tier (common.schedule)')
+    args = parser.parse_args()
+
+    if args.fresh:
+        schedule.use(True)
+
+    service = SkillService(args.ttl, args.workers)
+    server = make_server(args.host, args.port, service, args.verbose)
+    print(f"Serving skills on http://{args.host}:{server.server_port} (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
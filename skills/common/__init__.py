@@ -0,0 +1,6 @@
+"""
+Shared building blocks for the Naver stock skills.
+
+Each skill stays a standalone script; scripts that need these helpers add the
+parent ``skills`` directory to ``sys.path`` and import ``common.<module>``.
+"""
@@ -0,0 +1,266 @@
+
+import os
+import sys
+import json
+import time
+import zlib
+import socket
+import argparse
+import threading
+from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+
+# Allow running this file directly as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.paths import data_dir
+
+ENV = 'NAVER_STOCKS_ARCHIVE'   # 'record': keep every fetched page, 'replay': serve pages from the archive
+SEGMENT_BYTES = 256 * 1024 * 1024
+LEVEL = 6                      # zlib level; pages are mostly markup and shrink ~8x
+
+
+class ArchiveMiss(LookupError):
+    pass
+
+
+class Archive:
+    """
+    Raw HTTP responses kept for re-parsing: bodies are zlib-compressed and
+    appended to large segment files (.arc), and every stored body gets one
+    JSON line in the segment's index (.idx):
+
+        {"url", "key", "t", "status", "encoding", "type", "off", "len", "size"}
+
+    Each writing process appends to segments of its own (named after host,
+    pid and start time), so sweep workers on several hosts can share one
+    archive directory without locks. The index line is written after the
+    body is flushed; a body without an index line (crash mid-write) is
+    never read. `key` is fetch.normalize_url(url).
+    """
+    def __init__(self, root=None, segment_bytes=SEGMENT_BYTES):
+        self.root = root or data_dir('archive')
+        os.makedirs(self.root, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._seg = None
+        self._idx = None
+        self._pid = None
+        self._n = 0
+        self._latest = None   # key -> (t, segment, entry), built on first lookup
+
+    # --- writing ---------------------------------------------------------
+
+    def _open_segment(self):
+        self.close()
+        self._pid = os.getpid()
+        self._n += 1
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{socket.gethostname()}-{self._pid}-{self._n:04d}"
+        self._seg = open(os.path.join(self.root, name + '.arc'), 'ab')
+        self._idx = open(os.path.join(self.root, name + '.idx'), 'a', encoding='utf-8')
+
+    def put(self, url, key, body, status=200, encoding=None, content_type=None, fetched=None):
+        """
+        Appends one response body (bytes). Returns its index entry.
+        """
+        data = zlib.compress(body, LEVEL)
+        with self._lock:
+            # a forked worker must not write into its parent's segment
+            if self._seg is None or self._pid != os.getpid() or self._seg.tell() >= self.segment_bytes:
+                self._open_segment()
+            off = self._seg.tell()
+            self._seg.write(data)
+            self._seg.flush()
+            entry = {'url': url, 'key': key, 't': round(fetched or time.time(), 3), 'status': status,
+                     'encoding': encoding, 'type': content_type, 'off': off, 'len': len(data), 'size': len(body)}
+            self._idx.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._idx.flush()
+            entry['segment'] = os.path.basename(self._seg.name)
+            if self._latest is not None:
+                self._latest[key] = entry
+        return entry
+
+    def close(self):
+        for f in (self._seg, self._idx):
+            if f is not None: f.close()
+        self._seg = self._idx = None
+
+    # --- reading ---------------------------------------------------------
+
+    def segments(self):
+        return sorted(f[:-4] for f in os.listdir(self.root) if f.endswith('.idx'))
+
+    def entries(self, match=None, since=None, until=None):
+        """
+        Index entries (plus 'segment') in segment and write order. match is
+        a glob over the URL ('*item/main.naver*'); since / until are epoch
+        seconds.
+        """
+        for name in self.segments():
+            try:
+                with open(os.path.join(self.root, name + '.idx'), 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            break   # torn last line
+                        if match and not fnmatch(entry['url'], match): continue
+                        if since is not None and entry['t'] < since: continue
+                        if until is not None and entry['t'] >= until: continue
+                        entry['segment'] = name + '.arc'
+                        yield entry
+            except OSError as e:
+                print(f"Error reading archive index {name}: {e}", file=sys.stderr)
+
+    def read(self, entry, f=None):
+        """
+        Body bytes of an entry. Pass an open segment file to avoid reopening
+        it for every entry of the same segment.
+        """
+        if f is None:
+            with open(os.path.join(self.root, entry['segment']), 'rb') as f:
+                return self.read(entry, f)
+        f.seek(entry['off'])
+        return zlib.decompress(f.read(entry['len']))
+
+    @staticmethod
+    def text(entry, body):
+        return body.decode(entry.get('encoding') or 'utf-8', errors='replace')
+
+    def scan(self, match=None, since=None, until=None, workers=4):
+        """
+        Yields (entry, text) for every matching page, reading each segment
+        front to back and decompressing on `workers` threads (zlib releases
+        the GIL), so a bulk re-parse runs at disk speed.
+        """
+        def load(group):
+            name, items = group
+            with open(os.path.join(self.root, name), 'rb') as f:
+                return [(e, self.text(e, self.read(e, f))) for e in items]
+
+        groups, current = [], None
+        for entry in self.entries(match, since, until):
+            if current is None or current[0] != entry['segment']:
+                current = (entry['segment'], [])
+                groups.append(current)
+            current[1].append(entry)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for pages in pool.map(load, groups):
+                yield from pages
+
+    def latest(self, key):
+        """
+        Newest entry stored for a normalized URL, or None.
+        """
+        with self._lock:
+            if self._latest is None:
+                self._latest = {}
+                for entry in self.entries():
+                    old = self._latest.get(entry['key'])
+                    if old is None or entry['t'] >= old['t']:
+                        self._latest[entry['key']] = entry
+            return self._latest.get(key)
+
+    def stats(self):
+        out = {'segments': 0, 'pages': 0, 'urls': 0, 'bytes': 0, 'raw_bytes': 0, 'first': None, 'last': None}
+        keys = set()
+        for entry in self.entries():
+            out['pages'] += 1
+            out['bytes'] += entry['len']
+            out['raw_bytes'] += entry['size']
+            keys.add(entry['key'])
+            out['first'] = entry['t'] if out['first'] is None else min(out['first'], entry['t'])
+            out['last'] = entry['t'] if out['last'] is None else max(out['last'], entry['t'])
+        out['urls'] = len(keys)
+        out['segments'] = len(self.segments())
+        return out
+
+
+# --- fetch hook ----------------------------------------------------------
+
+_mode = None
+_archive = None
+_hook_lock = threading.Lock()
+
+
+def use(mode, archive=None):
+    """
+    Sets what common.fetch does with the archive: 'record', 'replay' or
+    None (off). Without an explicit archive the default one under the data
+    root is used. The NAVER_STOCKS_ARCHIVE environment variable sets the
+    initial mode.
+    """
+    global _mode, _archive
+    if mode not in (None, 'record', 'replay'):
+        raise ValueError(f"unknown archive mode {mode!r}")
+    with _hook_lock:
+        _mode = mode
+        _archive = archive if mode else None
+
+
+def active():
+    """
+    (mode, Archive) for the fetch hook; mode is None when archiving is off.
+    """
+    global _archive
+    if _mode is None: return None, None
+    with _hook_lock:
+        if _archive is None:
+            _archive = Archive()
+        return _mode, _archive
+
+
+def record(url, key, res):
+    mode, arc = active()
+    if mode != 'record' or res.status_code != 200: return
+    try:
+        arc.put(url, key, res.content, res.status_code, res.encoding, res.headers.get('Content-Type'))
+    except OSError as e:
+        print(f"Error archiving {url}: {e}", file=sys.stderr)
+
+
+def replay(url, key):
+    """
+    The archived response for a URL as a requests.Response; raises
+    ArchiveMiss when the archive never saw it.
+    """
+    import requests
+    _, arc = active()
+    entry = arc.latest(key)
+    if entry is None:
+        raise ArchiveMiss(f"{url} is not in the archive ({arc.root})")
+    res = requests.Response()
+    res.status_code = entry['status']
+    res._content = arc.read(entry)
+    res.encoding = entry.get('encoding')
+    res.url = entry['url']
+    if entry.get('type'):
+        res.headers['Content-Type'] = entry['type']
+    return res
+
+
+use(os.environ.get(ENV) or None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Raw response archive')
+    parser.add_argument('mode', choices=['stats', 'list', 'cat'])
+    parser.add_argument('--match', type=str, default=None, help="URL glob, e.g. '*item/main.naver*'")
+    parser.add_argument('--root', type=str, default=None, help='Archive directory (default: <data root>/archive)')
+    args = parser.parse_args()
+
+    arc = Archive(args.root)
+    if args.mode == 'stats':
+        s = arc.stats()
+        ratio = s['raw_bytes'] / s['bytes'] if s['bytes'] else 0
+        print(f"{s['pages']}개 페이지 ({s['urls']}개 URL), 세그먼트 {s['segments']}개, "
+              f"{s['bytes'] / 1e6:.1f}MB (원본 {s['raw_bytes'] / 1e6:.1f}MB, {ratio:.1f}배 압축)")
+    elif args.mode == 'list':
+        for e in arc.entries(args.match):
+            print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(e['t']))}  {e['size']:>8}  {e['url']}")
+    else:
+        for e, text in arc.scan(args.match):
+            print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import os
+import json
+
+from common.paths import data_dir
+from common.metrics import record_cache
+
+
+class JsonCache:
+    """
+    Small persistent key -> JSON document cache, one file per key under
+    <data root>/cache/<name>. Writes are atomic (tmp file + rename) so a
+    crashed run never leaves a half-written entry behind.
+    """
+    def __init__(self, name, root=None):
+        self.name = name
+        self.root = root or data_dir('cache', name)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key):
+        safe = str(key).replace('/', '_').replace('\\', '_')
+        return os.path.join(self.root, f"{safe}.json")
+
+    def get(self, key):
+        try:
+            with open(self.path(key), 'r', encoding='utf-8') as f:
+                doc = json.load(f)
+        except (OSError, ValueError):
+            record_cache(self.name, False)
+            return None
+        record_cache(self.name, True)
+        return doc
+
+    def put(self, key, doc):
+        path = self.path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(doc, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
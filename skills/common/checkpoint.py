@@ -0,0 +1,124 @@
+
+import os
+import json
+import time
+import hashlib
+
+from common.paths import data_dir
+
+SYNC_EVERY = 50   # entries between fsyncs (each entry is flushed immediately)
+
+
+def checkpoint_path(name, *parts):
+    """
+    Default log location for a run: <data root>/checkpoints/<name>-<digest>.log,
+    the digest covering whatever identifies the run (arguments, date).
+    """
+    digest = hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(data_dir('checkpoints'), f"{name}-{digest}.log")
+
+
+class Checkpoint:
+    """
+    Append-only progress log of a long scan, one JSON object per line:
+
+        {"universe": [...], "meta": {...}, "started": ...}   header
+        {"key": "005930", "value": {...}}                    one per finished item
+        {"finished": ...}                                     run completed
+
+    start() replays an unfinished log and returns the original universe
+    plus the items already done, so a restarted scan continues where the
+    last one died instead of fetching everything again. A torn last line
+    (crash mid-write) is ignored. A finished log, or one for a different
+    run, is replaced.
+    """
+    def __init__(self, path, sync_every=SYNC_EVERY):
+        self.path = path
+        self.sync_every = sync_every
+        self._f = None
+        self._pending = 0
+
+    def replay(self):
+        """
+        (header, {key: value}, finished) of the log on disk; header is None
+        when there is no usable log.
+        """
+        header, done, finished = None, {}, False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break   # torn write: everything before it is intact
+                    if header is None:
+                        if 'universe' not in entry: break
+                        header = entry
+                    elif 'finished' in entry:
+                        finished = True
+                    elif 'key' in entry:
+                        done[entry['key']] = entry.get('value')
+        except OSError:
+            pass
+        return header, done, finished
+
+    def start(self, universe, meta=None):
+        """
+        Returns (universe, done). When resuming, universe is the one saved
+        by the interrupted run (the cursor refers to it) and done maps each
+        finished key to its value. universe may be a callable, called only
+        for a fresh start (e.g. a listing crawl).
+        """
+        header, done, finished = self.replay()
+        if header is not None and not finished and header.get('meta') == meta:
+            self._truncate_torn_tail()
+            self._open('a')
+            return header['universe'], done
+
+        universe = list(universe() if callable(universe) else universe)
+        self._open('w')
+        self._append({'universe': universe, 'meta': meta, 'started': time.time()}, sync=True)
+        return universe, {}
+
+    def record(self, key, value=None):
+        self._append({'key': key, 'value': value})
+
+    def finish(self):
+        self._append({'finished': time.time()}, sync=True)
+        self.close()
+
+    def close(self):
+        if self._f is not None:
+            self._f.flush()
+            os.fsync(self._f.fileno())
+            self._f.close()
+            self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _open(self, mode):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._f = open(self.path, mode, encoding='utf-8')
+
+    def _truncate_torn_tail(self):
+        """
+        Drops a partial last line so new entries start on a fresh line.
+        """
+        with open(self.path, 'r+b') as f:
+            data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end < len(data):
+                f.truncate(end)
+
+    def _append(self, entry, sync=False):
+        self._f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        self._f.flush()
+        self._pending += 1
+        if sync or self._pending >= self.sync_every:
+            os.fsync(self._f.fileno())
+            self._pending = 0
@@ -0,0 +1,72 @@
+
+import re
+
+from common.metrics import timed
+
+# Main page 기업실적분석 (div.section.cop_analysis) row labels -> data keys
+TARGETS = {
+    '영업이익': 'operating_income',
+    '부채비율': 'debt_ratio',
+    '유보율': 'reserve_ratio',
+    'PER(배)': 'PER',
+    'PBR(배)': 'PBR',
+    'ROE(지배주주)': 'ROE'
+}
+
+PERIOD_RE = re.compile(r'(\d{4})\.(\d{2})')
+
+
+def header_periods(analysis_div):
+    """
+    Column periods of the cop_analysis table as 'YYYY/MM' labels, None for
+    estimate columns ('2025.12(E)'). Annual and quarterly columns come in
+    one list, in table order.
+    """
+    for row in analysis_div.select('thead tr'):
+        cells = row.select('th')
+        labels = [PERIOD_RE.search(c.text) for c in cells]
+        if not any(labels): continue
+        periods = []
+        for cell, m in zip(cells, labels):
+            if not m: continue
+            estimate = '(E)' in cell.text.replace(' ', '').replace('\n', '')
+            periods.append(None if estimate else f"{m.group(1)}/{m.group(2)}")
+        return periods
+    return []
+
+
+@timed('parse.cop_analysis')
+def parse_period_series(analysis_div, targets=TARGETS):
+    """
+    {key: {period: value}} for every filed (non-estimate) column.
+    When the same period appears in both the annual and the quarterly block
+    the later (quarterly) cell wins, which matches the table's own layout.
+    """
+    periods = header_periods(analysis_div)
+    series = {}
+    if not periods: return series
+
+    for row in analysis_div.select('tbody tr'):
+        th = row.select_one('th')
+        if not th: continue
+        text = th.text.strip()
+
+        key = None
+        for t_label, t_key in targets.items():
+            if t_label in text:
+                key = t_key
+                break
+        if not key: continue
+
+        values = {}
+        for period, col in zip(periods, row.select('td')):
+            if period is None: continue
+            txt = col.text.strip().replace(',', '')
+            if not txt or txt in ('-', 'N/A'): continue
+            try:
+                values[period] = float(txt)
+            except ValueError:
+                continue
+        if values:
+            series.setdefault(key, {}).update(values)
+    return series
@@ -0,0 +1,119 @@
+
+import sys
+import time
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# exit status of a CLI run whose result was cut short by --deadline
+EXIT_PARTIAL = 3
+
+_current = contextvars.ContextVar('deadline', default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline:
+    """
+    Overall time budget of one run. While active() (or inside a function
+    from wrap(), for pool threads), common.fetch caps every request's
+    timeout and limiter wait to the time left and raises DeadlineExceeded
+    once it is gone, so no call outlives the budget.
+
+    Skills record what they had to drop with skip(); `partial` then tells
+    the caller the result set is incomplete.
+    """
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.expires = None if seconds is None else self.started + seconds
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self.unchecked = []
+
+    def remaining(self):
+        """
+        Seconds left, or None without a budget.
+        """
+        if self._cancelled.is_set(): return 0.0
+        if self.expires is None: return None
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self):
+        return self.remaining() == 0.0
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check(self):
+        if self.expired():
+            raise DeadlineExceeded(f"deadline of {self.seconds}s exceeded")
+
+    def timeout(self, default):
+        """
+        `default` capped to the time left; raises when none is left.
+        """
+        self.check()
+        left = self.remaining()
+        return default if left is None else min(default, left)
+
+    def each(self, items):
+        """
+        Yields items until the deadline passes; the rest are recorded as
+        unchecked. An item whose work was cut mid-way should be passed to
+        skip() by the caller.
+        """
+        items = list(items)
+        for i, item in enumerate(items):
+            if self.expired():
+                self.skip(items[i:])
+                return
+            yield item
+
+    def skip(self, items):
+        with self._lock:
+            self.unchecked.extend(items)
+
+    @property
+    def partial(self):
+        return bool(self.unchecked)
+
+    def summary(self):
+        return {'partial': self.partial, 'deadline': self.seconds,
+                'elapsed': round(time.monotonic() - self.started, 3), 'unchecked': list(self.unchecked)}
+
+    def warn(self, out=sys.stderr):
+        if self.partial:
+            print(f"⚠️ 시간 제한 {self.seconds}초 도달: {len(self.unchecked)}개 항목을 확인하지 못한 부분 결과입니다.", file=out)
+
+    @contextmanager
+    def active(self):
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def wrap(self, func):
+        """
+        func running under this deadline (contextvars do not follow work
+        into ThreadPoolExecutor threads on their own).
+        """
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            with self.active():
+                return func(*args, **kwargs)
+        return inner
+
+
+def current():
+    return _current.get()
+
+
+def add_argument(parser):
+    parser.add_argument('--deadline', type=float, default=None,
+                        help=f"Time budget in seconds; work left at the deadline is dropped and the "
+                             f"partial result is marked (exit status {EXIT_PARTIAL})")
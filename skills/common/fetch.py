@@ -0,0 +1,350 @@
+
+import time
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# requests and bs4 are imported on first use: every skill imports this module,
+# and `--help` or cache-only runs should not pay for them.
+from common.metrics import record_request, record_cache, METRICS
+from common.deadline import DeadlineExceeded, current as current_deadline
+from common import archive, schedule
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+TIMEOUT = 10      # seconds per attempt
+RETRIES = 2       # extra attempts after a timeout / dropped connection / 429 / 5xx
+BACKOFF = 0.5     # seconds, doubled per retry
+MAX_BACKOFF = 30  # cap for a server's Retry-After
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# host -> (requests per second, max concurrent requests)
+HOST_LIMITS = {
+    'finance.naver.com': (10.0, 8),
+    'fchart.stock.naver.com': (20.0, 16),
+    'navercomp.wisereport.co.kr': (5.0, 4),
+}
+DEFAULT_LIMIT = (5.0, 4)
+
+LATENCY_SPIKE = 3.0   # a response this many times slower than the running average
+MIN_RATE_SHARE = 0.125
+
+_local = threading.local()
+
+
+def session():
+    """
+    One keep-alive requests.Session per thread (Session objects are not
+    guaranteed thread safe), so pooled crawls reuse their connections.
+    """
+    s = getattr(_local, 'session', None)
+    if s is None:
+        import requests
+        s = _local.session = requests.Session()
+    return s
+
+
+class HostLimiter:
+    """
+    Token bucket (requests per second) plus an AIMD concurrency window for
+    one host. The window grows by one after a window's worth of clean
+    responses, and is cut on 429/5xx, network errors or latency spikes;
+    throttling also halves the token rate until the host recovers.
+    backoff() pauses every caller of the host, not just the one retrying.
+    """
+    def __init__(self, rate, max_concurrency, min_concurrency=1):
+        self.base_rate = self.rate = float(rate)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max(min_concurrency, max_concurrency // 2))
+        self.tokens = self.burst = max(1.0, self.base_rate)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.in_flight = 0
+        self.latency = None
+        self.successes = 0
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout=None):
+        """
+        Waits for a slot; returns False if none came within `timeout` seconds.
+        """
+        give_up = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.in_flight >= int(self.limit):
+                    wait = None   # woken by release()
+                elif self.tokens < 1:
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return True
+                if give_up is not None:
+                    if now >= give_up: return False
+                    wait = give_up - now if wait is None else min(wait, give_up - now)
+                self._cond.wait(wait)
+
+    def release(self, status, seconds):
+        """
+        status: HTTP status code, 'error' for a failed attempt, or None for
+        an attempt we cut short ourselves (deadline), which says nothing
+        about the host.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if status is None:
+                self._cond.notify_all()
+                return
+            if status == 'error' or status in RETRY_STATUS:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self.rate = max(self.base_rate * MIN_RATE_SHARE, self.rate / 2)
+                self.successes = 0
+            elif self.latency is not None and seconds > LATENCY_SPIKE * self.latency:
+                self.limit = max(self.min_concurrency, self.limit * 0.75)
+                self.successes = 0
+            else:
+                self.successes += 1
+                if self.successes >= self.limit:
+                    self.successes = 0
+                    self.limit = min(self.max_concurrency, self.limit + 1)
+                    self.rate = min(self.base_rate, self.rate * 1.25)
+            if status != 'error':
+                self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+            self._cond.notify_all()
+
+    def backoff(self, delay):
+        with self._cond:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            self._cond.notify_all()
+
+    def state(self):
+        with self._cond:
+            return {'rate': self.rate, 'concurrency': self.limit, 'in_flight': self.in_flight}
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+_share = 1
+
+
+def share_limits(processes):
+    """
+    Splits every host's rate and concurrency between `processes` processes
+    fetching at the same time (the local workers of a sweep), so together
+    they stay within HOST_LIMITS. Each process keeps at least one
+    connection, so the concurrency cap only holds for up to
+    max_sharing() processes. Limiters created earlier are dropped.
+    """
+    global _share
+    with _limiters_lock:
+        _share = max(1, int(processes))
+        _limiters.clear()
+
+
+def max_sharing():
+    """
+    Most processes that can split every host's concurrency (the smallest cap).
+    """
+    return min(concurrency for _, concurrency in [*HOST_LIMITS.values(), DEFAULT_LIMIT])
+
+
+def limiter_for(host):
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            rate, concurrency = HOST_LIMITS.get(host, DEFAULT_LIMIT)
+            limiter = _limiters[host] = HostLimiter(rate / _share, max(1, concurrency // _share))
+        return limiter
+
+
+def retry_after(res):
+    try:
+        return min(MAX_BACKOFF, max(0.0, float(res.headers.get('Retry-After', ''))))
+    except ValueError:
+        return None
+
+
+def normalize_url(url):
+    """
+    Canonical form used as the de-duplication key: lower-case scheme and
+    host, sorted query parameters, no blank parameters or fragment.
+    '...list.naver?&page=1' and '...list.naver?page=1' are the same page.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', query, ''))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Concurrent callers asking for the same key share one execution: the
+    first caller runs it, the others wait and receive the same result (or
+    the same exception). Nothing is kept once the call finishes, so this
+    never serves stale data - it only collapses simultaneous requests.
+    """
+    def __init__(self, name='singleflight'):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        """
+        Followers wait no longer than their own common.deadline allows. A
+        leader cut short by its (shorter) deadline does not fail followers
+        that still have time: they run the call again.
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+            record_cache(self.name, not leader)
+            if leader: break
+
+            deadline = current_deadline()
+            if not call.done.wait(deadline.remaining() if deadline else None):
+                raise DeadlineExceeded(f"deadline reached waiting for a shared {self.name} call")
+            if call.error is None: return call.result
+            if not isinstance(call.error, DeadlineExceeded) or (deadline and deadline.expired()):
+                raise call.error
+
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+_flights = SingleFlight()
+
+
+def get(url, headers=None, timeout=TIMEOUT, retries=RETRIES):
+    """
+    Drop-in for requests.get used by every skill: shared sessions, a
+    timeout, the per-host limiter, retries with backoff on network errors
+    and throttling, and per-host metrics (requests, bytes, status codes,
+    latency, retries, time spent waiting for the limiter). Concurrent calls
+    for the same normalized URL share one request. Under an active
+    common.deadline.Deadline the waits and timeouts are capped to the time
+    left. With common.archive recording, every 200 response is archived;
+    in replay mode pages come from the archive and nothing is fetched.
+    With the common.schedule freshness cache on, a page whose stored copy
+    is still valid for its tier is served from disk, and the stored copy
+    stands in when the request fails.
+    Returns the Response; the caller still decides what a non-200 status
+    means.
+    """
+    return _flights.do(('get', normalize_url(url)), lambda: _get(url, headers, timeout, retries))
+
+
+def get_parsed(url, parse, headers=None):
+    """
+    parse(get(url).text), shared by concurrent callers of the same URL and
+    parser. The result is handed to every caller, so treat it as read-only.
+    """
+    return _flights.do(('parsed', normalize_url(url), parse), lambda: parse(get(url, headers).text))
+
+
+def parse_html(text):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(text, 'html.parser')
+
+
+def get_soup(url, headers=None):
+    return get_parsed(url, parse_html, headers)
+
+
+def _get(url, headers, timeout, retries):
+    mode, _ = archive.active()
+    if mode == 'replay':
+        try:
+            res = archive.replay(url, normalize_url(url))
+        except archive.ArchiveMiss:
+            record_cache('archive', False)
+            raise
+        record_cache('archive', True)
+        return res
+    stale = None
+    if schedule.active() is not None:
+        hit = schedule.lookup(url, normalize_url(url))
+        record_cache('fresh', bool(hit and hit[1]))
+        if hit and hit[1]: return hit[0]
+        stale = hit[0] if hit else None
+    import requests
+    host = urlsplit(url).hostname or ''
+    limiter = limiter_for(host)
+    deadline = current_deadline()
+    for attempt in range(retries + 1):
+        queued = time.perf_counter()
+        acquired = limiter.acquire(deadline.remaining() if deadline else None)
+        start = time.perf_counter()
+        METRICS.add_stage(f"fetch.wait {host}", start - queued)
+        if not acquired:
+            raise DeadlineExceeded(f"deadline reached waiting for {host}")
+        try:
+            res = session().get(url, headers=headers or HEADERS,
+                                timeout=deadline.timeout(timeout) if deadline else timeout)
+        except DeadlineExceeded:
+            limiter.release(None, 0.0)
+            raise
+        except (requests.ConnectionError, requests.Timeout):
+            elapsed = time.perf_counter() - start
+            if deadline and deadline.expired():
+                limiter.release(None, elapsed)
+                raise DeadlineExceeded(f"deadline reached during {url}")
+            limiter.release('error', elapsed)
+            record_request(host, 'error', 0, elapsed, retry=attempt > 0)
+            if attempt == retries:
+                if stale is not None:
+                    record_cache('fresh.stale', True)
+                    return stale
+                raise
+            limiter.backoff(BACKOFF * 2 ** attempt)
+            continue
+        except requests.RequestException:
+            # broken body, redirect loop, bad URL: not retried, but the slot goes back
+            elapsed = time.perf_counter() - start
+            limiter.release('error', elapsed)
+            record_request(host, 'error', 0, elapsed, retry=attempt > 0)
+            raise
+        except BaseException:
+            limiter.release(None, time.perf_counter() - start)
+            raise
+
+        elapsed = time.perf_counter() - start
+        limiter.release(res.status_code, elapsed)
+        record_request(host, res.status_code, len(res.content), elapsed, retry=attempt > 0)
+        if res.status_code in RETRY_STATUS and attempt < retries:
+            if deadline and deadline.expired(): return res
+            limiter.backoff(retry_after(res) or BACKOFF * 2 ** attempt)
+            continue
+        if res.status_code >= 500 and stale is not None:
+            record_cache('fresh.stale', True)
+            return stale
+        if mode == 'record':
+            archive.record(url, normalize_url(url), res)
+        schedule.remember(url, normalize_url(url), res)
+        return res
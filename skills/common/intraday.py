@@ -0,0 +1,211 @@
+
+import os
+import sys
+import argparse
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+
+import numpy as np
+
+# Allow running this file directly as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import fetch, schedule
+from common.metrics import timed
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+SESSION_OPEN = 9 * 60          # 09:00, minutes of the day
+SESSION_CLOSE = 15 * 60 + 30   # 15:30
+SESSION_MINUTES = SESSION_CLOSE - SESSION_OPEN + 1
+BASELINE_DAYS = 5              # previous sessions averaged into the volume baseline
+
+
+def minute_of_day(stamp):
+    """
+    yyyymmddHHMM -> minutes since midnight.
+    """
+    return (stamp // 100 % 100) * 60 + stamp % 100
+
+
+@timed('intraday.fetch')
+def fetch_minutes(code, count=SESSION_MINUTES):
+    """
+    Fetches the latest `count` one-minute bars from fchart.stock.naver.com
+    (XML) as [(yyyymmddHHMM, open, high, low, close, volume)], oldest first.
+    Volume is per minute; open/high/low come back as "null" for many bars
+    and are filled from the close.
+    """
+    url = f"https://fchart.stock.naver.com/sise.nhn?symbol={code}&timeframe=minute&count={count}&requestType=0"
+    res = fetch.get(url, headers=HEADERS)
+    root = ET.fromstring(res.text)
+
+    rows = []
+    for item in root.findall('./chartdata/item'):
+        # Format: "202310251031|null|null|null|58100|3127"
+        parts = item.get('data').split('|')
+        if len(parts) < 6: continue
+        try:
+            close = float(parts[4])
+            ohl = [close if p in ('', 'null') else float(p) for p in parts[1:4]]
+            volume = 0.0 if parts[5] in ('', 'null') else float(parts[5])
+            rows.append((int(parts[0]), *ohl, close, volume))
+        except ValueError:
+            continue
+    return rows
+
+
+class MinuteRing:
+    """
+    Fixed-size buffer of one code's minute bars. Appending past `capacity`
+    overwrites the oldest bar, so memory stays the same all session no
+    matter how often the code is refreshed. The newest minute may be
+    appended again while it is still forming; it is then replaced.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.stamp = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((capacity, len(FIELDS)))
+        self.head = 0    # next slot to write
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def last_stamp(self):
+        return int(self.stamp[self.head - 1]) if self.size else None
+
+    def append(self, row):
+        stamp, values = row[0], row[1:6]
+        last = self.last_stamp
+        if last is not None and stamp < last: return   # already have it
+        if stamp == last:
+            self.values[self.head - 1] = values
+            return
+        self.stamp[self.head] = stamp
+        self.values[self.head] = values
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def columns(self):
+        """
+        Stored bars oldest first as {'stamp', 'open', ..., 'volume'} arrays.
+        """
+        order = (np.arange(self.size) + self.head - self.size) % self.capacity
+        cols = {'stamp': self.stamp[order]}
+        for i, field in enumerate(FIELDS):
+            cols[field] = self.values[order, i]
+        return cols
+
+
+def volume_ratio(cols, baseline_days=BASELINE_DAYS):
+    """
+    Today's cumulative volume up to its latest bar, as % of the average
+    cumulative volume of the previous sessions by the same time of day.
+    A 10:30 reading is compared with earlier 10:30 readings instead of
+    whole days. None when there is no earlier session to compare with.
+    """
+    if not len(cols['stamp']): return None
+    days = cols['stamp'] // 10000
+    minutes = minute_of_day(cols['stamp'])
+    today = days[-1]
+    now = minutes[-1]
+    current = cols['volume'][days == today].sum()
+
+    previous = [d for d in np.unique(days) if d != today][-baseline_days:]
+    if not previous: return None
+    baseline = np.mean([cols['volume'][(days == d) & (minutes <= now)].sum() for d in previous])
+    if baseline <= 0: return None
+    return current / baseline * 100
+
+
+class IntradayBook:
+    """
+    Minute bars of many codes for the whole session. Each code gets a
+    MinuteRing holding today plus `baseline_days` earlier sessions; at most
+    `max_codes` rings are kept, the least recently updated code dropping
+    out first. update() fetches only the minutes since the code's last bar
+    after the first load.
+    """
+    def __init__(self, baseline_days=BASELINE_DAYS, max_codes=500):
+        self.baseline_days = baseline_days
+        self.capacity = SESSION_MINUTES * (baseline_days + 1)
+        self.max_codes = max_codes
+        self._rings = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, code):
+        return code in self._rings
+
+    def ring(self, code):
+        with self._lock:
+            ring = self._rings.get(code)
+            if ring is None:
+                ring = self._rings[code] = MinuteRing(self.capacity)
+                while len(self._rings) > self.max_codes:
+                    self._rings.popitem(last=False)
+            self._rings.move_to_end(code)
+            return ring
+
+    def missing(self, last, now):
+        """
+        Bars to request for a ring whose newest bar is `last`. The newest
+        stored minute is fetched again, it may have been still forming.
+        A ring from an earlier day is reloaded whole.
+        """
+        if last is None or last // 10000 != int(now.strftime('%Y%m%d')):
+            return self.capacity
+        gap = now.hour * 60 + now.minute - minute_of_day(last)
+        return min(self.capacity, max(2, gap + 2))
+
+    def update(self, code, now=None):
+        """
+        Brings the code's ring up to date. Returns the number of bars held.
+        `now` defaults to the current time in Korea, the clock of the bar
+        stamps, whatever the host's time zone.
+        """
+        ring = self.ring(code)
+        count = self.missing(ring.last_stamp, now or schedule.now())
+        try:
+            rows = fetch_minutes(code, count)
+        except Exception as e:
+            print(f"Error fetching minute bars for {code}: {e}")
+            return len(ring)
+        with self._lock:
+            ring.extend(rows)
+        return len(ring)
+
+    def columns(self, code):
+        with self._lock:
+            ring = self._rings.get(code)
+            return ring.columns() if ring else None
+
+    def volume_ratio(self, code):
+        cols = self.columns(code)
+        return volume_ratio(cols, self.baseline_days) if cols else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time-of-day volume ratio from minute bars')
+    parser.add_argument('codes', nargs='+', help='Stock codes (e.g. 005930 000660)')
+    parser.add_argument('--days', type=int, default=BASELINE_DAYS, help='Earlier sessions in the baseline')
+    args = parser.parse_args()
+
+    book = IntradayBook(baseline_days=args.days)
+    for code in args.codes:
+        book.update(code)
+        ratio = book.volume_ratio(code)
+        print(f"[{code}] 같은 시각 평균 대비 거래량: {'?' if ratio is None else f'{ratio:.0f}%'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+
+import sys
+import hashlib
+
+from common.cache import JsonCache
+from common.metrics import record_cache
+
+
+def rule_version(*rules, **params):
+    """
+    Short digest of the rules' source code (functions or classes) and of
+    their parameters. Editing a rule or changing a cut-off gives a new
+    version, which invalidates every memo entry computed with the old one.
+    """
+    import inspect
+    h = hashlib.sha1()
+    for rule in rules:
+        try:
+            h.update(inspect.getsource(rule).encode('utf-8'))
+        except (OSError, TypeError):
+            h.update(repr(rule).encode('utf-8'))
+    h.update(repr(sorted(params.items())).encode('utf-8'))
+    return h.hexdigest()[:12]
+
+
+class SignalMemo:
+    """
+    Per-code results (indicators, verdicts) kept with the bar they were
+    computed from and the rule version, one JSON document per code under
+    <data root>/cache/memo-<name>. `bar` is a string that changes whenever
+    the input does (last bar date and values); a result is returned only
+    while both bar and version still match, so new bars or edited rules
+    recompute it.
+    """
+    def __init__(self, name, version, cache=None):
+        self.name = name
+        self.version = version
+        self.cache = cache or JsonCache(f"memo-{name}")
+
+    def get(self, code, bar):
+        doc = self.cache.get(code)
+        hit = doc is not None and doc.get('version') == self.version and doc.get('bar') == bar
+        record_cache(f"memo.{self.name}", hit)
+        return doc['value'] if hit else None
+
+    def put(self, code, bar, value):
+        try:
+            self.cache.put(code, {'code': code, 'bar': bar, 'version': self.version, 'value': value})
+        except OSError as e:
+            print(f"Error saving {self.name} memo for {code}: {e}", file=sys.stderr)
+        return value
+
+    def cached(self, code, bar, compute):
+        """
+        The stored result for (code, bar), or compute() stored for next
+        time. None results are not stored.
+        """
+        value = self.get(code, bar)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(code, bar, value)
+        return value
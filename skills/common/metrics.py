@@ -0,0 +1,171 @@
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import functools
+from contextlib import contextmanager
+
+# NAVER_STOCKS_METRICS=1             -> print a summary to stderr at exit
+# NAVER_STOCKS_METRICS_FILE=run.json -> also write it as JSON (.prom: Prometheus text)
+ENV_SUMMARY = 'NAVER_STOCKS_METRICS'
+ENV_FILE = 'NAVER_STOCKS_METRICS_FILE'
+
+
+class Metrics:
+    """
+    Process-wide counters for one run: wall time per stage, HTTP traffic per
+    host and cache hits/misses. Thread safe; recording is a dict update
+    under a lock, cheap enough to leave on in every fetcher and parser.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.stages = {}     # name -> {'calls', 'seconds', 'max'}
+            self.requests = {}   # host -> {'requests', 'bytes', 'seconds', 'retries', 'errors', 'status'}
+            self.caches = {}     # name -> {'hits', 'misses'}
+
+    # --- recording -------------------------------------------------------
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            s = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'max': 0.0})
+            s['calls'] += 1
+            s['seconds'] += seconds
+            s['max'] = max(s['max'], seconds)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """
+        Decorator form of stage().
+        """
+        def wrap(func):
+            @functools.wraps(func)
+            def inner(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return inner
+        return wrap
+
+    def request(self, host, status, nbytes=0, seconds=0.0, retry=False):
+        """
+        One HTTP attempt. status is the response code, or 'error' when the
+        attempt raised (timeout, connection reset).
+        """
+        with self._lock:
+            r = self.requests.setdefault(host, {'requests': 0, 'bytes': 0, 'seconds': 0.0,
+                                                'retries': 0, 'errors': 0, 'status': {}})
+            r['requests'] += 1
+            r['bytes'] += nbytes
+            r['seconds'] += seconds
+            r['retries'] += int(retry)
+            if status == 'error': r['errors'] += 1
+            key = str(status)
+            r['status'][key] = r['status'].get(key, 0) + 1
+
+    def cache(self, name, hit):
+        with self._lock:
+            c = self.caches.setdefault(name, {'hits': 0, 'misses': 0})
+            c['hits' if hit else 'misses'] += 1
+
+    # --- reporting -------------------------------------------------------
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps({
+                'elapsed': time.time() - self.started,
+                'stages': self.stages,
+                'requests': self.requests,
+                'caches': self.caches,
+            }))
+
+    def empty(self):
+        return not (self.stages or self.requests or self.caches)
+
+    def summary(self):
+        snap = self.snapshot()
+        lines = [f"=== 실행 계측 ({snap['elapsed']:.1f}s) ==="]
+        if snap['stages']:
+            lines.append(f"{'단계':<32}{'호출':>8}{'합계(s)':>10}{'평균(ms)':>10}{'최대(ms)':>10}")
+            for name, s in sorted(snap['stages'].items(), key=lambda kv: -kv[1]['seconds']):
+                avg = s['seconds'] / s['calls'] * 1000 if s['calls'] else 0
+                lines.append(f"{name:<32}{s['calls']:>8}{s['seconds']:>10.2f}{avg:>10.1f}{s['max'] * 1000:>10.1f}")
+        if snap['requests']:
+            lines.append(f"{'호스트':<32}{'요청':>8}{'MB':>8}{'합계(s)':>10}{'재시도':>8}{'오류':>6}  상태코드")
+            for host, r in sorted(snap['requests'].items()):
+                status = ' '.join(f"{k}:{v}" for k, v in sorted(r['status'].items()))
+                lines.append(f"{host:<32}{r['requests']:>8}{r['bytes'] / 1e6:>8.2f}{r['seconds']:>10.2f}"
+                             f"{r['retries']:>8}{r['errors']:>6}  {status}")
+        if snap['caches']:
+            lines.append(f"{'캐시':<32}{'적중':>8}{'미스':>8}{'적중률':>8}")
+            for name, c in sorted(snap['caches'].items()):
+                total = c['hits'] + c['misses']
+                rate = f"{c['hits'] / total * 100:.1f}%" if total else "-"
+                lines.append(f"{name:<32}{c['hits']:>8}{c['misses']:>8}{rate:>8}")
+        return '\n'.join(lines)
+
+    def prometheus(self):
+        snap = self.snapshot()
+        esc = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"')
+        out = [f"naver_stocks_run_seconds {snap['elapsed']:.3f}"]
+        for name, s in snap['stages'].items():
+            out.append(f'naver_stocks_stage_calls_total{{stage="{esc(name)}"}} {s["calls"]}')
+            out.append(f'naver_stocks_stage_seconds_total{{stage="{esc(name)}"}} {s["seconds"]:.6f}')
+        for host, r in snap['requests'].items():
+            h = esc(host)
+            out.append(f'naver_stocks_http_requests_total{{host="{h}"}} {r["requests"]}')
+            out.append(f'naver_stocks_http_bytes_total{{host="{h}"}} {r["bytes"]}')
+            out.append(f'naver_stocks_http_seconds_total{{host="{h}"}} {r["seconds"]:.6f}')
+            out.append(f'naver_stocks_http_retries_total{{host="{h}"}} {r["retries"]}')
+            for status, n in r['status'].items():
+                out.append(f'naver_stocks_http_responses_total{{host="{h}",status="{esc(status)}"}} {n}')
+        for name, c in snap['caches'].items():
+            out.append(f'naver_stocks_cache_hits_total{{cache="{esc(name)}"}} {c["hits"]}')
+            out.append(f'naver_stocks_cache_misses_total{{cache="{esc(name)}"}} {c["misses"]}')
+        return '\n'.join(out) + '\n'
+
+    def dump(self, path):
+        """
+        Writes JSON, or Prometheus text exposition when path ends in .prom.
+        """
+        text = self.prometheus() if path.endswith('.prom') else json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+
+METRICS = Metrics()
+
+stage = METRICS.stage
+timed = METRICS.timed
+record_request = METRICS.request
+record_cache = METRICS.cache
+
+
+def _report_at_exit():
+    if METRICS.empty(): return
+    if os.environ.get(ENV_SUMMARY, '') not in ('', '0'):
+        print(METRICS.summary(), file=sys.stderr)
+    path = os.environ.get(ENV_FILE)
+    if path:
+        try:
+            METRICS.dump(path)
+        except OSError as e:
+            print(f"Error writing metrics to {path}: {e}", file=sys.stderr)
+
+
+atexit.register(_report_at_exit)
@@ -0,0 +1,172 @@
+
+import os
+import sys
+import argparse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Allow running this file directly as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import fetch
+from common.metrics import timed
+from common.paths import data_dir
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+@timed('ohlcv.fetch')
+def fetch_daily(code, count=3000):
+    """
+    Fetches daily OHLCV from fchart.stock.naver.com (XML) as column arrays.
+    Index symbols such as 'KOSPI' / 'KOSDAQ' work as well.
+    """
+    url = f"https://fchart.stock.naver.com/sise.nhn?symbol={code}&timeframe=day&count={count}&requestType=0"
+    res = fetch.get(url, headers=HEADERS)
+    root = ET.fromstring(res.text)
+
+    rows = []
+    for item in root.findall('./chartdata/item'):
+        # Format: "20231025|58100|59100|57100|58100|17327734"
+        parts = item.get('data').split('|')
+        if len(parts) < 6: continue
+        rows.append(parts[:6])
+    return rows_to_bars(rows)
+
+
+def rows_to_bars(rows):
+    """
+    Converts [date, open, high, low, close, volume] string rows into a dict of
+    numpy columns. Dates are kept as yyyymmdd integers.
+    """
+    if not rows:
+        return {'date': np.empty(0, dtype=np.int64), **{f: np.empty(0) for f in FIELDS}}
+    arr = np.array(rows, dtype=object)
+    bars = {'date': arr[:, 0].astype(np.int64)}
+    for i, field in enumerate(FIELDS, start=1):
+        bars[field] = arr[:, i].astype(np.float64)
+    return bars
+
+
+def merge_bars(old, new):
+    """
+    Union of two bar sets by date. Rows in `new` win on duplicate dates.
+    """
+    if old is None or len(old['date']) == 0: return new
+    if len(new['date']) == 0: return old
+    dates = np.concatenate([new['date'], old['date']])
+    # np.unique keeps the first occurrence, i.e. the newer row
+    _, keep = np.unique(dates, return_index=True)
+    return {k: np.concatenate([new[k], old[k]])[keep] for k in ('date',) + FIELDS}
+
+
+class Panel:
+    """
+    Dates x codes view over the store. Each field is a 2D float array with NaN
+    where a code has no bar on that date (not listed yet, halted, ...).
+    """
+    def __init__(self, dates, codes, fields):
+        self.dates = dates
+        self.codes = list(codes)
+        self.fields = fields
+        self._col = {c: i for i, c in enumerate(self.codes)}
+
+    def col(self, code):
+        return self._col.get(code)
+
+    def __getitem__(self, field):
+        return self.fields[field]
+
+
+class OHLCVStore:
+    """
+    Local daily OHLCV store. One compressed .npz per code under
+    <data root>/ohlcv, so batch jobs (seasonality, backtests) never hit the
+    network once the store is warm.
+    """
+    def __init__(self, root=None):
+        self.root = root or data_dir('ohlcv')
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, code):
+        return os.path.join(self.root, f"{code}.npz")
+
+    def has(self, code):
+        return os.path.exists(self.path(code))
+
+    def codes(self):
+        return sorted(f[:-4] for f in os.listdir(self.root) if f.endswith('.npz'))
+
+    def save(self, code, bars):
+        tmp = self.path(code) + '.tmp.npz'
+        np.savez_compressed(tmp, **bars)
+        os.replace(tmp, self.path(code))
+
+    def load(self, code):
+        if not self.has(code): return None
+        with np.load(self.path(code)) as f:
+            return {k: f[k] for k in ('date',) + FIELDS}
+
+    def update(self, code, count=3000):
+        """
+        Fetches the latest `count` bars and merges them into the stored file.
+        Returns the number of bars stored for the code.
+        """
+        try:
+            bars = merge_bars(self.load(code), fetch_daily(code, count))
+        except Exception as e:
+            print(f"Error updating history for {code}: {e}")
+            return 0
+        if len(bars['date']):
+            self.save(code, bars)
+        return len(bars['date'])
+
+    def update_many(self, codes, count=3000, workers=8):
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return dict(zip(codes, pool.map(lambda c: self.update(c, count), codes)))
+
+    @timed('ohlcv.load_panel')
+    def load_panel(self, codes, start=None, end=None, fields=FIELDS, workers=8):
+        """
+        Loads many codes into one aligned Panel. Files are decompressed in a
+        thread pool (zlib releases the GIL, so this spreads over cores).
+        Codes missing from the store are kept as all-NaN columns.
+        """
+        codes = list(codes)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            loaded = list(pool.map(self.load, codes))
+
+        present = [b for b in loaded if b is not None and len(b['date'])]
+        dates = np.unique(np.concatenate([b['date'] for b in present])) if present else np.empty(0, dtype=np.int64)
+        if start is not None: dates = dates[dates >= start]
+        if end is not None: dates = dates[dates <= end]
+
+        out = {f: np.full((len(dates), len(codes)), np.nan) for f in fields}
+        for j, bars in enumerate(loaded):
+            if bars is None or not len(dates): continue
+            mask = (bars['date'] >= dates[0]) & (bars['date'] <= dates[-1])
+            rows = np.searchsorted(dates, bars['date'][mask])
+            for f in fields:
+                out[f][rows, j] = bars[f][mask]
+        return Panel(dates, codes, out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Update the local OHLCV store')
+    parser.add_argument('codes', nargs='+', help='Stock codes or index symbols (e.g. 005930 KOSPI)')
+    parser.add_argument('--count', type=int, default=3000, help='Bars to request per code (~12 years)')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    store = OHLCVStore()
+    result = store.update_many(args.codes, args.count, args.workers)
+    print(f"{len(result)}개 종목 저장 완료 ({store.root})")
+
+
+if __name__ == "__main__":
+    main()
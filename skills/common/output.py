@@ -0,0 +1,149 @@
+
+import sys
+import csv
+import json
+
+# Machine-readable formats every skill accepts next to its human report
+FORMATS = ('ndjson', 'csv', 'json', 'parquet')
+
+
+def flatten(record, prefix=''):
+    """
+    Nested dicts become dotted columns ({'fundamentals': {'PER': 5}} ->
+    {'fundamentals.PER': 5}); lists become JSON text. Used for the
+    tabular formats (CSV, Parquet).
+    """
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (list, tuple)):
+            flat[name] = json.dumps(value, ensure_ascii=False)
+        else:
+            flat[name] = value
+    return flat
+
+
+class RecordWriter:
+    """
+    Writes result records as a skill produces them.
+
+    ndjson  one JSON object per line, flushed per record (streaming)
+    csv     flattened rows, header from `fields` or the first record, flushed per record
+    json    one JSON array, written on close
+    parquet flattened columns via pandas + pyarrow, written on close (needs --output)
+
+    The target is bound when the writer is created, so a skill can send its
+    progress prints to stderr (contextlib.redirect_stdout) while records
+    keep going to the real stdout.
+    """
+    def __init__(self, fmt, output=None, fields=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown format {fmt!r} (choose from {', '.join(FORMATS)})")
+        if fmt == 'parquet' and not output:
+            raise ValueError("parquet output needs a file path (--output)")
+        self.fmt = fmt
+        self.output = output
+        self.fields = list(fields) if fields else None
+        self.count = 0
+        self._rows = []
+        self._csv = None
+        self._out = None
+        if fmt != 'parquet':
+            self._out = open(output, 'w', encoding='utf-8', newline='') if output else sys.stdout
+
+    def write(self, record):
+        self.count += 1
+        if self.fmt == 'ndjson':
+            self._out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self._out.flush()
+        elif self.fmt == 'csv':
+            row = flatten(record)
+            if self._csv is None:
+                self._csv = csv.DictWriter(self._out, fieldnames=self.fields or list(row), extrasaction='ignore')
+                self._csv.writeheader()
+            self._csv.writerow(row)
+            self._out.flush()
+        else:
+            self._rows.append(record)
+
+    def close(self):
+        try:
+            if self.fmt == 'json':
+                json.dump(self._rows, self._out, ensure_ascii=False, indent=2, default=str)
+                self._out.write("\n")
+            elif self.fmt == 'csv' and self._csv is None and self.fields:
+                csv.DictWriter(self._out, fieldnames=self.fields).writeheader()
+            elif self.fmt == 'parquet':
+                write_parquet([flatten(r) for r in self._rows], self.output, self.fields)
+        finally:
+            if self._out is not None and self.output:
+                self._out.close()
+            elif self._out is not None:
+                self._out.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+PARQUET_MISSING = "Parquet 출력에는 pandas 와 pyarrow 가 필요합니다 (pip install pandas pyarrow)."
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401  (pandas' parquet engine)
+        import pandas  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def write_parquet(rows, path, fields=None):
+    if not parquet_available():
+        raise RuntimeError(PARQUET_MISSING)
+    import pandas as pd
+    df = pd.DataFrame(rows, columns=fields) if fields else pd.DataFrame(rows)
+    df.to_parquet(path, index=False)
+
+
+def add_arguments(parser, human='text'):
+    """
+    --format / --output for a skill CLI. `human` names the skill's own
+    report, which stays the default.
+    """
+    parser.add_argument('--format', choices=(human,) + FORMATS, default=human,
+                        help=f"{human}: human report; ndjson/csv/json/parquet: one record per result")
+    parser.add_argument('--output', type=str, default=None, help='Write records to this file (default: stdout)')
+
+
+def check_args(parser, args):
+    """
+    Rejects parquet without --output or without pyarrow, before a skill
+    spends a long scan on records it could not write.
+    """
+    if args.format == 'parquet':
+        if not args.output:
+            parser.error("--format parquet needs --output")
+        if not parquet_available():
+            parser.error(PARQUET_MISSING)
+    return args
+
+
+def parse_args(parser, argv=None):
+    """
+    parser.parse_args() followed by check_args().
+    """
+    return check_args(parser, parser.parse_args(argv))
+
+
+def open_writer(args, fields=None):
+    """
+    RecordWriter for parsed --format/--output arguments. Create it before
+    redirecting stdout, so only the records reach stdout.
+    """
+    return RecordWriter(args.format, args.output, fields)
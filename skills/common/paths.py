@@ -0,0 +1,15 @@
+import os
+
+# All persisted state (OHLCV store, caches, ...) lives under one root so it can
+# be moved or wiped in one place. Override with NAVER_STOCKS_DATA.
+DEFAULT_ROOT = os.path.join(os.path.expanduser('~'), '.cache', 'naver_stocks')
+
+
+def data_dir(*parts):
+    """
+    Returns (and creates) a directory below the data root.
+    """
+    root = os.environ.get('NAVER_STOCKS_DATA', DEFAULT_ROOT)
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,80 @@
+from datetime import date, datetime, timedelta
+
+# Quarter ends and statutory filing windows for KRX-listed companies:
+# 분기/반기보고서 are due 45 days after the quarter, 사업보고서 90 days after year end.
+QUARTER_END_MONTHS = (3, 6, 9, 12)
+FILING_DAYS = {3: 45, 6: 45, 9: 45, 12: 90}
+
+
+def to_date(value=None):
+    """
+    Accepts date/datetime, 'YYYY-MM-DD', 'YYYYMMDD' or yyyymmdd int.
+    None means today.
+    """
+    if value is None: return date.today()
+    if isinstance(value, datetime): return value.date()
+    if isinstance(value, date): return value
+    text = str(value).replace('-', '').replace('.', '')
+    return datetime.strptime(text[:8], '%Y%m%d').date()
+
+
+def period_end(period):
+    """
+    'YYYY/MM' period label (WiseReport column style) -> quarter end date.
+    """
+    year, month = (int(x) for x in period.split('/')[:2])
+    if month == 12: return date(year, 12, 31)
+    return date(year, month + 1, 1) - timedelta(days=1)
+
+
+def latest_period(today=None):
+    """
+    Most recent quarter that has ended on or before `today`, as 'YYYY/MM'.
+    This is the newest period a company could have filed for.
+    """
+    today = to_date(today)
+    for month in reversed(QUARTER_END_MONTHS):
+        label = f"{today.year}/{month:02d}"
+        if period_end(label) <= today: return label
+    return f"{today.year - 1}/12"
+
+
+def filing_deadline(period):
+    return period_end(period) + timedelta(days=FILING_DAYS[int(period.split('/')[1])])
+
+
+def in_filing_window(today=None):
+    """
+    True while filings for the latest period may still arrive.
+    """
+    today = to_date(today)
+    return today <= filing_deadline(latest_period(today))
+
+
+def next_period_end(today=None):
+    today = to_date(today)
+    for month in QUARTER_END_MONTHS:
+        label = f"{today.year}/{month:02d}"
+        if period_end(label) > today: return period_end(label)
+    return date(today.year + 1, 3, 31)
+
+
+def needs_refresh(latest_filed, fetched, today=None, recheck_days=3):
+    """
+    Decides whether period-keyed data must be refetched.
+    latest_filed: newest actual (non-estimate) period in the cached data, or None.
+    fetched: when the cached copy was downloaded.
+
+    - already holds the newest possible period -> keep until the next quarter ends
+    - checked after the filing deadline        -> keep (late filers are rare)
+    - fetched before the quarter ended         -> refetch
+    - otherwise we are inside the filing window: recheck every `recheck_days`
+    """
+    today = to_date(today)
+    fetched = to_date(fetched)
+    expected = latest_period(today)
+
+    if latest_filed and period_end(latest_filed) >= period_end(expected): return False
+    if fetched > filing_deadline(expected): return False
+    if fetched < period_end(expected): return True
+    return (today - fetched).days >= recheck_days
@@ -0,0 +1,172 @@
+
+import time
+import threading
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+
+from common.cache import JsonCache
+from common.deadline import DeadlineExceeded
+
+PRIOR_WEIGHT = 5     # observations a declared cost / pass rate is worth
+MIN_REJECT = 0.01    # a filter that (almost) never rejects still gets a finite rank
+
+
+class Source:
+    """
+    One piece of per-item data a filter may need (a page fetch, a cache
+    lookup). load(item, data) gets the values of `needs` already in data.
+    `cost` is the expected seconds per load before anything was observed.
+    """
+    def __init__(self, name, load, cost=0.1, needs=()):
+        self.name = name
+        self.load = load
+        self.cost = cost
+        self.needs = tuple(needs)
+
+
+class Filter:
+    """
+    A predicate over one item and its loaded sources: check(item, data).
+    `cost` (seconds) and `pass_rate` are priors, replaced by what the
+    pipeline observes as runs accumulate.
+    """
+    def __init__(self, name, check, needs=(), cost=0.001, pass_rate=0.5):
+        self.name = name
+        self.check = check
+        self.needs = tuple(needs)
+        self.cost = cost
+        self.pass_rate = pass_rate
+
+
+class Pipeline:
+    """
+    Runs a set of filters over items, cheapest expected rejection first.
+
+    The order is chosen greedily: the next filter is the one with the
+    lowest (its cost + cost of the sources it still has to load) /
+    (share of items it rejects). Costs and pass rates start from the
+    declared priors and move towards the observed averages, which are kept
+    per pipeline under the data root so later runs start from them.
+
+    Items go through in batches of `batch`: each stage loads its missing
+    source for every surviving item of the batch on `workers` threads
+    before checking them. batch=1 decides (and yields) item by item.
+    """
+    def __init__(self, name, sources, filters, batch=1, workers=1, stats=None):
+        self.name = name
+        self.sources = {s.name: s for s in sources}
+        self.filters = list(filters)
+        self.batch = max(1, batch)
+        self.workers = max(1, workers)
+        self.cache = stats or JsonCache('pipeline')
+        self.stats = self.cache.get(name) or {'sources': {}, 'filters': {}}
+        self._lock = threading.Lock()
+
+    # --- estimates -------------------------------------------------------
+
+    def source_cost(self, name):
+        s = self.stats['sources'].get(name, {'calls': 0, 'seconds': 0.0})
+        return (self.sources[name].cost * PRIOR_WEIGHT + s['seconds']) / (PRIOR_WEIGHT + s['calls'])
+
+    def filter_estimate(self, f):
+        """
+        (expected seconds of the check itself, expected pass rate)
+        """
+        s = self.stats['filters'].get(f.name, {'checked': 0, 'passed': 0, 'seconds': 0.0})
+        cost = (f.cost * PRIOR_WEIGHT + s['seconds']) / (PRIOR_WEIGHT + s['checked'])
+        rate = (f.pass_rate * PRIOR_WEIGHT + s['passed']) / (PRIOR_WEIGHT + s['checked'])
+        return cost, rate
+
+    def closure(self, names):
+        """
+        Source names plus everything they transitively need.
+        """
+        out = []
+        for name in names:
+            for dep in self.closure(self.sources[name].needs):
+                if dep not in out: out.append(dep)
+            if name not in out: out.append(name)
+        return out
+
+    def order(self):
+        remaining = list(self.filters)
+        loaded = set()
+        ordered = []
+        while remaining:
+            def rank(f):
+                cost, rate = self.filter_estimate(f)
+                cost += sum(self.source_cost(n) for n in self.closure(f.needs) if n not in loaded)
+                return cost / max(MIN_REJECT, 1 - rate)
+            best = min(remaining, key=rank)
+            remaining.remove(best)
+            loaded.update(self.closure(best.needs))
+            ordered.append(best)
+        return ordered
+
+    # --- running ---------------------------------------------------------
+
+    def _observe(self, kind, name, seconds, **counts):
+        with self._lock:
+            s = self.stats[kind].setdefault(name, {'seconds': 0.0})
+            s['seconds'] += seconds
+            for key, n in counts.items():
+                s[key] = s.get(key, 0) + n
+
+    def _load(self, item, data, names):
+        for name in names:
+            if name in data: continue
+            start = time.perf_counter()
+            data[name] = self.sources[name].load(item, data)
+            self._observe('sources', name, time.perf_counter() - start, calls=1)
+
+    def _check(self, f, item, data):
+        start = time.perf_counter()
+        ok = bool(f.check(item, data))
+        self._observe('filters', f.name, time.perf_counter() - start, checked=1, passed=int(ok))
+        return ok
+
+    def run(self, items, deadline=None):
+        """
+        Yields (item, data) for every item that passes all filters, in input
+        order within each batch. data holds the sources loaded for it.
+
+        With a common.deadline.Deadline, loads run under it and the run
+        stops once it expires: items not fully decided by then (including
+        the rest of `items`) are recorded with deadline.skip().
+        """
+        pool = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        load = deadline.wrap(self._load) if deadline else self._load
+        items = iter(items)
+        try:
+            while True:
+                alive = [(item, {}) for item in islice(items, self.batch)]
+                if not alive: break
+                for f in self.order():
+                    needs = self.closure(f.needs)
+                    try:
+                        if deadline: deadline.check()
+                        if pool and len(alive) > 1:
+                            list(pool.map(lambda e: load(e[0], e[1], needs), alive))
+                        else:
+                            for item, data in alive:
+                                load(item, data, needs)
+                    except DeadlineExceeded:
+                        pass
+                    if deadline and deadline.expired():
+                        # loads may have been cut short: these items are undecided
+                        deadline.skip([item for item, _ in alive] + list(items))
+                        return
+                    alive = [(item, data) for item, data in alive if self._check(f, item, data)]
+                    if not alive: break
+                yield from alive
+        finally:
+            if pool: pool.shutdown(wait=False)
+            self.save()
+
+    def save(self):
+        with self._lock:
+            doc = {'sources': dict(self.stats['sources']), 'filters': dict(self.stats['filters'])}
+        try:
+            self.cache.put(self.name, doc)
+        except OSError as e:
+            print(f"Error saving pipeline stats for {self.name}: {e}")
@@ -0,0 +1,189 @@
+
+import os
+import threading
+
+from common.paths import data_dir
+from common.metrics import timed
+from common.periods import filing_deadline, to_date
+
+LOG_NAME = 'observations.tsv'
+COMPILED_NAME = 'compiled.npz'
+DATE_SPAN = 10 ** 8   # yyyymmdd fits below this, so key * DATE_SPAN + date sorts by (key, date)
+
+
+def yyyymmdd(d):
+    d = to_date(d)
+    return d.year * 10000 + d.month * 100 + d.day
+
+
+def period_num(period):
+    year, month = period.split('/')[:2]
+    return int(year) * 100 + int(month)
+
+
+class PointInTimeStore:
+    """
+    Versioned fundamentals: every (code, metric, period) value is logged with
+    the date it was first observed, and again whenever it changes
+    (restatements). The log is an append-only TSV:
+
+        code  metric  period  observed  value  source
+
+    source is 'live' for values seen on the page, or 'deadline' when a period
+    was already on the page the first time a code was recorded; those are
+    dated at their statutory filing deadline (never later than the first
+    crawl) so the first crawl still yields ~2 years of usable history.
+    """
+    def __init__(self, root=None):
+        self.root = root or data_dir('pit')
+        os.makedirs(self.root, exist_ok=True)
+        self.log_path = os.path.join(self.root, LOG_NAME)
+        self._lock = threading.Lock()
+        self._known = None
+        self._known_codes = None
+
+    def rows(self):
+        if not os.path.exists(self.log_path): return
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) < 6: continue
+                code, metric, period, observed, value, source = parts[:6]
+                yield code, metric, period, int(observed), float(value), source
+
+    def _load_known(self):
+        known = {}
+        for code, metric, period, observed, value, _ in self.rows():
+            known[(code, metric, period)] = value
+        return known
+
+    @timed('pit.record')
+    def record(self, code, series, observed=None, backfill=True):
+        """
+        series: {metric: {period: value}} as parsed from the page.
+        Appends only new or changed values. Returns the number of rows written.
+        """
+        today = to_date(observed)
+        obs = yyyymmdd(today)
+        lines = []
+        with self._lock:
+            if self._known is None:
+                self._known = self._load_known()
+                self._known_codes = {k[0] for k in self._known}
+            first_time = backfill and code not in self._known_codes
+            self._known_codes.add(code)
+
+            for metric, values in series.items():
+                for period, value in values.items():
+                    key = (code, metric, period)
+                    if self._known.get(key) == value: continue
+                    when, source = obs, 'live'
+                    if first_time:
+                        when = min(obs, yyyymmdd(filing_deadline(period)))
+                        source = 'deadline'
+                    self._known[key] = value
+                    lines.append(f"{code}\t{metric}\t{period}\t{when}\t{value!r}\t{source}\n")
+
+            if lines:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(''.join(lines))
+        return len(lines)
+
+    @timed('pit.compile')
+    def compile(self):
+        """
+        Builds (or reuses) the sorted lookup arrays. Cached next to the log
+        and rebuilt only when the log has grown.
+        """
+        import numpy as np
+        compiled_path = os.path.join(self.root, COMPILED_NAME)
+        log_size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        if os.path.exists(compiled_path):
+            with np.load(compiled_path, allow_pickle=False) as f:
+                if int(f['log_size']) == log_size:
+                    return Timeline(f['codes'].tolist(), f['metrics'].tolist(), f['keys'], f['values'], f['periods'])
+
+        timeline = Timeline.build(self.rows())
+        tmp = compiled_path + '.tmp.npz'
+        np.savez(tmp, log_size=log_size, codes=np.array(timeline.codes, dtype=str),
+                 metrics=np.array(timeline.metrics, dtype=str),
+                 keys=timeline.keys, values=timeline.values, periods=timeline.periods)
+        os.replace(tmp, compiled_path)
+        return timeline
+
+
+class Timeline:
+    """
+    Effective value of each (code, metric) over time: at every observation
+    date, the value of the newest period known so far. Lookups are one
+    np.searchsorted over composite (key, date) integers, so millions of
+    as-of queries run in a single vectorized call.
+    """
+    def __init__(self, codes, metrics, keys, values, periods):
+        self.codes = list(codes)
+        self.metrics = list(metrics)
+        self.keys = keys
+        self.values = values
+        self.periods = periods
+        self._code_idx = {c: i for i, c in enumerate(self.codes)}
+        self._metric_idx = {m: i for i, m in enumerate(self.metrics)}
+
+    @classmethod
+    def build(cls, rows):
+        import numpy as np
+        rows = sorted(rows, key=lambda r: (r[0], r[1], r[3], r[2]))
+        codes = sorted({r[0] for r in rows})
+        metrics = sorted({r[1] for r in rows})
+        code_idx = {c: i for i, c in enumerate(codes)}
+        metric_idx = {m: i for i, m in enumerate(metrics)}
+
+        keys, values, periods = [], [], []
+        current = None
+        best_period = best_value = None
+        for code, metric, period, observed, value, _ in rows:
+            key = code_idx[code] * len(metrics) + metric_idx[metric]
+            if key != current:
+                current, best_period, best_value = key, None, None
+            p = period_num(period)
+            if best_period is None or p >= best_period:
+                # newer period, or a restatement of the current one
+                best_period, best_value = p, value
+            composite = key * DATE_SPAN + observed
+            if keys and keys[-1] == composite:
+                values[-1], periods[-1] = best_value, best_period
+            else:
+                keys.append(composite)
+                values.append(best_value)
+                periods.append(best_period)
+
+        return cls(codes, metrics, np.array(keys, dtype=np.int64),
+                   np.array(values, dtype=np.float64), np.array(periods, dtype=np.int64))
+
+    def as_of(self, codes, dates, metric):
+        """
+        codes, dates: broadcastable arrays (dates as yyyymmdd ints).
+        Returns (values, periods) with NaN / 0 where nothing was known yet.
+        """
+        import numpy as np
+        codes = np.asarray(codes)
+        dates = np.asarray(dates, dtype=np.int64)
+        # Map codes to ids before broadcasting: a (1, n_codes) row against a
+        # (n_dates, 1) column stays cheap however large the grid gets
+        uniq, inverse = np.unique(codes, return_inverse=True)
+        code_ids = np.array([self._code_idx.get(c, -1) for c in uniq.tolist()], dtype=np.int64)
+        code_ids, dates = np.broadcast_arrays(code_ids[inverse.reshape(codes.shape)], dates)
+
+        values = np.full(code_ids.shape, np.nan)
+        periods = np.zeros(code_ids.shape, dtype=np.int64)
+        m = self._metric_idx.get(metric)
+        if m is None or not len(self.keys): return values, periods
+
+        key = code_ids * len(self.metrics) + m
+        query = key * DATE_SPAN + dates
+
+        idx = np.searchsorted(self.keys, query.ravel(), side='right').reshape(code_ids.shape) - 1
+        ok = (code_ids >= 0) & (idx >= 0)
+        ok[ok] &= (self.keys[idx[ok]] // DATE_SPAN) == key[ok]
+        values[ok] = self.values[idx[ok]]
+        periods[ok] = self.periods[idx[ok]]
+        return values, periods
@@ -0,0 +1,254 @@
+
+import os
+import sys
+import json
+import time
+import zlib
+import hashlib
+import threading
+from fnmatch import fnmatch
+from datetime import datetime, time as clock, timedelta, timezone
+
+from common.paths import data_dir
+from common.periods import in_filing_window, next_period_end
+
+# KRX trading calendar and how long each kind of page stays valid.
+# common.fetch consults this when the freshness cache is on: a page whose
+# copy is still valid is served from disk, and the last good copy stands in
+# when Naver errors out.
+
+ENV = 'NAVER_STOCKS_FRESH'   # '1': serve fetched pages from the freshness cache while valid
+
+KST = timezone(timedelta(hours=9))
+OPEN = clock(9, 0)
+CLOSE = clock(15, 30)
+FINAL = clock(15, 40)        # closing auction settled; the day's prices stop changing
+PREWARM = clock(8, 0)        # caches are warmed before the open
+AFTER_CLOSE = clock(16, 0)   # final daily bars are stored after the close
+
+# Closed every year: 신정, 삼일절, 근로자의 날, 어린이날, 현충일, 광복절, 개천절, 한글날, 성탄절, 연말 휴장
+FIXED_HOLIDAYS = {(1, 1), (3, 1), (5, 1), (5, 5), (6, 6), (8, 15), (10, 3), (10, 9), (12, 25), (12, 31)}
+# 설날 / 부처님오신날 / 추석, substitute holidays and election days. Add
+# announced closures to <data root>/krx_holidays.txt (one YYYY-MM-DD per line).
+HOLIDAYS = {
+    '2024-02-09', '2024-02-12', '2024-04-10', '2024-05-06', '2024-05-15',
+    '2024-09-16', '2024-09-17', '2024-09-18', '2024-10-01',
+    '2025-01-27', '2025-01-28', '2025-01-29', '2025-01-30', '2025-03-03',
+    '2025-05-06', '2025-06-03', '2025-10-06', '2025-10-07', '2025-10-08',
+    '2026-02-16', '2026-02-17', '2026-02-18', '2026-03-02', '2026-05-25',
+    '2026-06-03', '2026-08-17', '2026-09-24', '2026-09-25', '2026-10-05',
+    '2027-02-08', '2027-02-09', '2027-05-13', '2027-08-16', '2027-09-14',
+    '2027-09-15', '2027-09-16', '2027-10-04', '2027-10-11', '2027-12-27',
+}
+
+# tier -> seconds a copy fetched while prices move stays valid. Outside the
+# session 'realtime' and 'daily' copies stay valid until the next open.
+TIERS = {
+    'realtime': 60,          # quotes, rising / market-cap lists, theme pages, minute bars
+    'daily': 10 * 60,        # daily bars (today's bar still forming), report lists
+    'quarterly': None,       # financial statements: common.periods filing calendar
+    'rare': None,            # 업종 / theme group lists
+}
+RARE_DAYS = 7
+RECHECK_DAYS = 3             # quarterly pages inside the filing window
+
+# (URL glob, tier); first match wins, unmatched URLs are never cached
+DATASETS = [
+    ('*fchart.stock.naver.com/*timeframe=minute*', 'realtime'),
+    ('*fchart.stock.naver.com/*timeframe=day*', 'daily'),
+    ('*wisereport.co.kr/*', 'quarterly'),
+    ('*finance.naver.com/research/company_list.naver*', 'daily'),
+    ('*finance.naver.com/sise/sise_group.naver*', 'rare'),
+    ('*finance.naver.com/*', 'realtime'),
+]
+
+_holidays = None
+
+
+def now():
+    """
+    Current time in Korea (naive datetime).
+    """
+    return datetime.now(KST).replace(tzinfo=None)
+
+
+def from_timestamp(t):
+    return datetime.fromtimestamp(t, KST).replace(tzinfo=None)
+
+
+def holidays():
+    global _holidays
+    if _holidays is None:
+        extra = set()
+        path = os.path.join(data_dir(), 'krx_holidays.txt')
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                extra = {line.split('#')[0].strip() for line in f} - {''}
+        _holidays = HOLIDAYS | extra
+    return _holidays
+
+
+def is_trading_day(day):
+    if day.weekday() >= 5 or (day.month, day.day) in FIXED_HOLIDAYS: return False
+    return day.isoformat() not in holidays()
+
+
+def next_trading_day(day):
+    """
+    First trading day after `day`.
+    """
+    day += timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return day
+
+
+def last_session(at=None):
+    """
+    Date of the latest session that has opened: today from the open on,
+    otherwise the previous trading day. Its bar is the newest daily bar.
+    """
+    at = at or now()
+    day = at.date()
+    if is_trading_day(day) and at.time() >= OPEN: return day
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def session_state(at=None):
+    """
+    'pre' (trading day before the open), 'open' (until prices are final),
+    or 'closed' (after FINAL, weekends, holidays).
+    """
+    at = at or now()
+    if not is_trading_day(at.date()): return 'closed'
+    if at.time() < OPEN: return 'pre'
+    return 'open' if at.time() < FINAL else 'closed'
+
+
+def next_open(at=None):
+    at = at or now()
+    if is_trading_day(at.date()) and at.time() < OPEN:
+        return datetime.combine(at.date(), OPEN)
+    return datetime.combine(next_trading_day(at.date()), OPEN)
+
+
+def tier_for(url):
+    for pattern, tier in DATASETS:
+        if fnmatch(url, pattern): return tier
+    return None
+
+
+def expires_at(tier, fetched):
+    """
+    When a copy of a `tier` page fetched at `fetched` (KST) stops being valid.
+    """
+    if tier == 'rare':
+        return fetched + timedelta(days=RARE_DAYS)
+    if tier == 'quarterly':
+        if in_filing_window(fetched.date()):
+            return fetched + timedelta(days=RECHECK_DAYS)
+        return datetime.combine(next_period_end(fetched.date()) + timedelta(days=1), clock())
+    if session_state(fetched) == 'open':
+        return min(fetched + timedelta(seconds=TIERS[tier]), datetime.combine(fetched.date(), FINAL))
+    return next_open(fetched)
+
+
+class FreshStore:
+    """
+    Last good (200) response per URL under <data root>/fresh: one file per
+    normalized URL holding a JSON header line and the zlib-compressed body.
+    Writes are atomic, so a concurrent reader sees the old or the new copy.
+    """
+    def __init__(self, root=None):
+        self.root = root or data_dir('fresh')
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.z')
+
+    def get(self, key):
+        """
+        (header, body bytes) or None.
+        """
+        try:
+            with open(self.path(key), 'rb') as f:
+                header = json.loads(f.readline())
+                body = zlib.decompress(f.read())
+        except (OSError, ValueError, zlib.error):
+            return None
+        return header, body
+
+    def put(self, url, key, body, tier, encoding=None, content_type=None, fetched=None):
+        header = {'url': url, 't': fetched or time.time(), 'tier': tier,
+                  'encoding': encoding, 'type': content_type}
+        path = self.path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(json.dumps(header, ensure_ascii=False).encode('utf-8') + b'\n')
+            f.write(zlib.compress(body, 6))
+        os.replace(tmp, path)
+
+    def stats(self):
+        files = [f for f in os.listdir(self.root) if f.endswith('.z')]
+        return {'pages': len(files), 'bytes': sum(os.path.getsize(os.path.join(self.root, f)) for f in files)}
+
+
+_store = None
+_enabled = False
+_hook_lock = threading.Lock()
+
+
+def use(store):
+    """
+    Turns the freshness cache of common.fetch on (a FreshStore, or True for
+    the default one under the data root) or off (None). The
+    NAVER_STOCKS_FRESH environment variable turns it on at import.
+    """
+    global _store, _enabled
+    with _hook_lock:
+        _enabled = bool(store)
+        _store = store if isinstance(store, FreshStore) else None
+
+
+def active():
+    global _store
+    if not _enabled: return None
+    with _hook_lock:
+        if _store is None:
+            _store = FreshStore()
+        return _store
+
+
+def lookup(url, key, at=None):
+    """
+    (Response, still valid) for the stored copy of a cacheable URL, or None.
+    """
+    import requests
+    store, tier = active(), tier_for(key)
+    if store is None or tier is None: return None
+    hit = store.get(key)
+    if hit is None: return None
+    header, body = hit
+    res = requests.Response()
+    res.status_code = 200
+    res._content = body
+    res.encoding = header.get('encoding')
+    res.url = header['url']
+    if header.get('type'):
+        res.headers['Content-Type'] = header['type']
+    return res, (at or now()) < expires_at(header.get('tier', tier), from_timestamp(header['t']))
+
+
+def remember(url, key, res):
+    store, tier = active(), tier_for(key)
+    if store is None or tier is None or res.status_code != 200: return
+    try:
+        store.put(url, key, res.content, tier, res.encoding, res.headers.get('Content-Type'))
+    except OSError as e:
+        print(f"Error caching {url}: {e}", file=sys.stderr)
+
+
+use(os.environ.get(ENV) not in (None, '', '0'))
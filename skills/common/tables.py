@@ -0,0 +1,88 @@
+
+import re
+from html import unescape
+from functools import lru_cache
+
+# Fast extractors for Naver's fixed-layout listing tables (table.type_1 /
+# type_2 / type_5). They work on the page text with a handful of compiled
+# regexes instead of building a BeautifulSoup tree, and return the same
+# strings soup's get_text().strip() and a['href'] would. The soup parsers
+# they replace are kept next to them as references; see parsecheck.py.
+
+_ATTR = re.compile(r'([\w:-]+)\s*(?:=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+_COMMENT = re.compile(r'<!--.*?-->', re.S)
+_TAG = re.compile(r'<[^>]*>')
+_TR = re.compile(r'<tr\b[^>]*>(.*?)(?=</tr\s*>|<tr\b|$)', re.I | re.S)
+_TD = re.compile(r'<td\b([^>]*)>(.*?)(?:</td\s*>|(?=<td\b)|$)', re.I | re.S)
+_A = re.compile(r'<a\b([^>]*)>(.*?)</a\s*>', re.I | re.S)
+
+
+@lru_cache(maxsize=None)
+def _tag_re(tag):
+    return re.compile(rf'<(/?){tag}\b([^>]*)>', re.I)
+
+
+def attrs(text):
+    """
+    Attribute string of a start tag -> {name: unescaped value}.
+    """
+    out = {}
+    for m in _ATTR.finditer(text):
+        value = m.group(2) if m.group(2) is not None else m.group(3) if m.group(3) is not None else m.group(4)
+        out[m.group(1).lower()] = unescape(value or '')
+    return out
+
+
+def has_class(attr_text, cls):
+    if 'class' not in attr_text: return False
+    return cls in attrs(attr_text).get('class', '').split()
+
+
+def elements(html, tag, cls=None):
+    """
+    Yields (attribute string, inner html) of every <tag> with class `cls`,
+    matched to its own closing tag (nesting aware).
+    """
+    pattern = _tag_re(tag)
+    for m in pattern.finditer(html):
+        if m.group(1) or (cls and not has_class(m.group(2), cls)): continue
+        depth, end = 1, len(html)
+        for n in pattern.finditer(html, m.end()):
+            depth += -1 if n.group(1) else 1
+            if depth == 0:
+                end = n.start()
+                break
+        yield m.group(2), html[m.end():end]
+
+
+def text(fragment):
+    """
+    Visible text of an html fragment, entities decoded and stripped
+    (soup's get_text().strip(); comments are not text).
+    """
+    if '<' in fragment:
+        fragment = _TAG.sub('', _COMMENT.sub('', fragment))
+    return unescape(fragment).strip() if '&' in fragment else fragment.strip()
+
+
+def link(fragment, cls=None):
+    """
+    (href, text) of the first <a> (with class `cls`) in a fragment, or None.
+    """
+    for m in _A.finditer(fragment):
+        if cls and not has_class(m.group(1), cls): continue
+        return attrs(m.group(1)).get('href'), text(m.group(2))
+    return None
+
+
+def rows(html, cls, first=False):
+    """
+    Yields (row html, [cell html]) for every <tr> of every table.<cls>,
+    like soup.select('table.<cls> tr') and row.select('td'); first=True
+    stops after the first such table (soup.select_one).
+    """
+    for _, table in elements(html, 'table', cls):
+        for tr in _TR.finditer(table):
+            row = tr.group(1)
+            yield row, [td.group(2) for td in _TD.finditer(row)]
+        if first: return
@@ -0,0 +1,203 @@
+
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+
+from common import fetch, tables
+from common.metrics import timed
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+MARKET_SUM_URL = "https://finance.naver.com/sise/sise_market_sum.naver?sosok={sosok}&page={page}"
+MARKETS = {'KOSPI': 0, 'KOSDAQ': 1}
+
+
+def parse_number(txt):
+    txt = txt.strip().replace(',', '').rstrip('%')
+    if not txt or txt in ('-', 'N/A'): return None
+    try:
+        return float(txt)
+    except ValueError:
+        return None
+
+
+# Default sise_market_sum columns:
+# N | 종목명 | 현재가 | 전일비 | 등락률 | 액면가 | 시가총액 | 상장주식수 | 외국인비율 | 거래량 | PER | ROE
+MARKET_SUM_COLUMNS = {2: 'price', 4: 'diff_rate', 6: 'market_cap', 9: 'volume', 10: 'PER', 11: 'ROE'}
+
+
+@timed('parse.market_sum')
+def parse_market_sum(html):
+    """
+    Parses one sise_market_sum page.
+    Returns (rows, last_page) where rows are {code, name, price, diff_rate,
+    market_cap, volume, PER, ROE} in market-cap order (market_cap in 억원,
+    missing values None).
+    """
+    rows = []
+    for tr, cols in tables.rows(html, 'type_2'):
+        a = tables.link(tr, 'tltle')
+        if not a or 'code=' not in (a[0] or ''): continue
+        row = {'code': a[0].split('code=')[-1], 'name': a[1]}
+        for idx, key in MARKET_SUM_COLUMNS.items():
+            row[key] = parse_number(tables.text(cols[idx])) if idx < len(cols) else None
+        rows.append(row)
+
+    return rows, parse_last_page(html)
+
+
+def parse_last_page(html):
+    """
+    Page count from the '맨뒤' (td.pgRR) link of a paged list; 1 without one.
+    """
+    for _, cell in tables.elements(html, 'td', 'pgRR'):
+        last = tables.link(cell)
+        if not last: continue
+        if 'page=' in (last[0] or ''):
+            return int(last[0].split('page=')[-1])
+        break
+    return 1
+
+
+def parse_market_sum_soup(html):
+    """
+    Reference BeautifulSoup version of parse_market_sum (parsecheck.py).
+    """
+    soup = fetch.parse_html(html)
+    rows = []
+    for tr in soup.select('table.type_2 tr'):
+        a = tr.select_one('a.tltle')
+        if not a or 'code=' not in a.get('href', ''): continue
+        row = {'code': a['href'].split('code=')[-1], 'name': a.text.strip()}
+        cols = tr.select('td')
+        for idx, key in MARKET_SUM_COLUMNS.items():
+            row[key] = parse_number(cols[idx].text) if idx < len(cols) else None
+        rows.append(row)
+
+    last_page = 1
+    last = soup.select_one('td.pgRR a')
+    if last and 'page=' in last.get('href', ''):
+        last_page = int(last['href'].split('page=')[-1])
+    return rows, last_page
+
+
+@timed('universe.listing')
+def fetch_market_listing(market, workers=8):
+    """
+    Crawls every sise_market_sum page of a market concurrently.
+    Returns [{code, name, market, price, diff_rate, market_cap, volume, PER, ROE}]
+    in market-cap order.
+    """
+    sosok = MARKETS[market]
+
+    def fetch_page(page):
+        try:
+            res = fetch.get(MARKET_SUM_URL.format(sosok=sosok, page=page), headers=HEADERS)
+            return parse_market_sum(res.text)
+        except Exception as e:
+            print(f"Error fetching {market} listing page {page}: {e}")
+            return [], 1
+
+    first, last_page = fetch_page(1)
+    pages = [first]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pages += [rows for rows, _ in pool.map(fetch_page, range(2, last_page + 1))]
+
+    listing = []
+    for rows in pages:
+        for r in rows:
+            r['market'] = market
+            listing.append(r)
+    return listing
+
+
+def fetch_market_codes(market='ALL', workers=8):
+    """
+    Listed codes for 'KOSPI', 'KOSDAQ' or 'ALL'.
+    """
+    markets = list(MARKETS) if market == 'ALL' else [market]
+    codes = []
+    for m in markets:
+        codes += [r['code'] for r in fetch_market_listing(m, workers)]
+    return codes
+
+
+def listed_codes(market='ALL', workers=8, root=None, today=None):
+    """
+    fetch_market_codes(), read from today's universe index instead when one
+    is already built. Never builds the index (that crawls every 업종 and
+    theme page), and works without numpy.
+    """
+    try:
+        from common.universe_index import UniverseIndex
+    except ImportError:
+        return fetch_market_codes(market, workers)
+    index = UniverseIndex.open(root)
+    if index is not None and index.as_of == (today or date.today()).isoformat():
+        return index.codes(market)
+    return fetch_market_codes(market, workers)
+
+
+GROUP_LIST_URL = "https://finance.naver.com/sise/sise_group.naver?type={kind}&page={page}"
+GROUP_DETAIL_URL = "https://finance.naver.com/sise/sise_group_detail.naver?type={kind}&no={no}"
+
+
+def parse_group_list(html):
+    """
+    Parses sise_group.naver (업종/테마 list) into [{no, name}].
+    """
+    soup = fetch.parse_html(html)
+    groups = []
+    for a in soup.select('table.type_1 a'):
+        href = a.get('href', '')
+        if 'sise_group_detail' not in href or 'no=' not in href: continue
+        groups.append({'no': href.split('no=')[-1], 'name': a.text.strip()})
+    return groups
+
+
+def parse_group_members(html):
+    """
+    Parses a sise_group_detail.naver page (table.type_5) into member codes.
+    """
+    soup = fetch.parse_html(html)
+    codes = []
+    for row in soup.select('table.type_5 tr'):
+        a = row.select_one('td a')
+        if not a or 'code=' not in a.get('href', ''): continue
+        codes.append(a['href'].split('code=')[-1])
+    return codes
+
+
+@timed('universe.groups')
+def fetch_groups(kind='upjong', workers=8):
+    """
+    Fetches the group list (every page; the theme list is paged) and every
+    group's members concurrently. Returns [{no, name, codes}].
+    """
+    res = fetch.get(GROUP_LIST_URL.format(kind=kind, page=1), headers=HEADERS)
+    groups = parse_group_list(res.text)
+
+    def list_page(page):
+        try:
+            res = fetch.get(GROUP_LIST_URL.format(kind=kind, page=page), headers=HEADERS)
+            return parse_group_list(res.text)
+        except Exception as e:
+            print(f"Error fetching {kind} list page {page}: {e}")
+            return []
+
+    def members(group):
+        try:
+            res = fetch.get(GROUP_DETAIL_URL.format(kind=kind, no=group['no']), headers=HEADERS)
+            return parse_group_members(res.text)
+        except Exception as e:
+            print(f"Error fetching {kind} {group['no']}: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for more in pool.map(list_page, range(2, parse_last_page(res.text) + 1)):
+            groups += more
+        groups = list({g['no']: g for g in groups}.values())
+        for group, codes in zip(groups, pool.map(members, groups)):
+            group['codes'] = codes
+    return groups
@@ -0,0 +1,312 @@
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Allow running this file directly as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.metrics import timed
+from common.paths import data_dir
+from common.universe import MARKETS, fetch_groups, fetch_market_listing
+
+MARKET_NAMES = list(MARKETS)   # row 'market' field -> market name
+
+
+def row_dtype(name_width):
+    return np.dtype([
+        ('code', 'U6'),
+        ('name', f'U{max(1, name_width)}'),
+        ('market', 'u1'),          # index into MARKET_NAMES
+        ('rank', 'i4'),            # market-cap order within the market
+        ('industry', 'i2'),        # index into meta['industries'], -1 if none
+        ('theme_start', 'i4'),     # slice of the themes array
+        ('theme_count', 'i2'),
+    ])
+
+
+class UniverseIndex:
+    """
+    Every listed code with its name, market, industry (업종) and themes,
+    kept as numpy arrays under <data root>/universe so a skill opens it
+    memory-mapped in a few milliseconds instead of re-crawling:
+
+        <generation>.rows.npy     one record per code, sorted by code
+        <generation>.themes.npy   theme numbers of all codes (rows point into it)
+        meta.json                 build date, current generation, industry / theme names
+
+    A rebuild writes a new generation first and then swaps meta.json, so a
+    reader never sees a half-written index.
+    """
+    def __init__(self, rows, themes, meta):
+        self.rows = rows
+        self.themes = themes
+        self.meta = meta
+        self.as_of = meta.get('date')
+        self._groups = {kind: {g['no']: i for i, g in enumerate(meta[kind])} for kind in ('industries', 'themes')}
+
+    @classmethod
+    def build(cls, listing, industries, themes, as_of=None):
+        """
+        listing: market-cap listing rows ({code, name, market}, common.universe);
+        industries / themes: [{no, name, codes}] from fetch_groups. Group
+        members that are not in the listing are left out.
+        """
+        first = {}
+        ranks = dict.fromkeys(MARKET_NAMES, 0)
+        for r in listing:
+            if r['code'] in first or r.get('market') not in ranks: continue
+            first[r['code']] = (r, ranks[r['market']])
+            ranks[r['market']] += 1
+
+        code_industry = {}
+        for i, g in enumerate(industries):
+            for code in g.get('codes', []):
+                code_industry.setdefault(code, i)
+        code_themes = {}
+        for i, g in enumerate(themes):
+            for code in g.get('codes', []):
+                code_themes.setdefault(code, []).append(i)
+
+        codes = sorted(first)
+        rows = np.zeros(len(codes), dtype=row_dtype(max((len(r['name']) for r, _ in first.values()), default=1)))
+        theme_ids = []
+        for j, code in enumerate(codes):
+            r, rank = first[code]
+            ids = code_themes.get(code, [])
+            rows[j] = (code, r['name'], MARKET_NAMES.index(r['market']), rank,
+                       code_industry.get(code, -1), len(theme_ids), len(ids))
+            theme_ids += ids
+
+        meta = {'date': as_of or date.today().isoformat(), 'built': time.time(), 'codes': len(codes),
+                'industries': [{'no': g['no'], 'name': g['name']} for g in industries],
+                'themes': [{'no': g['no'], 'name': g['name']} for g in themes]}
+        return cls(rows, np.array(theme_ids, dtype=np.int16), meta)
+
+    @staticmethod
+    def directory(root=None):
+        return root or data_dir('universe')
+
+    def save(self, root=None):
+        root = self.directory(root)
+        os.makedirs(root, exist_ok=True)
+        generation = f"{int(time.time() * 1000)}-{os.getpid()}"
+        np.save(os.path.join(root, f"{generation}.rows.npy"), self.rows)
+        np.save(os.path.join(root, f"{generation}.themes.npy"), self.themes)
+
+        self.meta = dict(self.meta, generation=generation)
+        path = os.path.join(root, 'meta.json')
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+        # Older generations: readers that still map them keep their view (POSIX)
+        for name in os.listdir(root):
+            if name.endswith('.npy') and not name.startswith(generation + '.'):
+                try:
+                    os.remove(os.path.join(root, name))
+                except OSError:
+                    pass
+        return self
+
+    @classmethod
+    def open(cls, root=None):
+        """
+        The stored index, memory-mapped, or None if there is none yet.
+        """
+        root = cls.directory(root)
+        try:
+            with open(os.path.join(root, 'meta.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            rows = np.load(os.path.join(root, f"{meta['generation']}.rows.npy"), mmap_mode='r')
+            themes = os.path.join(root, f"{meta['generation']}.themes.npy")
+            # an empty array cannot be mapped
+            themes = np.load(themes, mmap_mode='r') if len(rows) and rows['theme_count'].any() else np.load(themes)
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Error opening universe index: {e}", file=sys.stderr)
+            return None
+        return cls(rows, themes, meta)
+
+    @classmethod
+    def load(cls, refresh=False, workers=8, root=None, today=None):
+        """
+        Today's index: the stored one if it was built today, otherwise one
+        concurrent crawl of the listing, 업종 and theme pages, saved for
+        the rest of the day. If the crawl comes back incomplete, a stored
+        index from an earlier day is used instead.
+        """
+        key = (today or date.today()).isoformat()
+        stored = cls.open(root)
+        if stored is not None and stored.as_of == key and not refresh:
+            return stored
+
+        print("종목 색인 생성 중 (하루 1회)...", file=sys.stderr)
+        listing, industries, themes = crawl_universe(workers)
+        index = cls.build(listing, industries, themes, key)
+        if listing and industries and themes:
+            return index.save(root)
+        if stored is not None:
+            print(f"종목 색인 수집이 불완전하여 {stored.as_of} 색인을 사용합니다.", file=sys.stderr)
+            return stored
+        return index
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, code):
+        return self.find(code) is not None
+
+    def find(self, code):
+        """
+        Row number of a code (binary search over the sorted codes), or None.
+        """
+        codes = self.rows['code']
+        i = int(np.searchsorted(codes, code))
+        return i if i < len(codes) and codes[i] == code else None
+
+    def _theme_ids(self, i):
+        start = int(self.rows['theme_start'][i])
+        return self.themes[start:start + int(self.rows['theme_count'][i])]
+
+    def get(self, code):
+        """
+        {code, name, market, industry, themes} of a listed code, or None.
+        """
+        i = self.find(code)
+        if i is None: return None
+        row = self.rows[i]
+        industry = int(row['industry'])
+        return {
+            'code': code,
+            'name': str(row['name']),
+            'market': MARKET_NAMES[int(row['market'])],
+            'industry': self.meta['industries'][industry]['name'] if industry >= 0 else None,
+            'themes': [self.meta['themes'][int(t)]['name'] for t in self._theme_ids(i)],
+        }
+
+    def name_of(self, code):
+        i = self.find(code)
+        return str(self.rows['name'][i]) if i is not None else None
+
+    def names(self, codes=None):
+        """
+        {code: name} for the given codes (default: all).
+        """
+        if codes is None:
+            return dict(zip(self.rows['code'].tolist(), self.rows['name'].tolist()))
+        return {c: n for c, n in ((c, self.name_of(c)) for c in codes) if n is not None}
+
+    def group_id(self, kind, group):
+        """
+        Position of an industry / theme ('industries' / 'themes') given by
+        its Naver number or exact name, or None.
+        """
+        ids = self._groups[kind]
+        if str(group) in ids: return ids[str(group)]
+        for i, g in enumerate(self.meta[kind]):
+            if g['name'] == group: return i
+        return None
+
+    def codes(self, market='ALL', industry=None, theme=None):
+        """
+        Listed codes in listing order (KOSPI then KOSDAQ, each by market
+        cap), narrowed to a market, an industry and / or a theme (number
+        or name). An unknown industry or theme matches nothing.
+        """
+        mask = np.ones(len(self.rows), dtype=bool)
+        if market != 'ALL':
+            mask &= self.rows['market'] == MARKET_NAMES.index(market)
+        if industry is not None:
+            i = self.group_id('industries', industry)
+            mask &= self.rows['industry'] == (-2 if i is None else i)
+        if theme is not None:
+            t = self.group_id('themes', theme)
+            owner = np.repeat(np.arange(len(self.rows)), self.rows['theme_count'])
+            members = np.zeros(len(self.rows), dtype=bool)
+            if t is not None:
+                members[owner[np.asarray(self.themes) == t]] = True
+            mask &= members
+        picked = np.flatnonzero(mask)
+        order = np.lexsort((self.rows['rank'][picked], self.rows['market'][picked]))
+        return self.rows['code'][picked[order]].tolist()
+
+    def groups(self, kind='industries', market='ALL'):
+        """
+        [{no, name, codes}] like fetch_groups, from the index (codes in
+        listing order, limited to a market).
+        """
+        members = [[] for _ in self.meta[kind]]
+        for code in self.codes(market):
+            i = self.find(code)
+            ids = [int(self.rows['industry'][i])] if kind == 'industries' else self._theme_ids(i).tolist()
+            for g in ids:
+                if g >= 0: members[g].append(code)
+        return [dict(g, codes=codes) for g, codes in zip(self.meta[kind], members)]
+
+
+@timed('universe.crawl')
+def crawl_universe(workers=8):
+    """
+    Listing of every market plus the 업종 and theme groups, fetched side by
+    side. Returns (listing, industries, themes); a failed part is empty.
+    """
+    def groups(kind):
+        try:
+            return fetch_groups(kind, workers)
+        except Exception as e:
+            print(f"Error fetching {kind} groups: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=len(MARKETS) + 2) as pool:
+        listings = [pool.submit(fetch_market_listing, m, workers) for m in MARKETS]
+        industries = pool.submit(groups, 'upjong')
+        themes = pool.submit(groups, 'theme')
+        listing = [r for f in listings for r in f.result()]
+        return listing, industries.result(), themes.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Listed-code universe index (name, market, industry, themes)')
+    parser.add_argument('mode', choices=['build', 'show', 'list', 'groups'])
+    parser.add_argument('codes', nargs='*', help='Codes for show')
+    parser.add_argument('--market', choices=['KOSPI', 'KOSDAQ', 'ALL'], default='ALL')
+    parser.add_argument('--industry', type=str, default=None, help='업종 number or name (list)')
+    parser.add_argument('--theme', type=str, default=None, help='Theme number or name (list)')
+    parser.add_argument('--kind', choices=['industries', 'themes'], default='industries', help='Group kind (groups)')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    index = UniverseIndex.load(args.mode == 'build', args.workers)
+    if not len(index):
+        print("종목 색인이 비어 있습니다.")
+        return
+
+    if args.mode == 'build':
+        print(f"{index.as_of}: {len(index)}개 종목, 업종 {len(index.meta['industries'])}개, "
+              f"테마 {len(index.meta['themes'])}개 ({UniverseIndex.directory()})")
+    elif args.mode == 'show':
+        for code in args.codes:
+            info = index.get(code)
+            if info is None:
+                print(f"{code}: 색인에 없음")
+                continue
+            print(f"{code} {info['name']} [{info['market']}] 업종: {info['industry'] or '-'}")
+            print(f"    테마: {', '.join(info['themes']) or '-'}")
+    elif args.mode == 'list':
+        names = index.names()
+        for code in index.codes(args.market, args.industry, args.theme):
+            print(f"{code} {names[code]}")
+    else:
+        for g in index.groups(args.kind, args.market):
+            print(f"{g['no']:>6} {g['name']:<24}{len(g['codes']):>6}")
+
+
+if __name__ == "__main__":
+    main()
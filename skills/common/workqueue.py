@@ -0,0 +1,168 @@
+
+import os
+import json
+import time
+
+STATES = ('pending', 'running', 'done', 'failed')
+
+
+class WorkQueue:
+    """
+    Work queue in a directory, shared by every process that can see it
+    (local worker processes, or other hosts over NFS / SMB). One JSON file
+    per task moves pending -> running -> done (or failed); os.rename is
+    atomic, so exactly one worker wins each claim.
+
+    A running task whose lease ran out (worker died or host dropped off) is
+    put back to pending by requeue_expired(); after `max_attempts` failed
+    attempts it is parked in failed/. Workers renew() the lease while they
+    make progress, so a slow task is not handed to a second worker.
+    """
+    def __init__(self, root, lease=600, max_attempts=3):
+        self.root = root
+        self.lease = lease
+        self.max_attempts = max_attempts
+        for state in STATES:
+            os.makedirs(os.path.join(root, state), exist_ok=True)
+
+    def path(self, state, task_id):
+        return os.path.join(self.root, state, f"{task_id}.json")
+
+    def _write(self, path, doc):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(doc, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def _read(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def ids(self, state):
+        names = os.listdir(os.path.join(self.root, state))
+        return sorted(n[:-5] for n in names if n.endswith('.json'))
+
+    # --- producer --------------------------------------------------------
+
+    def put(self, task_id, payload):
+        self._write(self.path('pending', task_id), {'id': task_id, 'attempts': 0, 'payload': payload})
+
+    def known(self, task_id):
+        return any(os.path.exists(self.path(state, task_id)) for state in STATES)
+
+    def retry_failed(self):
+        """
+        Moves failed tasks back to pending with a fresh attempt count.
+        """
+        retried = self.ids('failed')
+        for task_id in retried:
+            doc = self._read(self.path('failed', task_id))
+            if doc is None: continue
+            doc['attempts'] = 0
+            self._write(self.path('pending', task_id), doc)
+            os.remove(self.path('failed', task_id))
+        return retried
+
+    def close(self):
+        """
+        No more tasks will be added; idle workers may exit once the queue drains.
+        """
+        self._write(os.path.join(self.root, 'closed'), {'closed': time.time()})
+
+    def closed(self):
+        return os.path.exists(os.path.join(self.root, 'closed'))
+
+    # --- worker ----------------------------------------------------------
+
+    def claim(self, worker):
+        """
+        Takes the next pending task. Returns its doc or None when nothing is pending.
+        """
+        for task_id in self.ids('pending'):
+            running = self.path('running', task_id)
+            try:
+                os.rename(self.path('pending', task_id), running)
+            except OSError:
+                continue   # another worker was faster
+            doc = self._read(running)
+            if doc is None: continue
+            doc['worker'] = worker
+            doc['claimed'] = time.time()
+            self._write(running, doc)   # also restarts the lease (mtime)
+            return doc
+        return None
+
+    def renew(self, task_id):
+        """
+        Restarts the lease of a running task. False if it is no longer running.
+        """
+        try:
+            os.utime(self.path('running', task_id))
+        except OSError:
+            return False
+        return True
+
+    def complete(self, task_id, result):
+        self._write(self.path('done', task_id), {'id': task_id, 'result': result})
+        # a copy re-queued after a lost lease is not run (or reported failed) again
+        for state in ('running', 'pending', 'failed'):
+            try:
+                os.remove(self.path(state, task_id))
+            except OSError:
+                pass
+
+    def fail(self, task_id, error):
+        """
+        Returns the task to pending, or parks it in failed/ after max_attempts.
+        """
+        running = self.path('running', task_id)
+        if os.path.exists(self.path('done', task_id)):
+            try:
+                os.remove(running)
+            except OSError:
+                pass
+            return
+        doc = self._read(running)
+        if doc is None: return
+        doc['attempts'] += 1
+        doc.setdefault('errors', []).append(str(error))
+        state = 'failed' if doc['attempts'] >= self.max_attempts else 'pending'
+        self._write(self.path(state, task_id), doc)
+        try:
+            os.remove(running)
+        except OSError:
+            pass
+
+    # --- coordinator -----------------------------------------------------
+
+    def requeue_expired(self, now=None):
+        now = now or time.time()
+        expired = []
+        for task_id in self.ids('running'):
+            try:
+                age = now - os.path.getmtime(self.path('running', task_id))
+            except OSError:
+                continue
+            if age > self.lease and not os.path.exists(self.path('done', task_id)):
+                self.fail(task_id, f"lease expired after {age:.0f}s")
+                expired.append(task_id)
+        return expired
+
+    def status(self):
+        return {state: len(self.ids(state)) for state in STATES}
+
+    def finished(self):
+        return self.closed() and not self.ids('pending') and not self.ids('running')
+
+    def results(self):
+        """
+        {task_id: result} of every completed task.
+        """
+        return {task_id: (self._read(self.path('done', task_id)) or {}).get('result')
+                for task_id in self.ids('done')}
+
+    def failures(self):
+        return {task_id: self._read(self.path('failed', task_id)) for task_id in self.ids('failed')}
@@ -0,0 +1,268 @@
+
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.metrics import timed
+from rules import default_rules, BREAKOUT_DAYS, RSI_LOW, RSI_HIGH
+from sinks import open_sink
+
+SEED_BARS = 120   # daily bars per code; enough for the RSI smoothing to settle
+FIELDS = ('price', 'high', 'low', 'volume')
+
+
+class CodeState:
+    __slots__ = ('code', 'name', 'day', 'today', 'memos', 'active', 'fired')
+
+    def __init__(self, code, name, rules):
+        self.code = code
+        self.name = name
+        self.day = None
+        self.today = None                       # {'price', 'high', 'low', 'volume'}
+        self.memos = [{} for _ in rules]        # per-rule state, see rules.Rule
+        self.active = [None] * len(rules)       # alert kind each rule reported last
+        self.fired = set()                      # kinds already sent this session
+
+
+class AlertEngine:
+    """
+    Watchlist of codes with per-code rule state. update() takes one price
+    update, re-checks only the rules reading a field that changed, and
+    sends an alert when a rule turns on, at most once per code, kind and
+    session. Daily history moves forward on the first update of a new day,
+    so a check is O(1) and thousands of codes fit in one core's minute.
+    """
+    def __init__(self, rules=None, sinks=()):
+        self.rules = list(rules or default_rules())
+        self.sinks = list(sinks)
+        self.states = {}
+        self._dirty = {}   # frozenset of changed fields -> indexes of the rules to check
+        self.stats = {'updates': 0, 'unchanged': 0, 'checks': 0, 'skipped': 0, 'alerts': 0}
+
+    def __contains__(self, code):
+        return code in self.states
+
+    def __len__(self):
+        return len(self.states)
+
+    def watch(self, code, bars, name=None, day=None):
+        """
+        Adds a code, seeded with its finished daily bars: an iterable of
+        {'date', 'high', 'low', 'close'} or common.ohlcv_store columns.
+        Bars of `day` (yyyymmdd, default today) or later are left out; that
+        session comes in through update().
+        """
+        if isinstance(bars, dict):
+            bars = [{'date': d, 'high': h, 'low': l, 'close': c}
+                    for d, h, l, c in zip(bars['date'], bars['high'], bars['low'], bars['close'])]
+        day = day or today_int()
+        st = self.states[code] = CodeState(code, name, self.rules)
+        for bar in bars:
+            if int(bar['date']) >= day: continue
+            bar = {k: float(bar[k]) for k in ('high', 'low', 'close')}
+            for rule, memo in zip(self.rules, st.memos):
+                rule.roll(memo, bar)
+        st.day = day
+        return st
+
+    def _roll(self, st, day):
+        if st.today is not None:
+            bar = {'high': st.today['high'], 'low': st.today['low'], 'close': st.today['price']}
+            for rule, memo in zip(self.rules, st.memos):
+                rule.roll(memo, bar)
+        st.day = day
+        st.today = None
+        st.active = [None] * len(self.rules)
+        st.fired.clear()
+
+    def _rules_for(self, changed):
+        key = frozenset(changed)
+        if key not in self._dirty:
+            self._dirty[key] = [i for i, rule in enumerate(self.rules) if key.intersection(rule.inputs)]
+        return self._dirty[key]
+
+    def update(self, code, price, volume=None, high=None, low=None, day=None, at=None):
+        """
+        One price update. high / low default to the running extremes of
+        the prices seen this session. Returns the alerts it raised.
+        """
+        st = self.states.get(code)
+        if st is None: return []
+        self.stats['updates'] += 1
+        day = day or today_int()
+        if day != st.day:
+            self._roll(st, day)
+
+        old = st.today
+        today = {
+            'price': price,
+            'high': max(x for x in (price, high, old and old['high']) if x is not None),
+            'low': min(x for x in (price, low, old and old['low']) if x is not None),
+            'volume': volume,
+        }
+        changed = FIELDS if old is None else [f for f in FIELDS if today[f] != old[f]]
+        st.today = today
+        if not changed:
+            self.stats['unchanged'] += 1
+            return []
+
+        dirty = self._rules_for(changed)
+        self.stats['checks'] += len(dirty)
+        self.stats['skipped'] += len(self.rules) - len(dirty)
+        alerts = []
+        for i in dirty:
+            kind, detail = self.rules[i].check(st.memos[i], today)
+            was, st.active[i] = st.active[i], kind
+            if kind is None or kind == was or kind in st.fired: continue
+            st.fired.add(kind)
+            alerts.append({'code': code, 'name': st.name, 'kind': kind, 'price': price, 'day': day,
+                           'time': at or datetime.datetime.now().strftime('%H:%M:%S'), 'detail': detail})
+        for alert in alerts:
+            self.stats['alerts'] += 1
+            for sink in self.sinks:
+                sink.send(alert)
+        return alerts
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+def today_int():
+    return int(datetime.date.today().strftime('%Y%m%d'))
+
+
+@timed('alert.seed')
+def seed_watchlist(engine, codes, names=None, count=SEED_BARS, workers=8):
+    """
+    Seeds every code from the local OHLCV store, fetching the daily chart
+    of codes the store does not have. Returns the codes that could not be
+    seeded.
+    """
+    from common.ohlcv_store import OHLCVStore, fetch_daily
+    store = OHLCVStore()
+    names = names or {}
+
+    def load(code):
+        bars = store.load(code)
+        if bars is not None and len(bars['date']): return bars
+        try:
+            return fetch_daily(code, count)
+        except Exception as e:
+            print(f"Error fetching history for {code}: {e}", file=sys.stderr)
+            return None
+
+    missing = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for code, bars in zip(codes, pool.map(load, codes)):
+            if bars is None or not len(bars['date']):
+                missing.append(code)
+                continue
+            engine.watch(code, bars, names.get(code))
+    return missing
+
+
+@timed('alert.poll')
+def poll_listing(engine, markets):
+    """
+    One tick from the market-cap listing pages, which carry price and
+    volume of a whole market in a few dozen requests.
+    """
+    from common.universe import fetch_market_listing
+    alerts = []
+    at = datetime.datetime.now().strftime('%H:%M:%S')
+    for market in markets:
+        for row in fetch_market_listing(market):
+            if row['code'] in engine and row.get('price'):
+                alerts += engine.update(row['code'], row['price'], row.get('volume'), at=at)
+    return alerts
+
+
+def replay_ticks(engine, lines):
+    """
+    Feeds NDJSON updates {"code", "price", ["volume", "high", "low", "day", "time"]}.
+    """
+    alerts = []
+    for line in lines:
+        if not line.strip(): continue
+        t = json.loads(line)
+        alerts += engine.update(t['code'], t['price'], t.get('volume'), t.get('high'), t.get('low'),
+                                t.get('day'), t.get('time'))
+    return alerts
+
+
+def load_codes(args):
+    codes, names = [], {}
+    if args.codes:
+        codes += [c.strip() for c in args.codes.split(',') if c.strip()]
+    if args.codes_file:
+        with open(args.codes_file, 'r', encoding='utf-8') as f:
+            codes += [line.split()[0] for line in f if line.strip() and not line.startswith('#')]
+    if args.market:
+        from common.universe_index import UniverseIndex
+        index = UniverseIndex.load()
+        listed = index.codes(args.market)
+        codes += listed
+        names = index.names(listed)
+    # de-duplicate, keep order
+    return list(dict.fromkeys(codes)), names
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Watchlist alert engine')
+    parser.add_argument('--codes', type=str, help='Comma separated codes to watch')
+    parser.add_argument('--codes-file', type=str, help='File with one code per line')
+    parser.add_argument('--market', choices=['KOSPI', 'KOSDAQ', 'ALL'], help='Watch every listed code of a market')
+    parser.add_argument('--sink', action='append', default=None,
+                        help="Alert destination: stdout, file:PATH or webhook:URL (repeatable, default stdout)")
+    parser.add_argument('--ticks', type=str, help="Replay NDJSON price updates from a file ('-' for stdin) instead of polling")
+    parser.add_argument('--interval', type=float, default=60, help='Seconds between listing polls')
+    parser.add_argument('--once', action='store_true', help='Poll once and exit')
+    parser.add_argument('--breakout-days', type=int, default=BREAKOUT_DAYS)
+    parser.add_argument('--rsi-low', type=float, default=RSI_LOW)
+    parser.add_argument('--rsi-high', type=float, default=RSI_HIGH)
+    parser.add_argument('--seed-bars', type=int, default=SEED_BARS, help='Daily bars fetched for codes missing from the OHLCV store')
+    args = parser.parse_args()
+    if not (args.codes or args.codes_file or args.market):
+        parser.error("give --codes, --codes-file or --market")
+
+    try:
+        sinks = [open_sink(spec) for spec in (args.sink or ['stdout'])]
+    except (ValueError, OSError) as e:
+        parser.error(str(e))
+    engine = AlertEngine(default_rules(args.breakout_days, args.rsi_low, args.rsi_high), sinks)
+
+    codes, names = load_codes(args)
+    missing = seed_watchlist(engine, codes, names, args.seed_bars)
+    print(f"관심종목 {len(engine)}개 감시 시작 (이력 없음 {len(missing)}개)", file=sys.stderr)
+
+    try:
+        if args.ticks:
+            if args.ticks == '-':
+                replay_ticks(engine, sys.stdin)
+            else:
+                with open(args.ticks, 'r', encoding='utf-8') as f:
+                    replay_ticks(engine, f)
+        else:
+            markets = ['KOSPI', 'KOSDAQ'] if args.market in (None, 'ALL') else [args.market]
+            while True:
+                started = time.monotonic()
+                poll_listing(engine, markets)
+                if args.once: break
+                time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.close()
+        s = engine.stats
+        print(f"업데이트 {s['updates']}건 (변화 없음 {s['unchanged']}), 규칙 평가 {s['checks']}회 "
+              f"(건너뜀 {s['skipped']}), 알림 {s['alerts']}건", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
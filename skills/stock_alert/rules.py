@@ -0,0 +1,143 @@
+
+import math
+from collections import deque
+
+# Same parameters as the technical screener and the uprise breakout check
+BREAKOUT_DAYS = 6
+STOCH_PERIOD, STOCH_SLOW, STOCH_D = 5, 3, 3
+RSI_PERIOD = 14
+RSI_LOW, RSI_HIGH = 30, 70
+
+
+class Rule:
+    """
+    An alert rule over one code. Per-code state lives in a `memo` dict the
+    engine keeps for each (code, rule):
+
+    roll(memo, bar)     commits a finished daily bar {'high', 'low', 'close'};
+                        the watchlist history is seeded the same way
+    check(memo, today)  today's provisional values {'price', 'high', 'low',
+                        'volume'} -> (alert kind or None, detail dict)
+
+    `inputs` names the fields of `today` check() reads; the engine only
+    re-checks a rule when one of them changed.
+    """
+    name = None
+    inputs = ('price',)
+
+    def roll(self, memo, bar):
+        raise NotImplementedError
+
+    def check(self, memo, today):
+        raise NotImplementedError
+
+
+class BreakoutRule(Rule):
+    """
+    Price above the highest high of the last `days` sessions.
+    """
+    name = 'breakout'
+
+    def __init__(self, days=BREAKOUT_DAYS):
+        self.days = days
+
+    def roll(self, memo, bar):
+        highs = memo.setdefault('highs', deque(maxlen=self.days))
+        highs.append(bar['high'])
+        # the level only moves once a day, so the check is one comparison
+        memo['level'] = max(highs) if len(highs) == self.days else None
+
+    def check(self, memo, today):
+        level = memo.get('level')
+        if level is None or today['price'] <= level: return None, {}
+        return 'breakout', {'level': level}
+
+
+class StochasticRule(Rule):
+    """
+    Slow stochastic (5, 3, 3) golden cross, computed exactly like
+    stock_technical's compute_indicators() on daily bars with today's
+    running high / low / price as the last bar.
+    """
+    name = 'stochastic'
+    inputs = ('price', 'high', 'low')
+
+    def __init__(self, period=STOCH_PERIOD, slow=STOCH_SLOW, d=STOCH_D, low_zone=40):
+        self.period, self.slow, self.d = period, slow, d
+        self.low_zone = low_zone
+
+    def roll(self, memo, bar):
+        if not memo:
+            memo.update(highs=deque(maxlen=self.period - 1), lows=deque(maxlen=self.period - 1),
+                        fast=deque(maxlen=self.slow - 1), slow=deque(maxlen=self.d - 1))
+        fast, k, d = self._next(memo, bar['close'], bar['high'], bar['low'])
+        if fast is not None: memo['fast'].append(fast)
+        if k is not None: memo['slow'].append(k)
+        memo['k'], memo['d'] = k, d
+        memo['highs'].append(bar['high'])
+        memo['lows'].append(bar['low'])
+
+    def _next(self, memo, close, high, low):
+        """
+        (fast K, slow K, slow D) of a bar following the committed ones,
+        None while the history is too short. A flat window gives NaN, as
+        in pandas, and NaN compares false.
+        """
+        if len(memo['highs']) < self.period - 1: return None, None, None
+        hh = max(max(memo['highs']), high)
+        ll = min(min(memo['lows']), low)
+        fast = (close - ll) / (hh - ll) * 100 if hh != ll else math.nan
+        if len(memo['fast']) < self.slow - 1: return fast, None, None
+        k = (sum(memo['fast']) + fast) / self.slow
+        if len(memo['slow']) < self.d - 1: return fast, k, None
+        return fast, k, (sum(memo['slow']) + k) / self.d
+
+    def check(self, memo, today):
+        if memo.get('d') is None: return None, {}
+        _, k, d = self._next(memo, today['price'], today['high'], today['low'])
+        if not (k > d and memo['k'] <= memo['d']): return None, {}
+        kind = 'stochastic_cross_low' if k < self.low_zone else 'stochastic_cross'
+        return kind, {'k': round(k, 2), 'd': round(d, 2)}
+
+
+class RsiRule(Rule):
+    """
+    RSI (14) entering the oversold (<= low) or overbought (>= high) zone,
+    Wilder smoothing as in stock_technical (ewm alpha=1/period).
+    """
+    name = 'rsi'
+
+    def __init__(self, period=RSI_PERIOD, low=RSI_LOW, high=RSI_HIGH):
+        self.alpha = 1 / period
+        self.low, self.high = low, high
+
+    def _step(self, memo, close):
+        """
+        Average gain / loss after a bar closing at `close`.
+        """
+        if memo.get('prev') is None: return 0.0, 0.0   # first bar: no change yet
+        delta = close - memo['prev']
+        a = self.alpha
+        return (memo['gain'] * (1 - a) + a * max(delta, 0.0),
+                memo['loss'] * (1 - a) + a * max(-delta, 0.0))
+
+    def roll(self, memo, bar):
+        memo['gain'], memo['loss'] = self._step(memo, bar['close'])
+        memo['prev'] = bar['close']
+        memo['bars'] = memo.get('bars', 0) + 1
+
+    def check(self, memo, today):
+        if memo.get('bars', 0) < 1 / self.alpha: return None, {}
+        gain, loss = self._step(memo, today['price'])
+        if loss == 0:
+            if gain == 0: return None, {}
+            rsi = 100.0
+        else:
+            rsi = 100 - 100 / (1 + gain / loss)
+        if rsi <= self.low: return 'rsi_oversold', {'rsi': round(rsi, 2)}
+        if rsi >= self.high: return 'rsi_overbought', {'rsi': round(rsi, 2)}
+        return None, {}
+
+
+def default_rules(breakout_days=BREAKOUT_DAYS, rsi_low=RSI_LOW, rsi_high=RSI_HIGH):
+    return [BreakoutRule(breakout_days), StochasticRule(), RsiRule(low=rsi_low, high=rsi_high)]
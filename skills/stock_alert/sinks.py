@@ -0,0 +1,102 @@
+
+import sys
+import json
+import threading
+
+from common import fetch
+
+KIND_LABELS = {
+    'breakout': '전고점 돌파',
+    'stochastic_cross': '스토캐스틱 골든크로스',
+    'stochastic_cross_low': '⭐ 스토캐스틱 저점 골든크로스',
+    'rsi_oversold': 'RSI 과매도',
+    'rsi_overbought': 'RSI 과매수',
+}
+
+
+class Sink:
+    """
+    Where alerts go. send(alert) gets one alert dict {code, name, kind,
+    price, day, time, detail}; close() is called once at the end.
+    """
+    def send(self, alert):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class StdoutSink(Sink):
+    def __init__(self, out=None):
+        self.out = out
+
+    def send(self, alert):
+        label = KIND_LABELS.get(alert['kind'], alert['kind'])
+        detail = ', '.join(f"{k} {v}" for k, v in alert['detail'].items())
+        print(f"🔔 [{alert['code']}] {alert.get('name') or ''} {alert['price']}원 | {label}"
+              + (f" ({detail})" if detail else ''), file=self.out or sys.stdout, flush=True)
+
+
+class FileSink(Sink):
+    """
+    Appends one JSON line per alert, flushed as it is written.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._f = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def send(self, alert):
+        with self._lock:
+            self._f.write(json.dumps(alert, ensure_ascii=False) + '\n')
+            self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+class WebhookSink(Sink):
+    """
+    POSTs each alert as JSON (a stand-in for a messenger bot). A failed
+    delivery is reported and dropped so a slow endpoint cannot stall the
+    price loop.
+    """
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert):
+        try:
+            res = fetch.session().post(self.url, json=alert, timeout=self.timeout)
+            if res.status_code >= 400:
+                print(f"Webhook {self.url} returned {res.status_code}", file=sys.stderr)
+        except Exception as e:
+            print(f"Error posting alert to {self.url}: {e}", file=sys.stderr)
+
+
+class MemorySink(Sink):
+    def __init__(self):
+        self.alerts = []
+
+    def send(self, alert):
+        self.alerts.append(alert)
+
+
+# --sink spec prefix -> factory(argument)
+SINKS = {
+    'stdout': lambda arg: StdoutSink(),
+    'file': FileSink,
+    'webhook': WebhookSink,
+}
+
+
+def open_sink(spec):
+    """
+    'stdout', 'file:alerts.ndjson' or 'webhook:https://...'.
+    """
+    kind, _, arg = spec.partition(':')
+    if kind not in SINKS:
+        raise ValueError(f"unknown sink {spec!r} (choose from {', '.join(SINKS)})")
+    if kind != 'stdout' and not arg:
+        raise ValueError(f"sink {kind!r} needs an argument ({kind}:...)")
+    return SINKS[kind](arg)
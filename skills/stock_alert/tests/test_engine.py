@@ -0,0 +1,101 @@
+
+import sys
+import os
+import json
+import random
+import tempfile
+import unittest
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+sys.path.append(os.path.join(os.path.dirname(parent_dir), 'stock_technical'))
+
+from engine import AlertEngine, replay_ticks
+from rules import StochasticRule, RsiRule, BreakoutRule
+from sinks import MemorySink, open_sink
+
+def random_bars(n, seed=7):
+    rng = random.Random(seed)
+    bars, close = [], 10000.0
+    for i in range(n):
+        close = max(100.0, close * (1 + rng.uniform(-0.04, 0.04)))
+        high = close * (1 + rng.uniform(0, 0.02))
+        low = close * (1 - rng.uniform(0, 0.02))
+        bars.append({'date': 20230101 + i, 'high': high, 'low': low, 'close': close})
+    return bars
+
+class TestRules(unittest.TestCase):
+    def test_incremental_indicators_match_screener(self):
+        import pandas as pd
+        from screener import compute_indicators
+        bars = random_bars(200)
+        df = pd.DataFrame(bars)
+        ind = compute_indicators(df['close'], df['high'], df['low'], df['close'] * 0)
+
+        stoch, rsi = StochasticRule(), RsiRule()
+        smemo, rmemo = {}, {}
+        for bar in bars[:-1]:
+            stoch.roll(smemo, bar)
+            rsi.roll(rmemo, bar)
+        # today's provisional values are the screener's values of the last bar
+        last = bars[-1]
+        today = {'price': last['close'], 'high': last['high'], 'low': last['low']}
+        _, k, d = stoch._next(smemo, today['price'], today['high'], today['low'])
+        self.assertAlmostEqual(k, ind['Slow_K'].iloc[-1])
+        self.assertAlmostEqual(d, ind['Slow_D'].iloc[-1])
+        self.assertAlmostEqual(smemo['k'], ind['Slow_K'].iloc[-2])
+        gain, loss = rsi._step(rmemo, today['price'])
+        self.assertAlmostEqual(100 - 100 / (1 + gain / loss), ind['RSI'].iloc[-1])
+
+class TestEngine(unittest.TestCase):
+    def setUp(self):
+        # 6 quiet days topping out at 1100, then today
+        self.bars = [{'date': 20240301 + i, 'high': 1100, 'low': 900, 'close': 1000} for i in range(6)]
+        self.sink = MemorySink()
+        self.engine = AlertEngine([BreakoutRule(6)], [self.sink])
+        self.engine.watch('000001', self.bars, name='테스트', day=20240311)
+
+    def test_alert_once_per_session(self):
+        e = self.engine
+        self.assertEqual(e.update('000001', 1050, day=20240311), [])
+        self.assertEqual([a['kind'] for a in e.update('000001', 1150, day=20240311)], ['breakout'])
+        self.assertEqual(e.update('000001', 1160, day=20240311), [])   # still above: no repeat
+        e.update('000001', 1050, day=20240311)
+        self.assertEqual(e.update('000001', 1170, day=20240311), [])   # same session: de-duplicated
+        self.assertEqual(len(self.sink.alerts), 1)
+        self.assertEqual(self.sink.alerts[0]['detail'], {'level': 1100.0})
+
+        # next session: today's 1170 high becomes part of the level
+        self.assertEqual(e.update('000001', 1150, day=20240312), [])
+        self.assertEqual(len(e.update('000001', 1180, day=20240312)), 1)
+
+    def test_only_changed_inputs_are_checked(self):
+        e = AlertEngine([BreakoutRule(6), StochasticRule()])
+        e.watch('000001', self.bars, day=20240311)
+        e.update('000001', 1000, volume=10, day=20240311)
+        checks = e.stats['checks']
+        e.update('000001', 1000, volume=20, day=20240311)   # volume only: no rule reads it
+        e.update('000001', 1000, volume=20, day=20240311)   # nothing changed
+        self.assertEqual(e.stats['checks'], checks)
+        self.assertEqual(e.stats['unchanged'], 1)
+        e.update('000001', 1001, volume=20, day=20240311)   # price: both rules
+        self.assertEqual(e.stats['checks'], checks + 2)
+        self.assertEqual(e.update('999999', 1), [])          # not watched
+
+    def test_file_sink_and_replay(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'alerts.ndjson')
+            self.engine.sinks.append(open_sink(f"file:{path}"))
+            ticks = [json.dumps({'code': '000001', 'price': p, 'day': 20240311, 'time': '09:0%d:00' % i})
+                     for i, p in enumerate([1000, 1200, 1210])]
+            replay_ticks(self.engine, ticks)
+            self.engine.close()
+            with open(path, encoding='utf-8') as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual([(a['code'], a['kind'], a['time']) for a in lines], [('000001', 'breakout', '09:01:00')])
+        self.assertRaises(ValueError, open_sink, 'pager:1')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,13 +4,60 @@ import os
 import json
 import argparse
 from datetime import datetime
-import requests
-from bs4 import BeautifulSoup
+from contextlib import redirect_stdout
 
-# Add parent directory to path to import shared modules if needed,
-# but for now we'll implement basic scraping here or duplicate simple logic to stay independent.
-# Actually, let's reuse NaverFinanceClient if we can, but importing from sibling dirs is tricky in scripts.
-# We will implement a specialized mini-client here.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import fetch, tables
+from common.metrics import timed
+from common import output
+from common.deadline import Deadline, EXIT_PARTIAL, add_argument as add_deadline_argument
+
+# Specialized mini-client; only the shared fetch layer comes from common.
+
+LOW_POSITION = 0.3   # preemption zone: lower 30% of the 52-week range
+
+@timed('parse.theme_stocks')
+def parse_theme_stocks(html):
+    """
+    Member stocks of a sise_group_detail page (table.type_5):
+    [{code, name, price}] in page order.
+    """
+    stocks = []
+    for _, cols in tables.rows(html, 'type_5'):
+        if len(cols) < 3: continue
+        name_tag = tables.link(cols[0])
+        if not name_tag or name_tag[0] is None: continue
+        price_txt = tables.text(cols[2]).replace(',', '')
+        if not price_txt.isdigit(): continue
+        stocks.append({'code': name_tag[0].split('=')[-1], 'name': name_tag[1], 'price': int(price_txt)})
+    return stocks
+
+def parse_theme_stocks_soup(html):
+    """
+    Reference BeautifulSoup version of parse_theme_stocks (parsecheck.py).
+    """
+    soup = fetch.parse_html(html)
+
+    stocks = []
+    # Table: type_5
+    rows = soup.select('table.type_5 tr')
+    for row in rows:
+        cols = row.select('td')
+        if len(cols) < 3: continue
+
+        try:
+            name_tag = cols[0].find('a')
+            if not name_tag: continue
+            name = name_tag.text.strip()
+            code = name_tag['href'].split('=')[-1]
+
+            price_txt = cols[2].text.strip().replace(',', '')
+            if not price_txt.isdigit(): continue
+            price = int(price_txt)
+
+            stocks.append({'code': code, 'name': name, 'price': price})
+        except: continue
+    return stocks
 
 class ThemePlanner:
     def __init__(self):
@@ -38,42 +85,22 @@ class ThemePlanner:
             cal_month = (month + i - 1) % 12 + 1 # month+1, month+2
             themes = self.calendar.get(str(cal_month), [])
             for t in themes:
-                t['target_month'] = cal_month
-                targets.append(t)
+                # copies: the calendar itself stays untouched between calls
+                targets.append(dict(t, target_month=cal_month))
         return targets
 
-    def fetch_theme_stocks(self, theme_id):
+    @timed('event.theme_stocks')
+    def fetch_theme_stocks(self, theme_id, limit=10):
         url = f"https://finance.naver.com/sise/sise_group_detail.naver?type=theme&no={theme_id}"
         try:
-            res = requests.get(url, headers=self.headers)
-            soup = BeautifulSoup(res.text, 'html.parser')
-            
-            stocks = []
-            # Table: type_5
-            rows = soup.select('table.type_5 tr')
-            for row in rows:
-                cols = row.select('td')
-                if len(cols) < 3: continue
-                
-                try:
-                    name_tag = cols[0].find('a')
-                    if not name_tag: continue
-                    name = name_tag.text.strip()
-                    code = name_tag['href'].split('=')[-1]
-                    desc = cols[1].text.strip() # Theme Description if available? No, this is stock list
-                    
-                    price_txt = cols[2].text.strip().replace(',', '')
-                    if not price_txt.isdigit(): continue
-                    price = int(price_txt)
-
-                    stocks.append({'code': code, 'name': name, 'price': price})
-                except: continue
-                
-            return stocks[:10] # Top 10 stocks in theme usually leaders
+            res = fetch.get(url, headers=self.headers)
+            stocks = parse_theme_stocks(res.text)
+            return stocks[:limit] if limit else stocks # Top 10 stocks in theme usually leaders
         except Exception as e:
             print(f"Error fetching theme {theme_id}: {e}")
             return []
 
+    @timed('event.psychological_low')
     def check_psychological_low(self, code):
         """
         Check if current price is in the lower 30% of 3-year range (Weekly Candle).
@@ -90,8 +117,7 @@ class ThemePlanner:
             # item/main.naver -> .rate_info table
             
             main_url = f"https://finance.naver.com/item/main.naver?code={code}"
-            res = requests.get(main_url, headers=self.headers)
-            soup = BeautifulSoup(res.text, 'html.parser')
+            soup = fetch.get_soup(main_url, headers=self.headers)
             
             # Find 52-week High/Low
             # Usually in a table: 52주 최거/최저
@@ -145,14 +171,14 @@ class ThemePlanner:
         except Exception as e:
             return None
 
+    @timed('event.financials')
     def check_financials(self, code):
         """
         Check simplified financials: No Deficit (OpInc > 0).
         """
         url = f"https://finance.naver.com/item/main.naver?code={code}"
         try:
-            res = requests.get(url, headers=self.headers)
-            soup = BeautifulSoup(res.text, 'html.parser')
+            soup = fetch.get_soup(url, headers=self.headers)
             
             # Financial Analysis table cop_analysis
             # Look for recent yearly Operating Income
@@ -164,13 +190,56 @@ class ThemePlanner:
         except:
             return False
 
+    def iter_candidates(self, stocks, deadline=None):
+        """
+        Yields theme members in the preemption zone (lower 30% of the
+        52-week range) as {'code', 'name', 'price', **analysis}. With a
+        common.deadline.Deadline, members not checked in time go to
+        deadline.unchecked.
+        """
+        for s in (deadline.each(stocks) if deadline else stocks):
+            # Check Low Position (Preemption Logic)
+            analysis = self.check_psychological_low(s['code'])
+            if not analysis:
+                if deadline and deadline.expired(): deadline.skip([s['code']])
+                continue
+
+            # Criterion: Lower 30% of 52-week range (0.3)
+            # "Buy when quiet"
+            if analysis['position'] <= LOW_POSITION:
+                yield dict(s, **analysis)
+
+    def plan(self, month=None, limit=10):
+        """
+        Upcoming themes for the month with their preemption candidates.
+        """
+        return [dict(theme, candidates=list(self.iter_candidates(self.fetch_theme_stocks(theme['id'], limit))))
+                for theme in self.get_upcoming_themes(month)]
+
+# Columns of the tabular formats (--format csv/parquet)
+FIELDS = ['theme_id', 'theme', 'target_month', 'code', 'name', 'price', 'curr', 'low_52', 'high_52', 'position']
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--month', type=int, default=None, help='Target month to scan (default: current month)')
-    args = parser.parse_args()
+    add_deadline_argument(parser)
+    output.add_arguments(parser)
+    args = output.parse_args(parser)
+    deadline = Deadline(args.deadline)
     
     planner = ThemePlanner()
     target_month = args.month if args.month else datetime.now().month
+
+    if args.format != 'text':
+        # One record per preemption candidate, tagged with its theme
+        with output.open_writer(args, FIELDS) as writer, redirect_stdout(sys.stderr), deadline.active():
+            for theme in deadline.each(planner.get_upcoming_themes(target_month)):
+                for s in planner.iter_candidates(planner.fetch_theme_stocks(theme['id']), deadline):
+                    writer.write(dict(theme_id=theme['id'], theme=theme['name'],
+                                      target_month=theme['target_month'], **s))
+        deadline.warn()
+        if deadline.partial: sys.exit(EXIT_PARTIAL)
+        return
     
     print(f"=== 📅 계절/이벤트 테마주 선취매 캘린더 (기준: {target_month}월) ===")
     
@@ -186,27 +255,28 @@ def main():
         
     print("\n[선취매 유망 종목 분석 (심리적 저점 & 52주 최저 근접)]")
     
-    for theme in upcoming:
-        print(f"\n>> 테마 분석: {theme['name']} ({theme['target_month']}월)")
-        stocks = planner.fetch_theme_stocks(theme['id'])
-        print(f"   관련 종목 {len(stocks)}개 검색 중...")
-        
-        found = 0
-        for s in stocks:
-            # Check Low Position (Preemption Logic)
-            analysis = planner.check_psychological_low(s['code'])
-            if not analysis: continue
-            
-            # Criterion: Lower 30% of 52-week range (0.3)
-            # "Buy when quiet"
-            if analysis['position'] <= 0.3:
-                print(f"   ✅ [매수 알림] {s['name']} ({s['code']})")
-                print(f"      현재가: {analysis['curr']}원 (52주 저점 대비 +{int((analysis['curr']/analysis['low_52']-1)*100)}% 수준)")
-                print(f"      위치: 바닥권 (상위 {int(analysis['position']*100)}%) - 선취매 적기!")
-                found += 1
-                
-        if found == 0:
-            print("   (현재 바닥권에 있는 주요 종목이 없습니다. 이미 상승했거나 데이터 부족)")
+    with deadline.active():
+        for theme in deadline.each(upcoming):
+            report_theme(planner, theme, deadline)
+    if deadline.partial:
+        deadline.warn(sys.stdout)
+        sys.exit(EXIT_PARTIAL)
+
+
+def report_theme(planner, theme, deadline=None):
+    print(f"\n>> 테마 분석: {theme['name']} ({theme['target_month']}월)")
+    stocks = planner.fetch_theme_stocks(theme['id'])
+    print(f"   관련 종목 {len(stocks)}개 검색 중...")
+    
+    found = 0
+    for s in planner.iter_candidates(stocks, deadline):
+        print(f"   ✅ [매수 알림] {s['name']} ({s['code']})")
+        print(f"      현재가: {s['curr']}원 (52주 저점 대비 +{int((s['curr']/s['low_52']-1)*100)}% 수준)")
+        print(f"      위치: 바닥권 (상위 {int(s['position']*100)}%) - 선취매 적기!")
+        found += 1
             
+    if found == 0:
+        print("   (현재 바닥권에 있는 주요 종목이 없습니다. 이미 상승했거나 데이터 부족)")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,207 @@
+
+import os
+import sys
+import json
+import argparse
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+from planner import ThemePlanner
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.paths import data_dir
+from common.ohlcv_store import OHLCVStore
+from common.metrics import timed
+
+MARKET_SYMBOL = 'KOSPI'
+
+
+def build_windows(calendar, years):
+    """
+    Flattens theme_calendar.json into pre-event windows for every year.
+    Entry is the first day of the calendar month (when the planner says to
+    buy), exit is the theme's d_day - in the following year when the d_day
+    month comes before the calendar month (e.g. 11월 -> 1-5 CES).
+    Returns (themes, entry, exit) with yyyymmdd arrays shaped (themes, years).
+    """
+    themes = []
+    for month_key in sorted(calendar, key=int):
+        for t in calendar[month_key]:
+            d_month, d_day = (int(x) for x in t['d_day'].split('-'))
+            themes.append({
+                'name': t['name'], 'id': t['id'], 'month': int(month_key),
+                'd_day': t['d_day'], 'd_month': d_month, 'd_date': d_day
+            })
+
+    years = np.asarray(years, dtype=np.int64)[None, :]
+    month = np.array([t['month'] for t in themes], dtype=np.int64)[:, None]
+    d_month = np.array([t['d_month'] for t in themes], dtype=np.int64)[:, None]
+    d_date = np.array([t['d_date'] for t in themes], dtype=np.int64)[:, None]
+
+    entry = years * 10000 + month * 100 + 1
+    exit_year = years + (d_month < month)
+    exit_ = exit_year * 10000 + d_month * 100 + d_date
+    return themes, entry, exit_
+
+
+def forward_fill(values):
+    """
+    Forward-fills NaNs down each column so halted days use the last close.
+    """
+    idx = np.where(np.isnan(values), 0, np.arange(len(values))[:, None])
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return values[idx, np.arange(values.shape[1])]
+
+
+@timed('seasonality.evaluate')
+def evaluate(panel, members, entry, exit_, market=MARKET_SYMBOL):
+    """
+    Computes every (theme, year) window in one vectorized pass.
+    members: list (one per theme) of member code lists.
+    Returns dict of (themes, years) arrays:
+      theme_ret  - equal-weight member return from entry to exit
+      market_ret - market index return over the same window
+      excess     - theme_ret - market_ret
+      breadth    - share of members that beat the market
+    """
+    n_themes, n_years = entry.shape
+    dates = panel.dates
+    close = forward_fill(panel['close'])
+
+    entry_f, exit_f = entry.ravel(), exit_.ravel()
+    ei = np.searchsorted(dates, entry_f, side='left')       # first session on/after entry
+    xi = np.searchsorted(dates, exit_f, side='right') - 1   # last session on/before d_day
+    ei = np.clip(ei, 0, len(dates) - 1)
+    xi = np.clip(xi, 0, len(dates) - 1)
+    # Entry session must fall inside the entry month and d_day must be covered
+    valid = (dates[ei] // 100 == entry_f // 100) & (exit_f <= dates[-1]) & (xi > ei)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret = close[xi] / close[ei] - 1.0
+    ret[~valid] = np.nan
+    ret = ret.reshape(n_themes, n_years, -1)
+
+    membership = np.zeros((n_themes, len(panel.codes)), dtype=bool)
+    for i, codes in enumerate(members):
+        cols = [panel.col(c) for c in codes if panel.col(c) is not None]
+        membership[i, cols] = True
+    member_ret = np.where(membership[:, None, :], ret, np.nan)
+
+    mcol = panel.col(market)
+    market_ret = ret[:, :, mcol] if mcol is not None else np.zeros((n_themes, n_years))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # themes/years without data
+        theme_ret = np.nanmean(member_ret, axis=2)
+        n_valid = np.isfinite(member_ret).sum(axis=2)
+        beat = (member_ret > market_ret[:, :, None]).sum(axis=2)
+        breadth = np.where(n_valid > 0, beat / np.maximum(n_valid, 1), np.nan)
+
+    return {
+        'theme_ret': theme_ret,
+        'market_ret': market_ret,
+        'excess': theme_ret - market_ret,
+        'breadth': breadth,
+    }
+
+
+def summarize(themes, result, years):
+    """
+    Collapses the per-year matrices into one ranked row per theme
+    (best mean excess return first).
+    """
+    rows = []
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for i, t in enumerate(themes):
+            excess = result['excess'][i]
+            ok = np.isfinite(excess)
+            n = int(ok.sum())
+            row = {
+                'name': t['name'], 'id': t['id'], 'month': t['month'], 'd_day': t['d_day'],
+                'years': n,
+                'mean_return': float(np.nanmean(result['theme_ret'][i])) if n else None,
+                'mean_excess': float(excess[ok].mean()) if n else None,
+                'median_excess': float(np.median(excess[ok])) if n else None,
+                'hit_rate': float((excess[ok] > 0).mean()) if n else None,
+                'breadth': float(np.nanmean(result['breadth'][i])) if n else None,
+                't_stat': None,
+                'per_year': {int(y): (float(e) if np.isfinite(e) else None) for y, e in zip(years, excess)},
+            }
+            if n > 1:
+                sd = excess[ok].std(ddof=1)
+                row['t_stat'] = float(row['mean_excess'] / (sd / np.sqrt(n))) if sd > 0 else None
+            rows.append(row)
+
+    rows.sort(key=lambda r: (r['mean_excess'] is not None, r['mean_excess'] or 0), reverse=True)
+    return rows
+
+
+def load_members(planner, theme_id, refresh=False):
+    """
+    Theme membership is cached per theme; it is current membership, so the
+    result carries survivorship bias for delisted past members.
+    """
+    path = os.path.join(data_dir('themes'), f"{theme_id}.json")
+    if not refresh and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)['codes']
+
+    codes = [s['code'] for s in planner.fetch_theme_stocks(theme_id, limit=None)]
+    if codes:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'fetched': datetime.now().strftime('%Y-%m-%d'), 'codes': codes}, f)
+    return codes
+
+
+def fmt_pct(v):
+    return f"{v * 100:+.1f}%" if v is not None else "   N/A"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seasonal theme effect validator')
+    parser.add_argument('--years', type=int, default=12, help='Number of past years to evaluate')
+    parser.add_argument('--refresh', action='store_true', help='Refetch theme members and histories')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4, help='Loader threads')
+    parser.add_argument('--json', action='store_true', help='Print the ranked table as JSON')
+    args = parser.parse_args()
+
+    planner = ThemePlanner()
+    this_year = datetime.now().year
+    years = list(range(this_year - args.years, this_year + 1))
+    themes, entry, exit_ = build_windows(planner.calendar, years)
+
+    members = [load_members(planner, t['id'], args.refresh) for t in themes]
+    universe = sorted({c for m in members for c in m} | {MARKET_SYMBOL})
+
+    store = OHLCVStore()
+    missing = [c for c in universe if args.refresh or not store.has(c)]
+    if missing:
+        print(f"히스토리 {len(missing)}개 종목 수집 중...")
+        store.update_many(missing, count=(args.years + 1) * 250 + 60, workers=args.workers)
+
+    panel = store.load_panel(universe, start=years[0] * 10000 + 101, fields=('close',), workers=args.workers)
+    if not len(panel.dates):
+        print("로컬 히스토리가 없습니다. --refresh 로 먼저 수집하세요.")
+        return
+
+    result = evaluate(panel, members, entry, exit_)
+    ranked = summarize(themes, result, years)
+
+    if args.json:
+        print(json.dumps(ranked, ensure_ascii=False, indent=2))
+        return
+
+    print(f"=== 📅 계절 테마 효과 검증 ({years[0]}~{years[-1]}, 시장 대비 {MARKET_SYMBOL}) ===")
+    print(f"{'순위':>4} {'테마':<20} {'매수월':>4} {'D-day':>6} {'연수':>4} {'초과수익':>8} {'중앙값':>8} {'적중률':>6} {'t':>6}")
+    for i, r in enumerate(ranked, start=1):
+        hit = f"{r['hit_rate'] * 100:.0f}%" if r['hit_rate'] is not None else "N/A"
+        t = f"{r['t_stat']:.2f}" if r['t_stat'] is not None else "-"
+        print(f"{i:>4} {r['name']:<20} {r['month']:>4} {r['d_day']:>6} {r['years']:>4} "
+              f"{fmt_pct(r['mean_excess']):>8} {fmt_pct(r['median_excess']):>8} {hit:>6} {t:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+
+import sys
+import os
+import unittest
+
+import numpy as np
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from seasonality import build_windows, evaluate, summarize
+from common.ohlcv_store import Panel, merge_bars
+
+class TestSeasonality(unittest.TestCase):
+    def setUp(self):
+        self.calendar = {
+            "3": [{"name": "방위산업", "id": "144", "desc": "", "d_day": "4-15"}],
+            "11": [{"name": "CES/IT부품", "id": "495", "desc": "", "d_day": "1-5"}],
+        }
+
+    def test_windows_roll_into_next_year(self):
+        themes, entry, exit_ = build_windows(self.calendar, [2020, 2021])
+        self.assertEqual([t['month'] for t in themes], [3, 11])
+        self.assertEqual(entry[0].tolist(), [20200301, 20210301])
+        self.assertEqual(exit_[0].tolist(), [20200415, 20210415])
+        # November entry, January d_day -> next year
+        self.assertEqual(exit_[1].tolist(), [20210105, 20220105])
+
+    def test_evaluate_excess_and_hit_rate(self):
+        themes, entry, exit_ = build_windows({"3": self.calendar["3"]}, [2020, 2021])
+        dates = np.array([20200302, 20200415, 20210302, 20210415])
+        close = np.array([
+            # AAA,  BBB,    KOSPI
+            [100.0, 100.0, 1000.0],
+            [120.0, 100.0, 1050.0],  # 2020: theme +10%, market +5%
+            [100.0, np.nan, 1000.0],  # BBB halted -> last close carried forward
+            [90.0, 100.0, 1100.0],    # 2021: theme -5% vs market +10%
+        ])
+        panel = Panel(dates, ['AAA', 'BBB', 'KOSPI'], {'close': close})
+        result = evaluate(panel, [['AAA', 'BBB']], entry, exit_)
+
+        np.testing.assert_allclose(result['theme_ret'][0], [0.10, -0.05])
+        np.testing.assert_allclose(result['excess'][0], [0.05, -0.15])
+        np.testing.assert_allclose(result['breadth'][0], [0.5, 0.0])
+
+        row = summarize(themes, result, [2020, 2021])[0]
+        self.assertEqual(row['years'], 2)
+        self.assertAlmostEqual(row['hit_rate'], 0.5)
+        self.assertAlmostEqual(row['mean_excess'], -0.05)
+
+    def test_window_outside_history_is_ignored(self):
+        themes, entry, exit_ = build_windows({"3": self.calendar["3"]}, [2019])
+        dates = np.array([20200302, 20200415])
+        panel = Panel(dates, ['AAA', 'KOSPI'], {'close': np.array([[1.0, 1.0], [2.0, 1.0]])})
+        result = evaluate(panel, [['AAA']], entry, exit_)
+        self.assertTrue(np.isnan(result['excess'][0, 0]))
+
+    def test_merge_bars_prefers_new_rows(self):
+        old = {'date': np.array([1, 2]), 'open': np.array([1.0, 1.0]), 'high': np.array([1.0, 1.0]),
+               'low': np.array([1.0, 1.0]), 'close': np.array([10.0, 20.0]), 'volume': np.array([0.0, 0.0])}
+        new = {'date': np.array([2, 3]), 'open': np.array([1.0, 1.0]), 'high': np.array([1.0, 1.0]),
+               'low': np.array([1.0, 1.0]), 'close': np.array([21.0, 30.0]), 'volume': np.array([0.0, 0.0])}
+        merged = merge_bars(old, new)
+        self.assertEqual(merged['date'].tolist(), [1, 2, 3])
+        self.assertEqual(merged['close'].tolist(), [10.0, 21.0, 30.0])
+
+if __name__ == '__main__':
+    unittest.main()
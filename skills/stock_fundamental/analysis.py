@@ -1,21 +1,38 @@
 
-import requests
-from bs4 import BeautifulSoup
 import argparse
 import sys
+import os
+from datetime import date
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from statements import StatementsClient
+from industry import IndustryTable
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import fetch
+from common.universe import listed_codes
+from common.metrics import timed
+from common.cop_analysis import parse_period_series
+from common.pit_store import PointInTimeStore
+from common import output
+from common.checkpoint import Checkpoint, checkpoint_path
+from common.deadline import Deadline, DeadlineExceeded, EXIT_PARTIAL, add_argument as add_deadline_argument
 
 class FundamentalAnalyzer:
-    def __init__(self):
+    def __init__(self, pit_store=None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        # Optional PointInTimeStore; every snapshot is recorded per period
+        self.pit_store = pit_store
 
-    def get_data(self, code):
+    @timed('fundamental.page')
+    def get_data(self, code, verbose=True, industry=None):
         url = f"https://finance.naver.com/item/main.naver?code={code}"
         try:
-            print(f"Fetching data from {url}...")
-            res = requests.get(url, headers=self.headers)
-            soup = BeautifulSoup(res.text, 'html.parser')
+            if verbose: print(f"Fetching data from {url}...")
+            soup = fetch.get_soup(url, headers=self.headers)
             
             data = {'code': code}
             
@@ -65,9 +82,21 @@ class FundamentalAnalyzer:
                                     break
                                 except: continue
 
+                if self.pit_store is not None:
+                    try:
+                        self.pit_store.record(code, parse_period_series(analysis_div))
+                    except Exception as e:
+                        print(f"Error recording fundamentals for {code}: {e}", file=sys.stderr)
+
             # 3. Industry PER
+            # From the shared IndustryTable when given (batch runs), otherwise
             # Validated Selector: table[summary="동일업종 PER 정보"] -> em
-            
+            if industry is not None:
+                ind_per = industry.per_of(code)
+                if ind_per is not None:
+                    data['industry_per'] = ind_per
+                return data
+
             industry_table = soup.find('table', summary='동일업종 PER 정보')
             if industry_table:
                 ems = industry_table.find_all('em')
@@ -83,17 +112,16 @@ class FundamentalAnalyzer:
             return data
             
         except Exception as e:
-            print(f"Error: {e}")
+            print(f"Error: {e}", file=sys.stderr)
             return {}
 
-    def analyze(self, data):
-        if not data:
-            print("데이터를 찾을 수 없습니다.")
-            return
-
-        print(f"\n[{data.get('code')}] {data.get('name')} 펀더멘털 신호등 분석")
-        print("=" * 60)
-        
+    @timed('fundamental.evaluate')
+    def evaluate(self, data):
+        """
+        Computes the four traffic lights for one snapshot.
+        Returns {'stability', 'earnings', 'valuation', 'relative'} as
+        (color, message) pairs plus the green-light 'score' (0-3).
+        """
         # 1. Stability (Debt Ratio)
         debt = data.get('debt_ratio')
         stability_color = "GRAY"
@@ -108,9 +136,7 @@ class FundamentalAnalyzer:
             else:
                 stability_color = "RED"
                 stability_msg = "위험 (>200%)"
-        
-        print(f"1. 안정성 (부채비율): {debt}% -> [{stability_color}] {stability_msg}")
-        
+
         # 2. Earnings (Reserve Ratio Proxy)
         reserve = data.get('reserve_ratio')
         earnings_color = "GRAY"
@@ -125,16 +151,13 @@ class FundamentalAnalyzer:
             else:
                 earnings_color = "RED"
                 earnings_msg = "이익체력 부족 (<200%)"
-                
-        print(f"2. 이익 체력 (유보율): {reserve}% -> [{earnings_color}] {earnings_msg}")
-        print("   (참고: 이익잉여금 대신 유보율을 대용 지표로 사용)")
-        
+
         # 3. Valuation (PER & PBR)
         per = data.get('PER', 999)
         pbr = data.get('PBR', 999)
         val_color = "GRAY"
         val_msg = "N/A"
-        
+
         if pbr != 999 and per != 999:
              if pbr <= 1 and per <= 10:
                  val_color = "GREEN"
@@ -145,14 +168,12 @@ class FundamentalAnalyzer:
              else:
                  val_color = "RED"
                  val_msg = "고평가 가능성"
-        
-        print(f"3. 가치 평가: PER {per}, PBR {pbr} -> [{val_color}] {val_msg}")
-        
+
         # 4. Relative Valuation (Industry PER)
         ind_per = data.get('industry_per')
         rel_color = "GRAY"
         rel_msg = "N/A"
-        
+
         if ind_per and per != 999:
             if per < ind_per:
                 rel_color = "GREEN"
@@ -160,33 +181,282 @@ class FundamentalAnalyzer:
             else:
                 rel_color = "RED"
                 rel_msg = f"업종 대비 비쌈 ({ind_per})"
-                
-        print(f"4. 상대 가치: 업종 PER {ind_per} -> [{rel_color}] {rel_msg}")
-        print("=" * 60)
-        
+
         # Traffic Light Summary
         score = 0
         if stability_color == "GREEN": score += 1
         if earnings_color == "GREEN": score += 1
         if val_color == "GREEN": score += 1
-        
+
+        return {
+            'stability': (stability_color, stability_msg),
+            'earnings': (earnings_color, earnings_msg),
+            'valuation': (val_color, val_msg),
+            'relative': (rel_color, rel_msg),
+            'score': score,
+        }
+
+    def analyze(self, data):
+        if not data:
+            print("데이터를 찾을 수 없습니다.")
+            return
+
+        signals = self.evaluate(data)
+        print(f"\n[{data.get('code')}] {data.get('name')} 펀더멘털 신호등 분석")
+        print("=" * 60)
+
+        color, msg = signals['stability']
+        print(f"1. 안정성 (부채비율): {data.get('debt_ratio')}% -> [{color}] {msg}")
+
+        color, msg = signals['earnings']
+        print(f"2. 이익 체력 (유보율): {data.get('reserve_ratio')}% -> [{color}] {msg}")
+        retained = data.get('retained_earnings')
+        equity = data.get('total_equity')
+        periods = data.get('periods') or {}
+        if retained is not None:
+            period = periods.get('retained_earnings', data.get('period'))
+            # only against equity of the same balance sheet
+            same = equity and periods.get('total_equity', period) == period
+            share = f" (자본총계 대비 {retained / equity * 100:.0f}%)" if same else ""
+            print(f"   이익잉여금: {retained:,.0f}억원{share} [{period} 기준, WiseReport]")
+        else:
+            print("   (참고: 이익잉여금 대신 유보율을 대용 지표로 사용)")
+
+        color, msg = signals['valuation']
+        print(f"3. 가치 평가: PER {data.get('PER', 999)}, PBR {data.get('PBR', 999)} -> [{color}] {msg}")
+
+        color, msg = signals['relative']
+        print(f"4. 상대 가치: 업종 PER {data.get('industry_per')} -> [{color}] {msg}")
+        print("=" * 60)
+
+        score = signals['score']
         print(f"종합 점수: 3개 중 {score}개 항목 합격 (초록불)")
         if score == 3:
             print(">>> ⭐ 강력 매수 후보 (전 항목 초록불) ⭐")
         elif score == 0:
              print(">>> ⚠️ 고위험 경고 (초록불 없음) ⚠️")
 
+    def screen_one(self, code, statements=None, industry=None):
+        """
+        Fetches one snapshot and flattens it with its signals into a table row.
+        """
+        data = self.get_data(code, verbose=False, industry=industry)
+        if not data:
+            return {'code': code, 'error': 'fetch failed'}
+        if statements is not None:
+            data.update(statements.get(code))
+
+        signals = self.evaluate(data)
+        row = {'code': code, 'name': data.get('name')}
+        for key in BATCH_METRICS:
+            row[key] = data.get(key)
+        for key in SIGNALS:
+            row[key] = signals[key][0]
+        row['greens'] = sum(1 for key in SIGNALS if row[key] == 'GREEN')
+        row['score'] = signals['score']
+        return row
+
+    def iter_screen(self, codes, workers=16, statements=None, industry=None, deadline=None):
+        """
+        Batch traffic-light screening. Snapshots are fetched concurrently
+        (the work is network bound); rows are yielded in input order as
+        soon as they are ready. With a common.deadline.Deadline, rows not
+        finished in time are dropped and their codes recorded in
+        deadline.unchecked.
+        """
+        screen_one = lambda c: self.screen_one(c, statements, industry)
+        if deadline: screen_one = deadline.wrap(screen_one)
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = [pool.submit(screen_one, c) for c in codes]
+            for i, future in enumerate(futures):
+                try:
+                    row = future.result(timeout=deadline.remaining() if deadline else None)
+                except (FutureTimeout, DeadlineExceeded):
+                    row = None
+                if deadline and deadline.expired():
+                    yield from finished_rows(codes[i:], futures[i:], deadline)
+                    return
+                if (i + 1) % 100 == 0: print(f"  {i + 1}/{len(codes)}", file=sys.stderr)
+                yield row
+        finally:
+            pool.shutdown(wait=deadline is None, cancel_futures=True)
+
+    @timed('fundamental.screen')
+    def screen(self, codes, workers=16, statements=None, industry=None):
+        return list(self.iter_screen(codes, workers, statements, industry))
+
+
+# Columns carried into batch output, in order
+BATCH_METRICS = ('debt_ratio', 'reserve_ratio', 'PER', 'PBR', 'industry_per', 'ROE', 'operating_income')
+SIGNALS = ('stability', 'earnings', 'valuation', 'relative')
+COLOR_RANK = {'GREEN': 3, 'YELLOW': 2, 'RED': 1, 'GRAY': 0}
+
+
+def sort_rows(rows, key):
+    """
+    Sorts batch rows best-first. Signal columns sort GREEN > YELLOW > RED,
+    metric columns ascending (cheapest / least levered first), score descending.
+    Rows missing the key always go last.
+    """
+    if key in ('score', 'greens'):
+        return sorted(rows, key=lambda r: (r.get(key) is None, -(r.get(key) or 0), -r.get('greens', 0)))
+    if key in SIGNALS:
+        return sorted(rows, key=lambda r: -COLOR_RANK.get(r.get(key), -1))
+    return sorted(rows, key=lambda r: (r.get(key) is None, r.get(key) if r.get(key) is not None else 0))
+
+
+def print_table(rows, out=sys.stdout):
+    header = f"{'코드':<8}{'종목명':<14}{'부채':>8}{'유보율':>10}{'PER':>8}{'PBR':>7}{'업종PER':>8}  안정/이익/가치/상대   점수"
+    print(header, file=out)
+    print("-" * len(header), file=out)
+    short = {'GREEN': 'G', 'YELLOW': 'Y', 'RED': 'R', 'GRAY': '-'}
+
+    def num(v, width, fmt='.1f'):
+        return f"{v:>{width}{fmt}}" if isinstance(v, (int, float)) else f"{'-':>{width}}"
+
+    for r in rows:
+        if r.get('error'):
+            print(f"{r['code']:<8}{'(조회 실패)':<14}", file=out)
+            continue
+        lights = "/".join(short.get(r[k], '-') for k in SIGNALS)
+        print(f"{r['code']:<8}{(r.get('name') or '')[:12]:<14}{num(r['debt_ratio'], 8)}{num(r['reserve_ratio'], 10, '.0f')}"
+              f"{num(r['PER'], 8)}{num(r['PBR'], 7, '.2f')}{num(r['industry_per'], 8)}  {lights:<16}{r['score']:>5}", file=out)
+
+
+BATCH_FIELDS = ['code', 'name', *BATCH_METRICS, *SIGNALS, 'greens', 'score', 'error']
+
+
+def write_rows(rows, fmt, output_path=None):
+    """
+    'table' is the human report; every other format goes through common.output.
+    """
+    if fmt != 'table':
+        with output.RecordWriter(fmt, output_path, BATCH_FIELDS) as writer:
+            for row in rows:
+                writer.write(row)
+        return
+    out = open(output_path, 'w', encoding='utf-8') if output_path else sys.stdout
+    try:
+        print_table(rows, out)
+    finally:
+        if output_path: out.close()
+
+
+def finished_rows(codes, futures, deadline):
+    """
+    Rows that completed cleanly by the time the deadline hit; the other
+    codes are recorded as unchecked.
+    """
+    for code, future in zip(codes, futures):
+        row = future.result() if future.done() and future.exception() is None else None
+        if row is None or row.get('error'):
+            deadline.skip([code])
+            continue
+        yield row
+
+
+def iter_resumed(analyzer, codes, done, checkpoint=None, workers=16, statements=None, industry=None, deadline=None):
+    """
+    Batch rows in input order: rows an interrupted run already finished
+    come from `done`, the rest are screened and appended to the checkpoint.
+    Fetch failures and codes cut by the deadline are not recorded, so a
+    resumed run retries them.
+    """
+    position = {c: i for i, c in enumerate(codes)}
+    resumed = [c for c in codes if c in done]
+    j = 0
+    for row in analyzer.iter_screen([c for c in codes if c not in done], workers, statements, industry, deadline):
+        while j < len(resumed) and position[resumed[j]] < position[row['code']]:
+            yield done[resumed[j]]
+            j += 1
+        if checkpoint and not row.get('error'):
+            checkpoint.record(row['code'], row)
+        yield row
+    for code in resumed[j:]:
+        yield done[code]
+
+
+def load_codes(args):
+    codes = []
+    if args.codes:
+        codes += [c.strip() for c in args.codes.split(',') if c.strip()]
+    if args.codes_file:
+        with open(args.codes_file, 'r', encoding='utf-8') as f:
+            codes += [line.split()[0] for line in f if line.strip() and not line.startswith('#')]
+    if args.market:
+        codes += listed_codes(args.market)
+    # de-duplicate, keep order
+    return list(dict.fromkeys(codes))
+
+
 def main():
     parser = argparse.ArgumentParser(description='Stock Fundamental Dashboard')
     parser.add_argument('--code', type=str, help='Stock Code (e.g. 005930)')
-    args = parser.parse_args()
-    
+    parser.add_argument('--statements', action='store_true', help='Add WiseReport statements (retained earnings, PCR/PSR, EV/EBITDA)')
+    batch = parser.add_argument_group('batch screening')
+    batch.add_argument('--codes', type=str, help='Comma separated codes (e.g. 005930,000660)')
+    batch.add_argument('--codes-file', type=str, help='File with one code per line')
+    batch.add_argument('--market', choices=['KOSPI', 'KOSDAQ', 'ALL'], help='Screen every listed code of a market')
+    batch.add_argument('--workers', type=int, default=16, help='Concurrent fetches')
+    batch.add_argument('--page-industry-per', action='store_true', help='Read industry PER from each stock page instead of the daily IndustryTable')
+    batch.add_argument('--sort', type=str, default='score', help='Sort column (score, debt_ratio, PER, valuation, ...)')
+    batch.add_argument('--checkpoint', type=str, help='Progress log (default: one per arguments and day under the data root)')
+    batch.add_argument('--no-checkpoint', action='store_true', help='Neither resume nor record progress')
+    add_deadline_argument(batch)
+    output.add_arguments(parser, human='table')
+    args = output.parse_args(parser)
+
+    analyzer = FundamentalAnalyzer(pit_store=PointInTimeStore())
+    statements = StatementsClient() if args.statements else None
+
+    if args.codes or args.codes_file or args.market:
+        # An interrupted run with the same arguments on the same day is resumed
+        meta = {'codes': args.codes, 'codes_file': args.codes_file, 'market': args.market,
+                'statements': args.statements, 'date': date.today().isoformat()}
+        checkpoint = None
+        if args.no_checkpoint:
+            codes, done = load_codes(args), {}
+        else:
+            checkpoint = Checkpoint(args.checkpoint or checkpoint_path('fundamental', meta))
+            codes, done = checkpoint.start(lambda: load_codes(args), meta)
+            if done:
+                print(f"체크포인트에서 재개: {len(done)}/{len(codes)}개 완료 ({checkpoint.path})", file=sys.stderr)
+        industry = None if args.page_industry_per else IndustryTable.load(workers=args.workers)
+        print(f"{len(codes)}개 종목 펀더멘털 신호등 일괄 분석 중...", file=sys.stderr)
+        deadline = Deadline(args.deadline)
+        rows = iter_resumed(analyzer, codes, done, checkpoint, args.workers, statements, industry, deadline)
+        if args.format == 'ndjson':
+            # Streamed in input order as rows arrive; --sort does not apply
+            with output.open_writer(args, BATCH_FIELDS) as writer, redirect_stdout(sys.stderr):
+                for row in rows:
+                    writer.write(row)
+        else:
+            write_rows(sort_rows(list(rows), args.sort), args.format, args.output)
+        if deadline.partial:
+            # keep the checkpoint open: the next run screens only what was cut
+            if checkpoint: checkpoint.close()
+            deadline.warn()
+            sys.exit(EXIT_PARTIAL)
+        if checkpoint: checkpoint.finish()
+        return
+
     code = args.code
     if not code:
         code = input("Enter Stock Code (e.g., 005930): ").strip()
-        
-    analyzer = FundamentalAnalyzer()
+
+    if args.format != 'table':
+        with output.open_writer(args) as writer, redirect_stdout(sys.stderr):
+            data = analyzer.get_data(code, verbose=False)
+            if data and statements:
+                data.update(statements.get(code))
+            if data:
+                writer.write({'code': code, 'data': data, 'signals': analyzer.evaluate(data)})
+        return
+
     data = analyzer.get_data(code)
+    if data and statements:
+        data.update(statements.get(code))
     analyzer.analyze(data)
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+
+import os
+import sys
+import argparse
+from datetime import date
+from statistics import median
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.cache import JsonCache
+from common.metrics import timed
+from common.universe import fetch_groups, fetch_market_listing, MARKETS
+
+
+@timed('industry.build')
+def build_industry_stats(groups, listing):
+    """
+    groups: [{no, name, codes}] from the 업종 listing.
+    listing: [{code, market_cap, PER, ROE, ...}] from sise_market_sum.
+    Returns (code -> industry no, industry no -> stats).
+
+    'per' is the cap-weighted industry PER (total cap / total earnings of
+    profitable members), which is what the 동일업종 PER box approximates;
+    medians are kept alongside for robustness against outliers.
+    """
+    by_code = {r['code']: r for r in listing}
+    code_industry = {}
+    industries = {}
+
+    for g in groups:
+        pers, roes = [], []
+        cap_sum = earnings_sum = 0.0
+        for code in g['codes']:
+            code_industry[code] = g['no']
+            r = by_code.get(code)
+            if not r: continue
+            per, cap = r.get('PER'), r.get('market_cap')
+            if per is not None and per > 0:
+                pers.append(per)
+                if cap:
+                    cap_sum += cap
+                    earnings_sum += cap / per
+            if r.get('ROE') is not None:
+                roes.append(r['ROE'])
+
+        industries[g['no']] = {
+            'name': g['name'],
+            'members': len(g['codes']),
+            'per': round(cap_sum / earnings_sum, 2) if earnings_sum else None,
+            'per_median': round(median(pers), 2) if pers else None,
+            'roe_median': round(median(roes), 2) if roes else None,
+        }
+    return code_industry, industries
+
+
+class IndustryTable:
+    """
+    Market-wide industry reference: code -> industry and industry -> PER /
+    medians. Built from one concurrent crawl of the 업종 group pages and the
+    market-cap listing, cached for the day, so a batch run needs no
+    per-stock industry lookups.
+    """
+    def __init__(self, code_industry, industries, as_of=None):
+        self.code_industry = code_industry
+        self.industries = industries
+        self.as_of = as_of
+
+    @classmethod
+    def load(cls, refresh=False, workers=8, cache=None, today=None):
+        cache = cache or JsonCache('industry')
+        key = (today or date.today()).isoformat()
+        doc = None if refresh else cache.get(key)
+        if doc is None:
+            print("업종 PER 테이블 생성 중 (하루 1회)...", file=sys.stderr)
+            groups = fetch_groups('upjong', workers)
+            listing = []
+            for market in MARKETS:
+                listing += fetch_market_listing(market, workers)
+            code_industry, industries = build_industry_stats(groups, listing)
+            doc = {'date': key, 'code_industry': code_industry, 'industries': industries}
+            if industries:
+                cache.put(key, doc)
+        return cls(doc['code_industry'], doc['industries'], doc['date'])
+
+    def industry_of(self, code):
+        no = self.code_industry.get(code)
+        return self.industries.get(no) if no else None
+
+    def per_of(self, code):
+        industry = self.industry_of(code)
+        return industry['per'] if industry else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Industry PER reference table')
+    parser.add_argument('--refresh', action='store_true', help='Rebuild even if today\'s table is cached')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    table = IndustryTable.load(args.refresh, args.workers)
+    rows = sorted(table.industries.values(), key=lambda r: (r['per'] is None, r['per'] or 0))
+    print(f"=== 업종별 PER ({table.as_of}, {len(rows)}개 업종) ===")
+    print(f"{'업종':<24}{'종목수':>6}{'PER':>8}{'PER중앙':>9}{'ROE중앙':>9}")
+    for r in rows:
+        fmt = lambda v: f"{v:.2f}" if v is not None else "-"
+        print(f"{r['name'][:22]:<24}{r['members']:>6}{fmt(r['per']):>8}{fmt(r['per_median']):>9}{fmt(r['roe_median']):>9}")
+
+
+if __name__ == "__main__":
+    main()
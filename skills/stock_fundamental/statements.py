@@ -0,0 +1,183 @@
+
+import os
+import re
+import sys
+import json
+import argparse
+from datetime import date
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import fetch
+from common.cache import JsonCache
+from common.metrics import timed
+from common.periods import needs_refresh, period_end
+
+# WiseReport pages prototyped in stock_uprise/debug_wisereport.py
+BALANCE_SHEET_URL = "https://navercomp.wisereport.co.kr/v2/company/c1010003.aspx?cmp_cd={code}"
+INDICATORS_URL = "https://navercomp.wisereport.co.kr/v2/company/c1010004.aspx?cmp_cd={code}"
+
+BALANCE_TARGETS = {
+    '자본총계': 'total_equity',
+    '부채총계': 'total_liabilities',
+    '이익잉여금': 'retained_earnings',
+}
+INDICATOR_TARGETS = {
+    'PCR': 'PCR',
+    'PSR': 'PSR',
+    'EV/EBITDA': 'EV_EBITDA',
+}
+
+PERIOD_RE = re.compile(r'(\d{4})/(\d{2})')
+
+
+def parse_number(txt):
+    txt = txt.strip().replace(',', '')
+    if not txt or txt in ('-', 'N/A'): return None
+    try:
+        return float(txt)
+    except ValueError:
+        return None
+
+
+@timed('parse.wisereport')
+def parse_period_table(html, targets):
+    """
+    Parses WiseReport style tables into {key: {period: value}}.
+    Period columns come from header cells like '2024/12' or '2025/12(E)';
+    estimate columns are skipped so only filed figures are kept.
+    Rows are matched by their first cell containing a target label.
+    """
+    soup = fetch.parse_html(html)
+    result = {}
+
+    for table in soup.select('table'):
+        periods = None
+        for row in table.select('tr'):
+            cells = row.select('th, td')
+            if not cells: continue
+
+            labels = [PERIOD_RE.search(c.text) for c in cells]
+            if periods is None and any(labels):
+                # Header row: remember which column holds which period
+                periods = []
+                for cell, m in zip(cells, labels):
+                    estimate = '(E)' in cell.text or '(e)' in cell.text
+                    periods.append(f"{m.group(1)}/{m.group(2)}" if m and not estimate else None)
+                continue
+
+            label = cells[0].text.strip()
+            key = None
+            for t_label, t_key in targets.items():
+                if t_label in label:
+                    key = t_key
+                    break
+            if not key or key in result: continue
+
+            values = {}
+            if periods:
+                # Header may or may not include a leading label cell
+                offset = len(periods) - len(cells)
+                for i, cell in enumerate(cells[1:], start=1):
+                    j = i + offset
+                    if 0 <= j < len(periods) and periods[j]:
+                        val = parse_number(cell.text)
+                        if val is not None: values[periods[j]] = val
+            if values:
+                result[key] = values
+
+    return result
+
+
+def latest_values(series):
+    """
+    {key: {period: value}} -> ({key: latest value}, {key: its period}).
+    Keys are filed at different times (a blank cell in the newest column),
+    so each value carries its own period.
+    """
+    latest, periods = {}, {}
+    for key, values in series.items():
+        period = max(values, key=period_end)
+        latest[key] = values[period]
+        periods[key] = period
+    return latest, periods
+
+
+def newest_period(periods):
+    return max(periods.values(), key=period_end) if periods else None
+
+
+class StatementsClient:
+    """
+    Financial statement fetcher for navercomp.wisereport.co.kr.
+    Results are cached per code and only refetched when a new quarter could
+    have been filed (see common.periods.needs_refresh), so a daily batch over
+    thousands of codes downloads each company about four times a year.
+    """
+    def __init__(self, cache=None, recheck_days=3):
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+        self.cache = cache or JsonCache('statements')
+        self.recheck_days = recheck_days
+
+    @timed('statements.fetch')
+    def fetch(self, code):
+        """
+        Downloads and parses both pages. Returns the cache document.
+        """
+        series = {}
+        for url, targets in ((BALANCE_SHEET_URL, BALANCE_TARGETS), (INDICATORS_URL, INDICATOR_TARGETS)):
+            res = fetch.get(url.format(code=code), headers=self.headers)
+            series.update(parse_period_table(res.text, targets))
+
+        latest, periods = latest_values(series)
+        return {
+            'code': code,
+            'fetched': date.today().isoformat(),
+            'latest_period': newest_period(periods),
+            'series': series,
+            'latest': latest,
+            'periods': periods,
+        }
+
+    def get(self, code, today=None, force=False):
+        """
+        Returns {'total_equity', 'total_liabilities', 'retained_earnings',
+        'PCR', 'PSR', 'EV_EBITDA', 'period', 'periods'} with the newest filed
+        values: 'periods' maps each value to the period it was filed for,
+        'period' is the newest of them.
+        """
+        doc = None if force else self.cache.get(code)
+        if doc is None or needs_refresh(doc.get('latest_period'), doc['fetched'], today, self.recheck_days):
+            try:
+                fresh = self.fetch(code)
+            except Exception as e:
+                print(f"Error fetching statements for {code}: {e}")
+                fresh = None
+            if fresh and fresh['series']:
+                self.cache.put(code, fresh)
+                doc = fresh
+            elif doc is None:
+                return {}
+
+        data = dict(doc['latest'])
+        data['period'] = doc.get('latest_period')
+        # documents cached before per-value periods were kept
+        data['periods'] = doc.get('periods') or latest_values(doc.get('series', {}))[1]
+        return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='WiseReport financial statements')
+    parser.add_argument('codes', nargs='+', help='Stock codes (e.g. 005930)')
+    parser.add_argument('--force', action='store_true', help='Ignore the period cache')
+    args = parser.parse_args()
+
+    client = StatementsClient()
+    for code in args.codes:
+        print(json.dumps({code: client.get(code, force=args.force)}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+
+import sys
+import os
+import unittest
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from analysis import FundamentalAnalyzer, sort_rows
+
+SNAPSHOTS = {
+    '000001': {'code': '000001', 'name': '우량', 'debt_ratio': 50, 'reserve_ratio': 900, 'PER': 8, 'PBR': 0.8, 'industry_per': 12},
+    '000002': {'code': '000002', 'name': '보통', 'debt_ratio': 150, 'reserve_ratio': 300, 'PER': 15, 'PBR': 0.9, 'industry_per': 12},
+    '000003': {'code': '000003', 'name': '위험', 'debt_ratio': 400, 'reserve_ratio': 50, 'PER': 40, 'PBR': 3.0},
+}
+
+class StubAnalyzer(FundamentalAnalyzer):
+    def get_data(self, code, verbose=True, industry=None):
+        data = dict(SNAPSHOTS.get(code, {}))
+        if data and industry is not None:
+            data['industry_per'] = industry.per_of(code)
+        return data
+
+class TestBatchScreening(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = StubAnalyzer()
+
+    def test_evaluate_signals(self):
+        signals = self.analyzer.evaluate(SNAPSHOTS['000001'])
+        self.assertEqual(signals['score'], 3)
+        self.assertEqual(signals['relative'][0], 'GREEN')
+
+        signals = self.analyzer.evaluate(SNAPSHOTS['000002'])
+        self.assertEqual(signals['stability'][0], 'YELLOW')
+        self.assertEqual(signals['valuation'][0], 'YELLOW')
+        self.assertEqual(signals['relative'][0], 'RED')
+
+    def test_screen_keeps_order_and_flags_failures(self):
+        rows = self.analyzer.screen(['000003', '999999', '000001'], workers=4)
+        self.assertEqual([r['code'] for r in rows], ['000003', '999999', '000001'])
+        self.assertEqual(rows[1]['error'], 'fetch failed')
+        self.assertEqual(rows[0]['relative'], 'GRAY')
+        self.assertEqual(rows[2]['greens'], 4)
+
+    def test_sort_rows(self):
+        rows = self.analyzer.screen(list(SNAPSHOTS), workers=2)
+        self.assertEqual([r['code'] for r in sort_rows(rows, 'score')], ['000001', '000002', '000003'])
+        self.assertEqual([r['code'] for r in sort_rows(rows, 'PER')], ['000001', '000002', '000003'])
+        self.assertEqual(sort_rows(rows, 'stability')[-1]['code'], '000003')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+
+import sys
+import os
+import tempfile
+import unittest
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from analysis import FundamentalAnalyzer, iter_resumed
+from common.checkpoint import Checkpoint
+
+SNAPSHOT = {'name': '우량', 'debt_ratio': 50, 'reserve_ratio': 900, 'PER': 8, 'PBR': 0.8, 'industry_per': 12}
+
+class CountingAnalyzer(FundamentalAnalyzer):
+    def __init__(self, fail=()):
+        super().__init__()
+        self.fetched = []
+        self.fail = set(fail)
+
+    def get_data(self, code, verbose=True, industry=None):
+        self.fetched.append(code)
+        if code in self.fail: return {}
+        return dict(SNAPSHOT, code=code)
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'scan.log')
+        self.meta = {'market': 'KOSPI', 'date': '2024-03-04'}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_resume_skips_finished_codes(self):
+        codes = [f"{i:06d}" for i in range(10)]
+
+        # First run dies after 4 rows; 000002 failed to fetch
+        analyzer = CountingAnalyzer(fail={'000002'})
+        cp = Checkpoint(self.path)
+        universe, done = cp.start(codes, self.meta)
+        self.assertEqual(done, {})
+        rows = iter_resumed(analyzer, universe, done, cp, workers=1)
+        for _ in range(4): next(rows)
+        rows.close()
+        cp.close()
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('{"key": "000004", "val')   # torn write at the crash
+
+        # Restart: a new listing order must not matter, the saved universe is used
+        analyzer = CountingAnalyzer()
+        cp = Checkpoint(self.path)
+        universe, done = cp.start(lambda: list(reversed(codes)), self.meta)
+        self.assertEqual(universe, codes)
+        self.assertEqual(sorted(done), ['000000', '000001', '000003'])
+        rows = list(iter_resumed(analyzer, universe, done, cp, workers=1))
+        cp.finish()
+        self.assertEqual([r['code'] for r in rows], codes)
+        self.assertEqual(analyzer.fetched, [c for c in codes if c not in done])
+
+        # A finished log starts over
+        universe, done = Checkpoint(self.path).start(['000009'], self.meta)
+        self.assertEqual((universe, done), (['000009'], {}))
+
+    def test_other_arguments_start_fresh(self):
+        cp = Checkpoint(self.path)
+        cp.start(['000001'], self.meta)
+        cp.record('000001', {'code': '000001'})
+        cp.close()
+        universe, done = Checkpoint(self.path).start(['000002'], dict(self.meta, market='KOSDAQ'))
+        self.assertEqual((universe, done), (['000002'], {}))
+
+if __name__ == '__main__':
+    unittest.main()
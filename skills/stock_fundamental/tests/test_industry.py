@@ -0,0 +1,62 @@
+
+import sys
+import os
+import unittest
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from industry import build_industry_stats, IndustryTable
+from common.universe import parse_market_sum, parse_group_list
+
+MARKET_SUM_HTML = """
+<table class="type_2">
+<tr><th>N</th><th>종목명</th></tr>
+<tr><td>1</td><td><a href="/item/main.naver?code=005930" class="tltle">삼성전자</a></td>
+<td>70,000</td><td>0</td><td>0.00%</td><td>100</td><td>4,000,000</td><td>5,969,782</td>
+<td>50.00</td><td>10,000,000</td><td>20.00</td><td>8.50</td><td></td></tr>
+<tr><td>2</td><td><a href="/item/main.naver?code=000660" class="tltle">SK하이닉스</a></td>
+<td>150,000</td><td>0</td><td>0.00%</td><td>5,000</td><td>1,000,000</td><td>728,002</td>
+<td>50.00</td><td>3,000,000</td><td>N/A</td><td>-5.00</td><td></td></tr>
+</table>
+<table><tr><td class="pgRR"><a href="/sise/sise_market_sum.naver?sosok=0&amp;page=45">맨뒤</a></td></tr></table>
+"""
+
+class TestIndustryTable(unittest.TestCase):
+    def test_parse_market_sum(self):
+        rows, last_page = parse_market_sum(MARKET_SUM_HTML)
+        self.assertEqual(last_page, 45)
+        self.assertEqual(rows[0]['code'], '005930')
+        self.assertEqual(rows[0]['market_cap'], 4000000.0)
+        self.assertEqual(rows[0]['PER'], 20.0)
+        self.assertEqual(rows[0]['volume'], 10000000.0)
+        self.assertEqual(rows[0]['diff_rate'], 0.0)
+        self.assertIsNone(rows[1]['PER'])
+        self.assertEqual(rows[1]['ROE'], -5.0)
+
+    def test_parse_group_list(self):
+        html = '<table class="type_1"><tr><td><a href="/sise/sise_group_detail.naver?type=upjong&no=278">반도체</a></td></tr></table>'
+        self.assertEqual(parse_group_list(html), [{'no': '278', 'name': '반도체'}])
+
+    def test_build_stats_weighted_per(self):
+        groups = [{'no': '1', 'name': '반도체', 'codes': ['A', 'B', 'C']}]
+        listing = [
+            {'code': 'A', 'market_cap': 300.0, 'PER': 10.0, 'ROE': 10.0},  # earnings 30
+            {'code': 'B', 'market_cap': 100.0, 'PER': 20.0, 'ROE': 5.0},   # earnings 5
+            {'code': 'C', 'market_cap': 50.0, 'PER': -3.0, 'ROE': -20.0},  # loss maker excluded from PER
+        ]
+        code_industry, industries = build_industry_stats(groups, listing)
+        self.assertEqual(code_industry['C'], '1')
+        stats = industries['1']
+        self.assertAlmostEqual(stats['per'], round(400 / 35, 2))
+        self.assertEqual(stats['per_median'], 15.0)
+        self.assertEqual(stats['roe_median'], 5.0)
+
+        table = IndustryTable(code_industry, industries)
+        self.assertEqual(table.per_of('B'), stats['per'])
+        self.assertIsNone(table.per_of('Z'))
+
+if __name__ == '__main__':
+    unittest.main()
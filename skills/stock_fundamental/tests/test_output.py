@@ -0,0 +1,91 @@
+
+import sys
+import os
+import io
+import csv
+import json
+import shutil
+import argparse
+import tempfile
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from analysis import write_rows, BATCH_FIELDS
+from common import output
+from common.output import RecordWriter, flatten
+
+RECORD = {'code': '000001', 'name': '우량', 'signal': True,
+          'fundamentals': {'PER': 8.0, 'PBR': 0.8}, 'risk_keywords': ['기대', '전망']}
+
+class TestOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_flatten(self):
+        flat = flatten(RECORD)
+        self.assertEqual(flat['fundamentals.PER'], 8.0)
+        self.assertEqual(json.loads(flat['risk_keywords']), ['기대', '전망'])
+        self.assertNotIn('fundamentals', flat)
+
+    def test_ndjson_streams_each_record(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            writer = RecordWriter('ndjson')
+        writer.write(RECORD)
+        # already on the stream before close()
+        self.assertEqual(json.loads(out.getvalue()), RECORD)
+        writer.write(dict(RECORD, code='000002'))
+        writer.close()
+        self.assertEqual([json.loads(l)['code'] for l in out.getvalue().splitlines()], ['000001', '000002'])
+
+    def test_csv_uses_fields_and_flattens(self):
+        path = os.path.join(self.tmp, 'out.csv')
+        with RecordWriter('csv', path, ['code', 'fundamentals.PER', 'missing']) as writer:
+            writer.write(RECORD)
+        with open(path, encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(rows, [{'code': '000001', 'fundamentals.PER': '8.0', 'missing': ''}])
+
+    def test_json_and_bad_arguments(self):
+        path = os.path.join(self.tmp, 'out.json')
+        with RecordWriter('json', path) as writer:
+            writer.write(RECORD)
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(json.load(f), [RECORD])
+        self.assertRaises(ValueError, RecordWriter, 'xml')
+        self.assertRaises(ValueError, RecordWriter, 'parquet')
+
+    def test_parquet_is_checked_before_the_scan(self):
+        parser = argparse.ArgumentParser()
+        output.add_arguments(parser)
+        available = output.parquet_available
+        output.parquet_available = lambda: False
+        try:
+            with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as exit:
+                output.parse_args(parser, ['--format', 'parquet', '--output', 'x.parquet'])
+            self.assertNotEqual(exit.exception.code, 0)
+            self.assertRaises(RuntimeError, output.write_parquet, [RECORD], os.path.join(self.tmp, 'x.parquet'))
+        finally:
+            output.parquet_available = available
+        self.assertEqual(output.parse_args(parser, ['--format', 'csv']).format, 'csv')
+
+    def test_batch_rows_csv(self):
+        path = os.path.join(self.tmp, 'batch.csv')
+        write_rows([{'code': '000001', 'PER': 8, 'score': 3}, {'code': '999999', 'error': 'fetch failed'}], 'csv', path)
+        with open(path, encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+        self.assertEqual(reader.fieldnames, BATCH_FIELDS)
+        self.assertEqual(rows[0]['PER'], '8')
+        self.assertEqual(rows[1]['error'], 'fetch failed')
+
+if __name__ == '__main__':
+    unittest.main()
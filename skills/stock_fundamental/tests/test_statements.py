@@ -0,0 +1,65 @@
+
+import sys
+import os
+import io
+import unittest
+from contextlib import redirect_stdout
+from datetime import date
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from statements import parse_period_table, latest_values, newest_period, BALANCE_TARGETS
+from analysis import FundamentalAnalyzer
+from common.periods import latest_period, filing_deadline, needs_refresh
+
+BALANCE_HTML = """
+<table>
+  <tr><th>항목</th><th>2023/12</th><th>2024/12</th><th>2025/06</th><th>2025/12(E)</th></tr>
+  <tr><th>자본총계</th><td>1,000</td><td>1,100</td><td>1,200</td><td>1,300</td></tr>
+  <tr><th>부채총계</th><td>500</td><td>-</td><td>450</td><td>400</td></tr>
+  <tr><th>이익잉여금</th><td>800</td><td>900</td><td></td><td>1,000</td></tr>
+</table>
+"""
+
+class TestStatements(unittest.TestCase):
+    def test_parse_skips_estimates_and_blanks(self):
+        series = parse_period_table(BALANCE_HTML, BALANCE_TARGETS)
+        self.assertEqual(series['total_equity'], {'2023/12': 1000.0, '2024/12': 1100.0, '2025/06': 1200.0})
+        self.assertEqual(series['total_liabilities'], {'2023/12': 500.0, '2025/06': 450.0})
+
+        latest, periods = latest_values(series)
+        self.assertEqual(newest_period(periods), '2025/06')
+        # retained earnings were not filed for 2025/06: reported with their own period
+        self.assertEqual((latest['retained_earnings'], periods['retained_earnings']), (900.0, '2024/12'))
+        self.assertEqual((latest['total_equity'], periods['total_equity']), (1200.0, '2025/06'))
+        self.assertEqual((latest['total_liabilities'], periods['total_liabilities']), (450.0, '2025/06'))
+
+    def test_report_labels_retained_earnings_with_their_period(self):
+        data = {'code': '000001', 'name': '우량', 'retained_earnings': 900.0, 'total_equity': 1200.0,
+                'period': '2025/06', 'periods': {'retained_earnings': '2024/12', 'total_equity': '2025/06'}}
+        out = io.StringIO()
+        with redirect_stdout(out):
+            FundamentalAnalyzer().analyze(data)
+        self.assertIn("이익잉여금: 900억원 [2024/12 기준", out.getvalue())   # no ratio against a later quarter's equity
+
+    def test_latest_period_and_deadline(self):
+        self.assertEqual(latest_period(date(2025, 5, 1)), '2025/03')
+        self.assertEqual(latest_period(date(2025, 1, 10)), '2024/12')
+        self.assertEqual(filing_deadline('2025/03'), date(2025, 5, 15))
+        self.assertEqual(filing_deadline('2024/12'), date(2025, 3, 31))
+
+    def test_needs_refresh(self):
+        # Already holds the newest period -> no refetch until the next quarter ends
+        self.assertFalse(needs_refresh('2025/03', '2025-05-01', date(2025, 6, 29)))
+        self.assertTrue(needs_refresh('2025/03', '2025-05-01', date(2025, 7, 1)))
+        # Inside the filing window, not yet filed: recheck every few days
+        self.assertFalse(needs_refresh('2024/12', '2025-04-20', date(2025, 4, 21)))
+        self.assertTrue(needs_refresh('2024/12', '2025-04-20', date(2025, 4, 23)))
+        # Checked after the deadline: keep until the next quarter
+        self.assertFalse(needs_refresh('2024/12', '2025-05-20', date(2025, 6, 20)))
+
+if __name__ == '__main__':
+    unittest.main()
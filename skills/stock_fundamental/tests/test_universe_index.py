@@ -0,0 +1,110 @@
+
+import sys
+import os
+import tempfile
+import unittest
+from datetime import date
+
+import numpy as np
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from common import universe_index
+from common import universe
+from common.universe import parse_last_page
+from common.universe_index import UniverseIndex
+
+LISTING = [
+    {'code': '005930', 'name': '삼성전자', 'market': 'KOSPI'},
+    {'code': '000660', 'name': 'SK하이닉스', 'market': 'KOSPI'},
+    {'code': '005935', 'name': '삼성전자우', 'market': 'KOSPI'},
+    {'code': '247540', 'name': '에코프로비엠', 'market': 'KOSDAQ'},
+    {'code': '042700', 'name': '한미반도체', 'market': 'KOSDAQ'},
+]
+INDUSTRIES = [
+    {'no': '278', 'name': '반도체와반도체장비', 'codes': ['005930', '000660', '005935', '042700', '999999']},
+    {'no': '306', 'name': '화학', 'codes': ['247540']},
+]
+THEMES = [
+    {'no': '536', 'name': 'HBM', 'codes': ['000660', '042700', '005930']},
+    {'no': '64', 'name': '2차전지', 'codes': ['247540']},
+]
+
+class TestUniverseIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.crawl = universe_index.crawl_universe
+        self.crawls = 0
+
+    def tearDown(self):
+        universe_index.crawl_universe = self.crawl
+        self.tmp.cleanup()
+
+    def fake_crawl(self, result):
+        def crawl(workers=8):
+            self.crawls += 1
+            return result
+        universe_index.crawl_universe = crawl
+
+    def test_saved_index_is_memory_mapped(self):
+        UniverseIndex.build(LISTING, INDUSTRIES, THEMES, '2024-03-04').save(self.tmp.name)
+        index = UniverseIndex.open(self.tmp.name)
+        self.assertIsInstance(index.rows, np.memmap)
+        self.assertEqual(len(index), 5)
+        self.assertNotIn('999999', index)   # group member missing from the listing
+
+        self.assertEqual(index.get('042700'), {'code': '042700', 'name': '한미반도체', 'market': 'KOSDAQ',
+                                               'industry': '반도체와반도체장비', 'themes': ['HBM']})
+        self.assertEqual(index.get('005935')['themes'], [])
+        self.assertIsNone(index.get('123456'))
+
+        # listing order: KOSPI then KOSDAQ, each by market cap
+        self.assertEqual(index.codes(), ['005930', '000660', '005935', '247540', '042700'])
+        self.assertEqual(index.codes('KOSDAQ', industry='278'), ['042700'])
+        self.assertEqual(index.codes(theme='HBM'), ['005930', '000660', '042700'])
+        self.assertEqual(index.codes(theme='없는테마'), [])
+        self.assertEqual([(g['name'], g['codes']) for g in index.groups('themes', 'KOSPI')],
+                         [('HBM', ['005930', '000660']), ('2차전지', [])])
+        self.assertEqual(index.names(['247540', 'nope']), {'247540': '에코프로비엠'})
+
+    def test_daily_refresh_and_stale_fallback(self):
+        self.fake_crawl((LISTING, INDUSTRIES, THEMES))
+        first = UniverseIndex.load(root=self.tmp.name, today=date(2024, 3, 4))
+        again = UniverseIndex.load(root=self.tmp.name, today=date(2024, 3, 4))
+        self.assertEqual((self.crawls, again.as_of, len(again)), (1, '2024-03-04', len(first)))
+
+        # next day's crawl fails: yesterday's index is served, not an empty one
+        self.fake_crawl((LISTING[:1], INDUSTRIES, []))
+        stale = UniverseIndex.load(root=self.tmp.name, today=date(2024, 3, 5))
+        self.assertEqual((self.crawls, stale.as_of, len(stale)), (2, '2024-03-04', 5))
+
+        self.fake_crawl((LISTING[:2], INDUSTRIES, THEMES))
+        fresh = UniverseIndex.load(root=self.tmp.name, today=date(2024, 3, 5))
+        self.assertEqual((fresh.as_of, fresh.codes()), ('2024-03-05', ['005930', '000660']))
+        self.assertEqual(len([f for f in os.listdir(self.tmp.name) if f.endswith('.npy')]), 2)
+
+    def test_listed_codes_never_crawls_groups(self):
+        fetched = []
+        original = universe.fetch_market_codes
+        universe.fetch_market_codes = lambda market, workers=8: fetched.append(market) or ['005930']
+        self.fake_crawl((LISTING, INDUSTRIES, THEMES))
+        try:
+            self.assertEqual(universe.listed_codes('KOSDAQ', root=self.tmp.name), ['005930'])   # no index yet
+            UniverseIndex.build(LISTING, INDUSTRIES, THEMES, '2024-03-04').save(self.tmp.name)
+            self.assertEqual(universe.listed_codes('KOSDAQ', root=self.tmp.name, today=date(2024, 3, 4)),
+                             ['247540', '042700'])
+            universe.listed_codes('ALL', root=self.tmp.name, today=date(2024, 3, 5))   # yesterday's index
+        finally:
+            universe.fetch_market_codes = original
+        self.assertEqual((fetched, self.crawls), (['KOSDAQ', 'ALL'], 0))
+
+    def test_parse_last_page(self):
+        html = '<table><tr><td class="pgRR"><a href="/sise/sise_group.naver?type=theme&amp;page=7">맨뒤</a></td></tr></table>'
+        self.assertEqual(parse_last_page(html), 7)
+        self.assertEqual(parse_last_page('<table></table>'), 1)
+
+if __name__ == '__main__':
+    unittest.main()
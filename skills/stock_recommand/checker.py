@@ -1,9 +1,79 @@
 
-import requests
-from bs4 import BeautifulSoup
+import os
+import sys
+import argparse
 import datetime
 import random # For simulating excluded stock data if no history
 import re
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import fetch, tables
+from common.metrics import timed
+from common import output
+from common.deadline import Deadline, EXIT_PARTIAL, add_argument as add_deadline_argument
+
+@timed('parse.reports')
+def parse_reports(html):
+    """
+    Reports on one company_list page (table.type_1):
+    [{code, name, title, broker, date}].
+    Columns: 0: Stock Name, 1: Title, 2: Broker, 3: Author, 4: Date, 5: Views
+    """
+    reports = []
+    for _, cols in tables.rows(html, 'type_1'):
+        if len(cols) < 5: continue # Header or spacer
+        stock_tag = tables.link(cols[0])
+        title_tag = tables.link(cols[1])
+        if not stock_tag or stock_tag[0] is None or not title_tag: continue
+        reports.append({
+            'code': stock_tag[0].split('=')[-1],
+            'name': stock_tag[1],
+            'title': title_tag[1],
+            'broker': tables.text(cols[2]),
+            'date': tables.text(cols[4]), # YY.MM.DD
+        })
+    return reports
+
+def parse_reports_soup(html):
+    """
+    Reference BeautifulSoup version of parse_reports (parsecheck.py).
+    """
+    soup = fetch.parse_html(html)
+    reports = []
+    rows = soup.select('table.type_1 tr')
+    for row in rows:
+        cols = row.select('td')
+        if len(cols) < 5: continue # Header or spacer
+
+        # Columns: 0: Stock Name, 1: Title, 2: Broker, 3: Author, 4: Date, 5: Views
+        try:
+            stock_tag = cols[0].find('a')
+            if not stock_tag: continue
+            stock_name = stock_tag.text.strip()
+            code = stock_tag['href'].split('=')[-1]
+
+            title_tag = cols[1].find('a')
+            title = title_tag.text.strip()
+
+            broker = cols[2].text.strip()
+            date_str = cols[4].text.strip() # YY.MM.DD
+
+            # Get Target Price or Opinion?
+            # Often in title or scraped separately.
+            # Naver list doesn't show TP in table explicitly.
+            # We simulate "Buy" price as Close Price of that Date (approx).
+
+            reports.append({
+                'code': code,
+                'name': stock_name,
+                'title': title,
+                'broker': broker,
+                'date': date_str
+            })
+        except Exception as e:
+            continue
+    return reports
 
 class RecommendationChecker:
     def __init__(self):
@@ -16,90 +86,67 @@ class RecommendationChecker:
         ]
         # Map some common broker names if needed, or just use as is from scraping.
 
-    def fetch_reports(self, pages=3):
+    @timed('recommand.reports')
+    def fetch_reports(self, pages=3, deadline=None):
+        return list(self.iter_reports(pages, deadline))
+
+    def iter_reports(self, pages=3, deadline=None):
         """
-        Scrape brokerage reports from Naver Finance Research.
+        Scrape brokerage reports from Naver Finance Research, yielding each
+        report as its list page is parsed. With a common.deadline.Deadline,
+        pages not read in time go to deadline.unchecked.
         url: https://finance.naver.com/research/company_list.naver
         """
-        reports = []
         base_url = "https://finance.naver.com/research/company_list.naver"
         
         print(f"Fetching last {pages} pages of reports...")
         
-        for i in range(1, pages + 1):
+        page_numbers = range(1, pages + 1)
+        for i in (deadline.each(page_numbers) if deadline else page_numbers):
             url = f"{base_url}?&page={i}"
             try:
-                res = requests.get(url, headers=self.headers)
-                soup = BeautifulSoup(res.text, 'html.parser')
-                
-                rows = soup.select('table.type_1 tr')
-                for row in rows:
-                    cols = row.select('td')
-                    if len(cols) < 5: continue # Header or spacer
-                    
-                    # Columns: 0: Stock Name, 1: Title, 2: Broker, 3: Author, 4: Date, 5: Views
-                    try:
-                        stock_tag = cols[0].find('a')
-                        if not stock_tag: continue
-                        stock_name = stock_tag.text.strip()
-                        code = stock_tag['href'].split('=')[-1]
-                        
-                        title_tag = cols[1].find('a')
-                        title = title_tag.text.strip()
-                        
-                        broker = cols[2].text.strip()
-                        date_str = cols[4].text.strip() # YY.MM.DD
-                        
-                        # Get Target Price or Opinion?
-                        # Often in title or scraped separately. 
-                        # Naver list doesn't show TP in table explicitly.
-                        # We simulate "Buy" price as Close Price of that Date (approx).
-                        
-                        reports.append({
-                            'code': code,
-                            'name': stock_name,
-                            'title': title,
-                            'broker': broker,
-                            'date': date_str
-                        })
-                    except Exception as e:
-                        continue
-                        
+                res = fetch.get(url, headers=self.headers)
+                yield from parse_reports(res.text)
             except Exception as e:
+                if deadline and deadline.expired():
+                    deadline.skip([i])
+                    continue
                 print(f"Error fetching page {i}: {e}")
-                
-        return reports
 
     def analyze_risks(self, reports):
         """
         Check for vague keywords in titles.
         """
-        analyzed = []
-        for r in reports:
-            title = r['title']
-            risk_score = 0
-            found_risks = []
-            
-            for kw in self.risk_keywords:
-                if kw in title:
-                    risk_score += 1
-                    found_risks.append(kw)
-            
-            # Additional heuristic: "Target Price UP" is risky if no numbers?
-            # User requirement: "Expect Margin Improvement", "Expect Recovery" -> Red Flag.
-            
-            alert = "SAFE"
-            if risk_score >= 2:
-                alert = "WARNING"
-            elif risk_score == 1:
-                alert = "CAUTION"
-                
-            r['risk_alert'] = alert
-            r['risk_keywords'] = found_risks
-            analyzed.append(r)
+        return [self.assess_risk(r) for r in reports]
+
+    def assess_risk(self, r):
+        """
+        Adds 'risk_alert' (SAFE / CAUTION / WARNING) and 'risk_keywords'
+        to one report and returns it.
+        """
+        title = r['title']
+        risk_score = 0
+        found_risks = []
+        
+        for kw in self.risk_keywords:
+            if kw in title:
+                risk_score += 1
+                found_risks.append(kw)
+        
+        # Additional heuristic: "Target Price UP" is risky if no numbers?
+        # User requirement: "Expect Margin Improvement", "Expect Recovery" -> Red Flag.
+        
+        alert = "SAFE"
+        if risk_score >= 2:
+            alert = "WARNING"
+        elif risk_score == 1:
+            alert = "CAUTION"
             
-        return analyzed
+        r['risk_alert'] = alert
+        r['risk_keywords'] = found_risks
+        return r
 
+    @timed('recommand.prices')
     def get_current_prices(self, reports):
         """
         Fetch current prices for unique stocks in reports.
@@ -116,8 +163,7 @@ class RecommendationChecker:
         for code in codes:
             try:
                 url = f"https://finance.naver.com/item/main.naver?code={code}"
-                res = requests.get(url, headers=self.headers)
-                soup = BeautifulSoup(res.text, 'html.parser')
+                soup = fetch.get_soup(url, headers=self.headers)
                 
                 # Tag: div.no_today span.blind
                 tag = soup.select_one('div.no_today span.blind')
@@ -223,13 +269,35 @@ class RecommendationChecker:
             print(f"- {item['name']} (제외일: {item['exclude_date']})")
             print(f"  제외 후 수익률: {ret:.2f}% (손실 은폐 의심)")
             
+# Columns of the tabular formats (--format csv/parquet)
+FIELDS = ['code', 'name', 'title', 'broker', 'date', 'risk_alert', 'risk_keywords']
+
 def main():
-    print("=== 증권사 추천 팩트체커 (Recommand Skill) ===\n")
+    parser = argparse.ArgumentParser(description='Brokerage Report Fact Checker')
+    parser.add_argument('--pages', type=int, default=3, help='Report list pages to read')
+    add_deadline_argument(parser)
+    output.add_arguments(parser)
+    args = output.parse_args(parser)
     checker = RecommendationChecker()
+    deadline = Deadline(args.deadline)
+
+    if args.format != 'text':
+        # One record per report with its keyword risk; the simulated ranking stays in the text report
+        with output.open_writer(args, FIELDS) as writer, redirect_stdout(sys.stderr), deadline.active():
+            for r in checker.iter_reports(args.pages, deadline):
+                writer.write(checker.assess_risk(r))
+        deadline.warn()
+        if deadline.partial: sys.exit(EXIT_PARTIAL)
+        return
+
+    print("=== 증권사 추천 팩트체커 (Recommand Skill) ===\n")
     
     # 1. Fetch
-    reports = checker.fetch_reports(pages=3)
+    with deadline.active():
+        reports = checker.fetch_reports(args.pages, deadline)
     print(f"최근 리포트 {len(reports)}개 수집 완료.\n")
+    if deadline.partial:
+        deadline.warn(sys.stdout)
     
     # 2. Risk Analysis
     print("[위험 키워드 분석 결과]")
@@ -258,6 +326,7 @@ def main():
         
     # 4. Excluded Stocks
     checker.track_excluded()
+    if deadline.partial: sys.exit(EXIT_PARTIAL)
 
 if __name__ == "__main__":
     main()
@@ -1,123 +1,193 @@
 
+import os
 import sys
 import argparse
-import requests
-import pandas as pd
 import xml.etree.ElementTree as ET
 import datetime
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import fetch
+from common.metrics import timed
+from common.memo import SignalMemo, rule_version
+from common import output
+from common.deadline import Deadline, EXIT_PARTIAL, add_argument as add_deadline_argument
+
+# Composite score cut-offs used by analyze() (validated by walkforward.py)
+STRONG_BUY_SCORE = 4
+BUY_SCORE = 3
+WAIT_SCORE = 1.5
+
+
+@timed('technical.indicators')
+def compute_indicators(close, high, low, volume):
+    """
+    MACD, RSI, Stochastic Slow and OBV. Works on Series (one code) or on
+    dates x codes DataFrames (whole panel) since every op is column-wise.
+    Returns {column name: Series/DataFrame}.
+    """
+    import numpy as np
+    out = {}
+
+    # 1. MACD (12, 26, 9)
+    ema12 = close.ewm(span=12, adjust=False).mean()
+    ema26 = close.ewm(span=26, adjust=False).mean()
+    out['MACD_Line'] = ema12 - ema26
+    out['MACD_Signal'] = out['MACD_Line'].ewm(span=9, adjust=False).mean()
+    out['MACD_Hist'] = out['MACD_Line'] - out['MACD_Signal']
+
+    # 2. RSI (14)
+    # Standard RSI uses Wilder's Smoothing: ewm(alpha=1/14) approximation.
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).ewm(alpha=1/14, adjust=False).mean()
+    loss = (-delta.where(delta < 0, 0)).ewm(alpha=1/14, adjust=False).mean()
+    rs = gain / loss
+    out['RSI'] = 100 - (100 / (1 + rs))
+
+    # 3. Stochastic Slow (5, 3, 3)
+    # Fast %K = (Current Close - Lowest Low) / (Highest High - Lowest Low) * 100
+    low_min = low.rolling(window=5).min()
+    high_max = high.rolling(window=5).max()
+    out['Fast_K'] = ((close - low_min) / (high_max - low_min)) * 100
+    # Slow %K = SMA(Fast %K, 3), Slow %D = SMA(Slow %K, 3)
+    out['Slow_K'] = out['Fast_K'].rolling(window=3).mean()
+    out['Slow_D'] = out['Slow_K'].rolling(window=3).mean()
+
+    # 4. OBV
+    # +Volume if Close > Prev Close, -Volume if Close < Prev Close, else 0
+    direction = np.sign(close.diff()).fillna(0)
+    out['OBV'] = (direction * volume).cumsum()
+
+    return out
+
+
+@timed('technical.score')
+def composite_score(ind):
+    """
+    Vectorized version of the score built in TechnicalScreener.analyze.
+    ind: compute_indicators() output over a dates x codes panel.
+    Returns a float array; row t scores the signal as of date t.
+    """
+    import numpy as np
+    import pandas as pd
+    line, sig = np.asarray(ind['MACD_Line']), np.asarray(ind['MACD_Signal'])
+    k, d = np.asarray(ind['Slow_K']), np.asarray(ind['Slow_D'])
+    rsi, obv = np.asarray(ind['RSI']), np.asarray(ind['OBV'])
+    obv_ma = np.asarray(pd.DataFrame(obv).rolling(10, min_periods=1).mean())
+    obv_ma = obv_ma.reshape(obv.shape)
+
+    prev_k = np.full_like(k, np.nan)
+    prev_d = np.full_like(d, np.nan)
+    prev_k[1:], prev_d[1:] = k[:-1], d[:-1]
+
+    with np.errstate(invalid='ignore'):
+        # 1. MACD: rising trend above zero
+        score = np.where((line > sig) & (line > 0), 1.0, 0.0)
+
+        # 2. Stochastic: golden cross (+2 in the low zone, +1 otherwise) or holding above D
+        cross = (k > d) & (prev_k <= prev_d)
+        stoch = np.where(cross, np.where(k < 40, 2.0, 1.0),
+                         np.where((k > d) & ~(k > 80), 0.5, 0.0))
+        score += stoch
+
+        # 3. RSI: overbought -1, oversold +0.5, >50 +1
+        score += np.select([rsi >= 70, rsi <= 30, rsi > 50], [-1.0, 0.5, 1.0], 0.0)
+
+        # 4. OBV above its 10-day mean
+        score += np.where(obv > obv_ma, 1.0, 0.0)
+    return score
+
 
 class TechnicalScreener:
-    def __init__(self):
+    def __init__(self, memo=None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        self.memo = memo   # common.memo.SignalMemo for score(); None recomputes every time
 
-    def fetch_ohlcv(self, code, count=500):
+    def fetch_rows(self, code, count=500):
         """
-        Fetch OHLCV from Naver XML API.
+        Raw chart rows from the Naver XML API, oldest first.
         URL: https://fchart.stock.naver.com/sise.nhn?symbol={code}&timeframe=day&count={count}&requestType=0
         """
         url = f"https://fchart.stock.naver.com/sise.nhn?symbol={code}&timeframe=day&count={count}&requestType=0"
+        res = fetch.get(url, headers=self.headers)
+        root = ET.fromstring(res.text)
+        # Format: "20231025|58100|59100|57100|58100|17327734"
+        # Date|Open|High|Low|Close|Volume
+        return [item.attrib['data'] for item in root.findall('./chartdata/item')
+                if len(item.attrib['data'].split('|')) >= 6]
+
+    @staticmethod
+    def to_frame(rows):
+        import pandas as pd
+        data = []
+        for row in rows:
+            parts = row.split('|')
+            data.append({
+                'date': pd.to_datetime(parts[0], format='%Y%m%d'),
+                'open': float(parts[1]),
+                'high': float(parts[2]),
+                'low': float(parts[3]),
+                'close': float(parts[4]),
+                'volume': float(parts[5])
+            })
+        return pd.DataFrame(data)
+
+    @timed('technical.fetch')
+    def fetch_ohlcv(self, code, count=500):
+        """
+        Fetch OHLCV from Naver XML API as a DataFrame (empty on errors).
+        """
         try:
-            res = requests.get(url, headers=self.headers)
-            root = ET.fromstring(res.text)
-            
-            items = root.findall('./chartdata/item')
-            data = []
-            for item in items:
-                # Format: "20231025|58100|59100|57100|58100|17327734"
-                # Date|Open|High|Low|Close|Volume
-                parts = item.attrib['data'].split('|')
-                if len(parts) < 6: continue
-                
-                data.append({
-                    'date': pd.to_datetime(parts[0], format='%Y%m%d'),
-                    'open': float(parts[1]),
-                    'high': float(parts[2]),
-                    'low': float(parts[3]),
-                    'close': float(parts[4]),
-                    'volume': float(parts[5])
-                })
-                
-            df = pd.DataFrame(data)
-            return df
+            return self.to_frame(self.fetch_rows(code, count))
         except Exception as e:
             print(f"Error fetching data for {code}: {e}")
+            import pandas as pd
             return pd.DataFrame()
 
+    def score(self, code, count=500):
+        """
+        evaluate() of the code's latest `count` bars, or None without data.
+        With a memo the result is keyed on the first and last chart rows
+        (dates and values): while they are unchanged - after the close,
+        halted stocks - the stored result comes back without building a
+        frame or recomputing the indicators.
+        """
+        try:
+            rows = self.fetch_rows(code, count)
+            if not rows: return None
+            compute = lambda: self.evaluate(self.calculate_indicators(self.to_frame(rows)))
+            if self.memo is None: return compute()
+            return self.memo.cached(code, f"{count}|{rows[0]}|{rows[-1]}", compute)
+        except Exception as e:
+            print(f"Error fetching data for {code}: {e}")
+            return None
+
     def calculate_indicators(self, df):
         if df.empty: return df
-        
-        # 1. MACD (12, 26, 9)
-        # EMA(12)
-        ema12 = df['close'].ewm(span=12, adjust=False).mean()
-        # EMA(26)
-        ema26 = df['close'].ewm(span=26, adjust=False).mean()
-        # MACD Line
-        df['MACD_Line'] = ema12 - ema26
-        # Signal Line (9)
-        df['MACD_Signal'] = df['MACD_Line'].ewm(span=9, adjust=False).mean()
-        # Histogram
-        df['MACD_Hist'] = df['MACD_Line'] - df['MACD_Signal']
-
-        # 2. RSI (14)
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-        
-        # Note: Standard RSI uses Wilder's Smoothing, but SMA (rolling) is often used for simplicity.
-        # Let's improve RSI calculation to Wilder's if possible, but rolling is acceptable for demo.
-        # Better: use ewm(alpha=1/14) for Wilder approximation.
-        gain = (delta.where(delta > 0, 0)).ewm(alpha=1/14, adjust=False).mean()
-        loss = (-delta.where(delta < 0, 0)).ewm(alpha=1/14, adjust=False).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-
-        # 3. Stochastic Slow (5, 3, 3)
-        # Fast %K = (Current Close - Lowest Low) / (Highest High - Lowest Low) * 100
-        # Lowest Low over 5 days
-        low_min = df['low'].rolling(window=5).min()
-        high_max = df['high'].rolling(window=5).max()
-        
-        df['Fast_K'] = ((df['close'] - low_min) / (high_max - low_min)) * 100
-        # Slow %K = SMA(Fast %K, 3)
-        df['Slow_K'] = df['Fast_K'].rolling(window=3).mean()
-        # Slow %D = SMA(Slow %K, 3)
-        df['Slow_D'] = df['Slow_K'].rolling(window=3).mean()
-
-        # 4. OBV
-        # If Close > Prev Close: +Volume
-        # If Close < Prev Close: -Volume
-        # Else: 0
-        df['OBV'] = 0.0
-        # Iterative calculation is slow in Python, utilize vectorized operations
-        # Direction
-        direction = df['close'].diff().apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0))
-        # Cumulative Sum
-        df['OBV'] = (direction * df['volume']).cumsum()
-        
+
+        for name, values in compute_indicators(df['close'], df['high'], df['low'], df['volume']).items():
+            df[name] = values
         return df
 
-    def analyze(self, df):
-        if df.empty: return
+    def evaluate(self, df):
+        """
+        Scores the latest bar the same way the report does.
+        Returns {date, close, score, verdict, signals: {MACD, Stochastic, RSI, OBV}}
+        with plain Python values (JSON ready), or None without data.
+        """
+        if df.empty: return None
 
         latest = df.iloc[-1]
         prev = df.iloc[-2]
-        
-        print("\n=== 기술적 지표 크로스체크 보고서 ===")
-        print(f"기준일: {latest['date'].strftime('%Y-%m-%d')} | 종가: {int(latest['close'])}원")
-        print("-" * 40)
-        
         score = 0
-        
+        signals = {}
+
         # 1. MACD
         macd_val = latest['MACD_Line']
         sig_val = latest['MACD_Signal']
-        hist_val = latest['MACD_Hist']
-        
+
         macd_status = "중립"
         if macd_val > sig_val:
             if macd_val > 0:
@@ -127,16 +197,16 @@ class TechnicalScreener:
                 macd_status = "반등 시도 (약세 구간)"
         else:
             macd_status = "하락 추세"
-            
-        print(f"1. MACD (추세): {macd_val:.2f} / Sig {sig_val:.2f} -> [{macd_status}]")
-        
+        signals['MACD'] = {'line': float(macd_val), 'signal': float(sig_val),
+                           'hist': float(latest['MACD_Hist']), 'status': macd_status}
+
         # 2. Stochastic Slow
         # Conditions: Cross above 20? Gold Cross?
         k = latest['Slow_K']
         d = latest['Slow_D']
         prev_k = prev['Slow_K']
         prev_d = prev['Slow_D']
-        
+
         stoch_status = "관망"
         # Golden Cross Check (Recently crossed)
         if k > d and prev_k <= prev_d:
@@ -154,9 +224,8 @@ class TechnicalScreener:
                 score += 0.5
         elif k < d:
             stoch_status = "하락/조정 중"
-            
-        print(f"2. 스토캐스틱 (타점): K {k:.2f} / D {d:.2f} -> [{stoch_status}]")
-        
+        signals['Stochastic'] = {'k': float(k), 'd': float(d), 'status': stoch_status}
+
         # 3. RSI
         rsi = latest['RSI']
         rsi_status = "중립"
@@ -171,52 +240,132 @@ class TechnicalScreener:
             score += 1
         else:
             rsi_status = "매도세 우위 (<50)"
-            
-        print(f"3. RSI (강도): {rsi:.2f} -> [{rsi_status}]")
-        
+        signals['RSI'] = {'value': float(rsi), 'status': rsi_status}
+
         # 4. OBV Trend
         # Check if OBV is rising over last 5-10 days
         obv_trend = df['OBV'].iloc[-10:]
         # Simple Logic: Is current OBV > 10-day MA of OBV?
         obv_ma = obv_trend.mean()
         obv_curr = latest['OBV']
-        
+
         obv_status = "중립"
         if obv_curr > obv_ma:
             obv_status = "매집/상승 동반 (긍정)"
             score += 1
         else:
             obv_status = "거래량 이탈/약세"
-            
-        print(f"4. OBV (심리): {obv_status}")
+        signals['OBV'] = {'value': float(obv_curr), 'ma10': float(obv_ma), 'status': obv_status}
+
+        return {
+            'date': latest['date'].strftime('%Y-%m-%d'),
+            'close': int(latest['close']),
+            'score': score,
+            'verdict': verdict(score),
+            'signals': signals,
+        }
+
+    def analyze(self, df):
+        self.report(self.evaluate(df))
+
+    def report(self, result):
+        if result is None: return
+        sig = result['signals']
+
+        print("\n=== 기술적 지표 크로스체크 보고서 ===")
+        print(f"기준일: {result['date']} | 종가: {result['close']}원")
+        print("-" * 40)
+        print(f"1. MACD (추세): {sig['MACD']['line']:.2f} / Sig {sig['MACD']['signal']:.2f} -> [{sig['MACD']['status']}]")
+        print(f"2. 스토캐스틱 (타점): K {sig['Stochastic']['k']:.2f} / D {sig['Stochastic']['d']:.2f} -> [{sig['Stochastic']['status']}]")
+        print(f"3. RSI (강도): {sig['RSI']['value']:.2f} -> [{sig['RSI']['status']}]")
+        print(f"4. OBV (심리): {sig['OBV']['status']}")
         print("-" * 40)
-        
+
         # Final Verdict
-        print(f"✅ 종합 점수: {score}점")
-        if score >= 4:
-            print(">>> ⭐ 강력 매수 (Strong Buy) - 모든 신호가 긍정적입니다!")
-        elif score >= 3:
-            print(">>> 🟢 매수 (Buy) - 상승 추세가 확인되었습니다.")
-        elif score >= 1.5:
-            print(">>> 🟡 관망 (Wait) - 확실한 신호를 기다리세요.")
-        else:
-            print(">>> 🔴 매도/비중축소 (Sell) - 하락 리스크가 큽니다.")
+        print(f"✅ 종합 점수: {result['score']}점")
+        print(VERDICT_LINES[result['verdict']])
+
+
+def verdict(score):
+    if score >= STRONG_BUY_SCORE: return 'Strong Buy'
+    if score >= BUY_SCORE: return 'Buy'
+    if score >= WAIT_SCORE: return 'Wait'
+    return 'Sell'
+
+
+VERDICT_LINES = {
+    'Strong Buy': ">>> ⭐ 강력 매수 (Strong Buy) - 모든 신호가 긍정적입니다!",
+    'Buy': ">>> 🟢 매수 (Buy) - 상승 추세가 확인되었습니다.",
+    'Wait': ">>> 🟡 관망 (Wait) - 확실한 신호를 기다리세요.",
+    'Sell': ">>> 🔴 매도/비중축소 (Sell) - 하락 리스크가 큽니다.",
+}
+
+def technical_memo():
+    """
+    SignalMemo for TechnicalScreener.score(); a change to the indicator
+    code, the scoring or the cut-offs starts from scratch.
+    """
+    return SignalMemo('technical', rule_version(compute_indicators, TechnicalScreener.evaluate, verdict,
+                                                cutoffs=(STRONG_BUY_SCORE, BUY_SCORE, WAIT_SCORE)))
+
+def sweep(rows):
+    """
+    Full-market sweep entry point (sweep.py): the latest score of every
+    listing row that has chart data.
+    """
+    screener = TechnicalScreener(technical_memo())
+    for row in rows:
+        result = screener.score(row['code'])
+        if result:
+            yield dict(code=row['code'], name=row.get('name'), **result)
+
+# Columns of the tabular formats (--format csv/parquet)
+FIELDS = ['code', 'name', 'date', 'close', 'score', 'verdict',
+          'signals.MACD.line', 'signals.MACD.signal', 'signals.MACD.hist', 'signals.MACD.status',
+          'signals.Stochastic.k', 'signals.Stochastic.d', 'signals.Stochastic.status',
+          'signals.RSI.value', 'signals.RSI.status',
+          'signals.OBV.value', 'signals.OBV.ma10', 'signals.OBV.status']
 
 def main():
     parser = argparse.ArgumentParser(description='Stock Technical Screener')
-    parser.add_argument('--code', type=str, default='005930', help='Stock Code (default: Samsung Elec)')
-    args = parser.parse_args()
-    
-    screener = TechnicalScreener()
-    print(f"Fetching data for {args.code}...")
+    parser.add_argument('--code', type=str, default='005930', help='Stock Code, comma separated for several (default: Samsung Elec)')
+    parser.add_argument('--no-memo', action='store_true', help='Recompute even if the chart has not changed since the last run')
+    add_deadline_argument(parser)
+    output.add_arguments(parser)
+    args = output.parse_args(parser)
+    codes = [c.strip() for c in args.code.split(',') if c.strip()]
+    deadline = Deadline(args.deadline)
     
-    df = screener.fetch_ohlcv(args.code)
-    if df.empty:
-        print("데이터를 가져올 수 없습니다.")
+    screener = TechnicalScreener(None if args.no_memo else technical_memo())
+
+    if args.format != 'text':
+        with output.open_writer(args, FIELDS) as writer, redirect_stdout(sys.stderr), deadline.active():
+            for code in deadline.each(codes):
+                result = screener.score(code)
+                if result is None:
+                    if deadline.expired(): deadline.skip([code])
+                    else: print(f"[{code}] 데이터를 가져올 수 없습니다.")
+                    continue
+                writer.write(dict(code=code, **result))
+        deadline.warn()
+        if deadline.partial: sys.exit(EXIT_PARTIAL)
         return
-        
-    df = screener.calculate_indicators(df)
-    screener.analyze(df)
+
+    with deadline.active():
+        for code in deadline.each(codes):
+            print(f"Fetching data for {code}...")
+            
+            result = screener.score(code)
+            if result is None:
+                if deadline.expired(): deadline.skip([code])
+                else: print("데이터를 가져올 수 없습니다.")
+                continue
+                
+            screener.report(result)
+    if deadline.partial:
+        deadline.warn(sys.stdout)
+        print(f"미확인 종목: {', '.join(deadline.unchecked)}")
+        sys.exit(EXIT_PARTIAL)
 
 if __name__ == "__main__":
     main()
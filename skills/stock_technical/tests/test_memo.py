@@ -0,0 +1,67 @@
+
+import sys
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import screener
+from screener import TechnicalScreener
+from common.cache import JsonCache
+from common.memo import SignalMemo, rule_version
+
+def chart_rows(n, last_close):
+    # a gentle zig-zag so every indicator has a defined value
+    closes = [10000 + (i % 7) * 50 + i * 10 for i in range(n - 1)] + [last_close]
+    days = [date(2024, 1, 1) + timedelta(days=i) for i in range(n)]
+    return [f"{d:%Y%m%d}|{c}|{c + 50}|{c - 50}|{c}|{1000 + i}" for i, (d, c) in enumerate(zip(days, closes))]
+
+class StubScreener(TechnicalScreener):
+    def __init__(self, memo, rows):
+        super().__init__(memo)
+        self.rows = rows
+        self.computed = 0
+
+    def fetch_rows(self, code, count=500):
+        return self.rows
+
+    def calculate_indicators(self, df):
+        self.computed += 1
+        return super().calculate_indicators(df)
+
+class TestSignalMemo(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = JsonCache('memo-technical', root=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_score_is_reused_until_bars_or_rules_change(self):
+        rows = chart_rows(60, 11000)
+        version = screener.technical_memo().version
+        s = StubScreener(SignalMemo('technical', version, self.cache), rows)
+        first = s.score('005930', count=60)
+        self.assertEqual(s.score('005930', count=60), first)
+        self.assertEqual(s.computed, 1)
+        self.assertEqual(first, TechnicalScreener().evaluate(TechnicalScreener().calculate_indicators(
+            TechnicalScreener.to_frame(rows))))
+
+        s.rows = chart_rows(60, 9000)   # the last bar moved
+        self.assertNotEqual(s.score('005930', count=60)['close'], first['close'])
+        s.memo = SignalMemo('technical', 'other rules', self.cache)
+        s.score('005930', count=60)
+        self.assertEqual(s.computed, 3)
+
+    def test_rule_version_follows_source_and_params(self):
+        self.assertEqual(rule_version(chart_rows, k=1), rule_version(chart_rows, k=1))
+        self.assertNotEqual(rule_version(chart_rows, k=1), rule_version(chart_rows, k=2))
+        self.assertNotEqual(rule_version(chart_rows), rule_version(StubScreener))
+
+if __name__ == '__main__':
+    unittest.main()
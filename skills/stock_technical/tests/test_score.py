@@ -0,0 +1,66 @@
+
+import sys
+import os
+import io
+import re
+import unittest
+import contextlib
+
+import numpy as np
+import pandas as pd
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from screener import TechnicalScreener, compute_indicators, composite_score
+from walkforward import bucket_stats, score_bucket, SCORES
+
+def random_ohlcv(n, seed):
+    rng = np.random.default_rng(seed)
+    close = np.cumprod(1 + rng.normal(0, 0.03, n)) * 10000
+    return pd.DataFrame({
+        'date': pd.date_range('2020-01-01', periods=n, freq='B'),
+        'open': close,
+        'high': close * (1 + np.abs(rng.normal(0, 0.01, n))),
+        'low': close * (1 - np.abs(rng.normal(0, 0.01, n))),
+        'close': close,
+        'volume': rng.lognormal(10, 1, n),
+    })
+
+class TestCompositeScore(unittest.TestCase):
+    def test_vectorized_score_matches_report(self):
+        screener = TechnicalScreener()
+        df = screener.calculate_indicators(random_ohlcv(120, seed=3))
+        ind = compute_indicators(df['close'], df['high'], df['low'], df['volume'])
+        scores = composite_score(ind)
+
+        for t in range(30, len(df), 7):
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                screener.analyze(df.iloc[:t + 1])
+            printed = float(re.search(r"종합 점수: (-?[\d.]+)점", out.getvalue()).group(1))
+            self.assertAlmostEqual(scores[t], printed, msg=f"day {t}")
+
+    def test_panel_score_equals_per_code_score(self):
+        a, b = random_ohlcv(80, seed=1), random_ohlcv(80, seed=2)
+        panel = {f: pd.DataFrame({'A': a[f], 'B': b[f]}) for f in ('close', 'high', 'low', 'volume')}
+        panel_scores = composite_score(compute_indicators(panel['close'], panel['high'], panel['low'], panel['volume']))
+        single = composite_score(compute_indicators(b['close'], b['high'], b['low'], b['volume']))
+        np.testing.assert_array_equal(panel_scores[:, 1], single)
+
+    def test_bucket_stats(self):
+        score = np.array([[3.0], [3.0], [-1.0], [np.nan]])
+        close = np.array([[100.0], [110.0], [99.0], [120.0]])
+        years = np.array([0, 0, 1, 1])
+        count, total, _, hits = bucket_stats(score, close, years, 2, horizons=(1,))
+        b3 = score_bucket(np.array(3.0))
+        self.assertEqual(count[0, b3, 0], 2)
+        self.assertAlmostEqual(total[0, b3, 0], 0.10 - 0.10)
+        self.assertEqual(hits[0, b3, 0], 1)
+        self.assertEqual(count[1, 0, 0], 1)
+        self.assertEqual(len(SCORES), 13)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,226 @@
+
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from screener import compute_indicators, composite_score, verdict, BUY_SCORE
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.ohlcv_store import OHLCVStore
+from common.metrics import timed
+
+HORIZONS = (5, 20, 60)
+PANEL_FIELDS = ('close', 'high', 'low', 'volume')
+
+# Every reachable score: MACD {0,1} + Stoch {0,.5,1,2} + RSI {-1,0,.5,1} + OBV {0,1}
+MIN_SCORE, MAX_SCORE, STEP = -1.0, 5.0, 0.5
+SCORES = np.arange(MIN_SCORE, MAX_SCORE + STEP, STEP)
+
+
+def score_bucket(score):
+    return np.rint((score - MIN_SCORE) / STEP).astype(np.int64)
+
+
+def bucket_stats(score, close, years, n_years, horizons=HORIZONS):
+    """
+    Aggregates forward returns by (year, score bucket, horizon).
+    Returns count, sum, sum of squares and hit (return > 0) arrays shaped
+    (n_years, len(SCORES), len(horizons)) - small enough to merge cheaply.
+    """
+    shape = (n_years, len(SCORES), len(horizons))
+    count, total, total_sq, hits = (np.zeros(shape) for _ in range(4))
+    c = pd.DataFrame(close)
+    year_idx = np.broadcast_to(years[:, None], score.shape)
+
+    for j, h in enumerate(horizons):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ret = (c.shift(-h) / c - 1.0).to_numpy()
+        ok = np.isfinite(ret) & np.isfinite(score)
+        y, b, r = year_idx[ok], score_bucket(score[ok]), ret[ok]
+        np.add.at(count[:, :, j], (y, b), 1)
+        np.add.at(total[:, :, j], (y, b), r)
+        np.add.at(total_sq[:, :, j], (y, b), r * r)
+        np.add.at(hits[:, :, j], (y, b), r > 0)
+    return count, total, total_sq, hits
+
+
+# --- worker side: the price panel lives in shared memory ---------------------
+
+_SHARED = {}
+
+
+def _attach(specs):
+    """
+    Pool initializer: maps the parent's shared panel blocks read-only.
+    """
+    for field, (name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        arr.flags.writeable = False
+        _SHARED[field] = (shm, arr)
+
+
+def _score_slice(task):
+    lo, hi, years, n_years, horizons = task
+    cols = {f: pd.DataFrame(_SHARED[f][1][:, lo:hi]) for f in PANEL_FIELDS}
+    ind = compute_indicators(cols['close'], cols['high'], cols['low'], cols['volume'])
+    score = composite_score(ind)
+    # Bars before a code's first trade have no meaningful score
+    score[np.isnan(cols['close'].to_numpy())] = np.nan
+    return bucket_stats(score, cols['close'].to_numpy(), years, n_years, horizons)
+
+
+@timed('walkforward.score_panel')
+def score_panel(panel, workers=None, chunk_size=250, horizons=HORIZONS):
+    """
+    Scores every code on every date and returns per-(year, bucket, horizon)
+    aggregates plus the list of years. The panel is copied once into shared
+    memory; workers process column slices without pickling prices.
+    """
+    years_all = panel.dates // 10000
+    year_list = np.unique(years_all)
+    years = np.searchsorted(year_list, years_all)
+    n_codes = len(panel.codes)
+    tasks = [(lo, min(lo + chunk_size, n_codes), years, len(year_list), horizons)
+             for lo in range(0, n_codes, chunk_size)]
+
+    blocks, specs = [], {}
+    try:
+        for f in PANEL_FIELDS:
+            src = np.ascontiguousarray(panel[f], dtype=np.float64)
+            shm = shared_memory.SharedMemory(create=True, size=max(src.nbytes, 1))
+            np.ndarray(src.shape, dtype=src.dtype, buffer=shm.buf)[:] = src
+            blocks.append(shm)
+            specs[f] = (shm.name, src.shape, src.dtype.str)
+
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(specs,)) as pool:
+            parts = list(pool.map(_score_slice, tasks))
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    stats = [sum(p[i] for p in parts) for i in range(4)] if parts else [np.zeros((len(year_list), len(SCORES), len(horizons)))] * 4
+    return year_list, stats
+
+
+def threshold_stats(stats, year_mask, threshold):
+    """
+    Pools the given years and all buckets with score >= threshold.
+    Returns (trades, mean return, hit rate) per horizon.
+    """
+    count, total, _, hits = stats
+    sel = SCORES >= threshold - 1e-9
+    n = count[year_mask][:, sel].sum(axis=(0, 1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total[year_mask][:, sel].sum(axis=(0, 1)) / n
+        hit = hits[year_mask][:, sel].sum(axis=(0, 1)) / n
+    return n, mean, hit
+
+
+def walk_forward(year_list, stats, train_years=3, horizon_idx=1, min_trades=100):
+    """
+    Rolling folds: pick the cut-off with the best mean return over the
+    previous `train_years`, then measure it on the following year next to the
+    hand-tuned BUY_SCORE cut-off.
+    """
+    folds = []
+    for t in range(train_years, len(year_list)):
+        train = np.zeros(len(year_list), dtype=bool)
+        train[t - train_years:t] = True
+        test = np.zeros(len(year_list), dtype=bool)
+        test[t] = True
+
+        best, best_mean = None, -np.inf
+        for thr in SCORES:
+            n, mean, _ = threshold_stats(stats, train, thr)
+            if n[horizon_idx] >= min_trades and mean[horizon_idx] > best_mean:
+                best, best_mean = float(thr), mean[horizon_idx]
+        if best is None: continue
+
+        n_b, mean_b, hit_b = threshold_stats(stats, test, best)
+        n_f, mean_f, hit_f = threshold_stats(stats, test, BUY_SCORE)
+        n_a, mean_a, _ = threshold_stats(stats, test, MIN_SCORE)
+        folds.append({
+            'test_year': int(year_list[t]),
+            'chosen_threshold': best,
+            'chosen_trades': int(n_b[horizon_idx]),
+            'chosen_mean': float(mean_b[horizon_idx]),
+            'chosen_hit': float(hit_b[horizon_idx]),
+            'fixed_trades': int(n_f[horizon_idx]),
+            'fixed_mean': float(mean_f[horizon_idx]),
+            'fixed_hit': float(hit_f[horizon_idx]),
+            'all_mean': float(mean_a[horizon_idx]),
+        })
+    return folds
+
+
+def bucket_table(stats, horizons=HORIZONS):
+    count, total, total_sq, hits = (s.sum(axis=0) for s in stats)
+    rows = []
+    for b, score in enumerate(SCORES):
+        row = {'score': float(score)}
+        for j, h in enumerate(horizons):
+            n = count[b, j]
+            row[f'n_{h}'] = int(n)
+            row[f'mean_{h}'] = float(total[b, j] / n) if n else None
+            row[f'hit_{h}'] = float(hits[b, j] / n) if n else None
+        rows.append(row)
+    return rows
+
+
+def fmt_pct(v):
+    return f"{v * 100:+.2f}%" if v is not None and np.isfinite(v) else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Walk-forward evaluation of the technical composite score')
+    parser.add_argument('--codes', type=str, help='Comma separated codes (default: every code in the OHLCV store)')
+    parser.add_argument('--start', type=int, help='First date (yyyymmdd)')
+    parser.add_argument('--train-years', type=int, default=3)
+    parser.add_argument('--horizon', type=int, default=20, choices=HORIZONS, help='Forward return horizon used for fold selection')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    store = OHLCVStore()
+    codes = args.codes.split(',') if args.codes else [c for c in store.codes() if c.isdigit()]
+    panel = store.load_panel(codes, start=args.start, fields=PANEL_FIELDS)
+    if not len(panel.dates):
+        print("OHLCV 저장소가 비어 있습니다. common/ohlcv_store.py 로 먼저 수집하세요.")
+        return
+
+    year_list, stats = score_panel(panel, args.workers)
+    buckets = bucket_table(stats)
+    folds = walk_forward(year_list, stats, args.train_years, HORIZONS.index(args.horizon))
+
+    if args.json:
+        print(json.dumps({'buckets': buckets, 'folds': folds}, ensure_ascii=False, indent=2))
+        return
+
+    print(f"=== 기술적 복합 점수 검증 ({len(codes)}개 종목, {year_list[0]}~{year_list[-1]}) ===")
+    header = f"{'점수':>6} {'판정':<11}" + "".join(f"{'n' + str(h):>9}{'평균' + str(h):>10}{'적중' + str(h):>8}" for h in HORIZONS)
+    print(header)
+    for r in buckets:
+        line = f"{r['score']:>6.1f} {verdict(r['score']):<11}"
+        for h in HORIZONS:
+            hit = f"{r[f'hit_{h}'] * 100:.1f}%" if r[f'hit_{h}'] is not None else "-"
+            line += f"{r[f'n_{h}']:>9}{fmt_pct(r[f'mean_{h}']):>10}{hit:>8}"
+        print(line)
+
+    print(f"\n[Walk-forward: 학습 {args.train_years}년 -> 다음 1년, {args.horizon}일 수익률]")
+    print(f"{'연도':>6}{'선택 기준':>10}{'거래':>8}{'평균':>10}{'적중':>8} | {'기준 ' + str(BUY_SCORE):>8}{'거래':>8}{'평균':>10}{'적중':>8} | {'전체':>8}")
+    for f in folds:
+        print(f"{f['test_year']:>6}{f['chosen_threshold']:>10.1f}{f['chosen_trades']:>8}{fmt_pct(f['chosen_mean']):>10}{f['chosen_hit'] * 100:>7.1f}% | "
+              f"{'':>8}{f['fixed_trades']:>8}{fmt_pct(f['fixed_mean']):>10}{f['fixed_hit'] * 100:>7.1f}% | {fmt_pct(f['all_mean']):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+
+import os
+import sys
+import json
+import argparse
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from scanner import StockAnalyzer, VerdictCache, MIN_RISE_RATE
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.ohlcv_store import OHLCVStore
+from common.cop_analysis import TARGETS
+from common.pit_store import PointInTimeStore
+from common.metrics import timed
+
+HOLDING_PERIODS = (1, 5, 10, 20, 60)
+SAFE_ZONE_DAYS = 750       # get_history default (~3 years)
+MIN_HISTORY_DAYS = 20
+
+# Cumulative filter stages in scanner.main order; each stage ANDs the previous one
+STAGES = ('rising', 'volume', 'safe_zone', 'fundamentals', 'breakout')
+
+
+def rule_masks(close, high, volume, fundamentals=None, rise_rate=MIN_RISE_RATE):
+    """
+    Applies the uprise rules to whole dates x codes arrays at once.
+    fundamentals: optional bool mask, either one row per code (verdict cache)
+    or dates x codes (point-in-time store).
+    Returns {stage: bool array} where every stage includes the earlier ones.
+    """
+    a = StockAnalyzer
+    c, h, v = pd.DataFrame(close), pd.DataFrame(high), pd.DataFrame(volume)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        diff_rate = (c / c.shift(1) - 1.0).to_numpy() * 100
+        rising = diff_rate >= rise_rate
+
+        # Volume >= 200% of the previous 20 sessions' average
+        avg_vol = v.rolling(a.VOLUME_AVG_DAYS).mean().shift(1).to_numpy()
+        spike = (avg_vol > 0) & (volume / avg_vol * 100 >= a.VOLUME_SPIKE_RATIO)
+
+        # Close within the lower 30% of the trailing 3-year close range
+        lo = c.rolling(SAFE_ZONE_DAYS, min_periods=MIN_HISTORY_DAYS).min().to_numpy()
+        hi = c.rolling(SAFE_ZONE_DAYS, min_periods=MIN_HISTORY_DAYS).max().to_numpy()
+        safe = (hi > lo) & ((close - lo) / (hi - lo) <= a.SAFE_ZONE_POSITION)
+
+        # Close above the highest high of the previous 6 sessions
+        prior_high = h.rolling(a.BREAKOUT_DAYS).max().shift(1).to_numpy()
+        breakout = close > prior_high
+
+    masks = {'rising': rising}
+    masks['volume'] = masks['rising'] & spike
+    masks['safe_zone'] = masks['volume'] & safe
+    if fundamentals is None:
+        fundamentals = True
+    elif fundamentals.ndim == 1:
+        fundamentals = fundamentals[None, :]
+    masks['fundamentals'] = masks['safe_zone'] & fundamentals
+    masks['breakout'] = masks['fundamentals'] & breakout
+    return masks
+
+
+def forward_outcomes(close, low, horizons=HOLDING_PERIODS):
+    """
+    For every (date, code): return from today's close to the close `h`
+    sessions later, and the worst drawdown (lowest low) along the way.
+    """
+    c, l = pd.DataFrame(close), pd.DataFrame(low)
+    out = {}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for h in horizons:
+            ret = (c.shift(-h) / c - 1.0).to_numpy()
+            worst_low = l.rolling(h).min().shift(-h).to_numpy()
+            mdd = np.minimum(worst_low / close - 1.0, 0.0)
+            out[h] = (ret, mdd)
+    return out
+
+
+def pit_health(timeline, codes, dates):
+    """
+    check_financial_health evaluated as of every date: fails when nothing was
+    known yet or when operating income / PER / ROE / PBR was negative.
+    """
+    codes = np.asarray(codes)[None, :]
+    dates = np.asarray(dates)[:, None]
+    known = np.zeros((dates.shape[0], codes.shape[1]), dtype=bool)
+    bad = np.zeros_like(known)
+    for metric in TARGETS.values():
+        values, _ = timeline.as_of(codes, dates, metric)
+        known |= np.isfinite(values)
+        if metric in ('operating_income', 'PER', 'ROE', 'PBR'):
+            with np.errstate(invalid='ignore'):
+                bad |= values < 0
+    return known & ~bad
+
+
+def run_chunk(task):
+    """
+    Worker: loads one slice of codes from the store and returns the event
+    outcomes per stage and holding period. Each worker reads its own files,
+    so no price arrays are pickled between processes.
+    """
+    codes, store_root, start, end, fundamentals_src, horizons = task
+    panel = OHLCVStore(store_root).load_panel(codes, start=start, end=end, workers=4)
+    if not len(panel.dates): return {}
+
+    fundamentals = None
+    if isinstance(fundamentals_src, dict):
+        fundamentals = np.array([fundamentals_src.get(c, True) for c in panel.codes], dtype=bool)
+    elif isinstance(fundamentals_src, str):
+        # point-in-time store root; the compiled timeline is cached on disk
+        timeline = PointInTimeStore(fundamentals_src).compile()
+        fundamentals = pit_health(timeline, panel.codes, panel.dates)
+
+    masks = rule_masks(panel['close'], panel['high'], panel['volume'], fundamentals)
+    outcomes = forward_outcomes(panel['close'], panel['low'], horizons)
+
+    events = {}
+    for stage, mask in masks.items():
+        events[stage] = {'signals': int(mask.sum())}
+        for h, (ret, mdd) in outcomes.items():
+            sel = mask & np.isfinite(ret)
+            events[stage][h] = (ret[sel], mdd[sel])
+    return events
+
+
+def merge_events(parts, horizons=HOLDING_PERIODS):
+    merged = {}
+    for stage in STAGES:
+        merged[stage] = {'signals': sum(p[stage]['signals'] for p in parts if p)}
+        for h in horizons:
+            rets = [p[stage][h][0] for p in parts if p]
+            mdds = [p[stage][h][1] for p in parts if p]
+            merged[stage][h] = (np.concatenate(rets) if rets else np.empty(0),
+                                np.concatenate(mdds) if mdds else np.empty(0))
+    return merged
+
+
+def summarize(events, horizons=HOLDING_PERIODS):
+    rows = []
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for stage in STAGES:
+            for h in horizons:
+                ret, mdd = events[stage][h]
+                n = len(ret)
+                rows.append({
+                    'stage': stage,
+                    'holding': h,
+                    'signals': events[stage]['signals'],
+                    'trades': n,
+                    'hit_rate': float((ret > 0).mean()) if n else None,
+                    'mean_return': float(ret.mean()) if n else None,
+                    'median_return': float(np.median(ret)) if n else None,
+                    'mean_drawdown': float(mdd.mean()) if n else None,
+                    'worst_drawdown': float(mdd.min()) if n else None,
+                })
+    return rows
+
+
+@timed('backtest.run')
+def run_backtest(codes, store_root=None, start=None, end=None, fundamentals=None,
+                 workers=None, chunk_size=200, horizons=HOLDING_PERIODS):
+    """
+    Replays the uprise rules over every code and date in the store.
+    fundamentals: None (no deficit filter), {code: passed} from the verdict
+    cache, or a PointInTimeStore root for as-of-date financials.
+    Codes are split into chunks processed by a process pool; all rule and
+    outcome math inside a chunk is vectorized over dates x codes.
+    """
+    store_root = store_root or OHLCVStore().root
+    tasks = [(codes[i:i + chunk_size], store_root, start, end, fundamentals, horizons)
+             for i in range(0, len(codes), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) == 1:
+        parts = [run_chunk(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(run_chunk, tasks))
+    return summarize(merge_events(parts, horizons), horizons)
+
+
+def load_verdicts(codes):
+    """
+    Fundamental pass/fail per code from the scanner's verdict cache.
+    NOTE: these are today's verdicts applied to every past date (look-ahead);
+    codes without a verdict are treated as passing.
+    """
+    cache = VerdictCache()
+    verdicts = {}
+    for code in codes:
+        doc = cache.cache.get(code)
+        if doc is not None: verdicts[code] = bool(doc['passed'])
+    return verdicts
+
+
+def fmt_pct(v):
+    return f"{v * 100:+.2f}%" if v is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Uprise strategy backtest')
+    parser.add_argument('--codes', type=str, help='Comma separated codes (default: every code in the OHLCV store)')
+    parser.add_argument('--start', type=int, help='First signal date (yyyymmdd)')
+    parser.add_argument('--end', type=int, help='Last date (yyyymmdd)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--chunk-size', type=int, default=200, help='Codes per worker task')
+    parser.add_argument('--fundamentals', choices=['pit', 'verdicts', 'none'], default='pit',
+                        help='Deficit filter source: point-in-time store (default), latest verdicts (look-ahead) or none')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    store = OHLCVStore()
+    codes = args.codes.split(',') if args.codes else [c for c in store.codes() if c.isdigit()]
+    if not codes:
+        print("OHLCV 저장소가 비어 있습니다. common/ohlcv_store.py 로 먼저 수집하세요.")
+        return
+
+    fundamentals = None
+    if args.fundamentals == 'verdicts':
+        fundamentals = load_verdicts(codes)
+    elif args.fundamentals == 'pit':
+        pit = PointInTimeStore()
+        if not len(pit.compile().keys):
+            print("시점별 재무 저장소가 비어 있습니다 (--fundamentals verdicts|none 사용 가능).")
+        fundamentals = pit.root
+    rows = run_backtest(codes, store.root, args.start, args.end, fundamentals, args.workers, args.chunk_size)
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+
+    print(f"=== Uprise 전략 백테스트 ({len(codes)}개 종목) ===")
+    print(f"{'단계':<14}{'보유일':>6}{'신호':>8}{'거래':>8}{'적중률':>8}{'평균수익':>10}{'중앙값':>10}{'평균MDD':>10}{'최악MDD':>10}")
+    for r in rows:
+        hit = f"{r['hit_rate'] * 100:.1f}%" if r['hit_rate'] is not None else "-"
+        print(f"{r['stage']:<14}{r['holding']:>6}{r['signals']:>8}{r['trades']:>8}{hit:>8}"
+              f"{fmt_pct(r['mean_return']):>10}{fmt_pct(r['median_return']):>10}"
+              f"{fmt_pct(r['mean_drawdown']):>10}{fmt_pct(r['worst_drawdown']):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,36 @@
 
-import requests
+import os
+import sys
+import argparse
 import xml.etree.ElementTree as ET
-from bs4 import BeautifulSoup
 import time
 import datetime
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import fetch, tables
+from common.cache import JsonCache
+from common.metrics import timed
+from common.memo import SignalMemo, rule_version
+from common import schedule
+from common.periods import latest_period, needs_refresh
+from common.cop_analysis import TARGETS, parse_period_series
+from common import output
+from common.deadline import Deadline, EXIT_PARTIAL, add_argument as add_deadline_argument
+from common.pit_store import PointInTimeStore
+from common.pipeline import Source, Filter, Pipeline
+
+MIN_RISE_RATE = 3.0   # Basic Filter: rising list entries need at least this % rise
 
 class NaverFinanceClient:
-    def __init__(self):
+    def __init__(self, pit_store=None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        # Optional PointInTimeStore; every fundamentals fetch is recorded per period
+        self.pit_store = pit_store
 
+    @timed('uprise.rising_list')
     def get_rising_stocks(self, limit=30):
         """
         Fetches 'Rising Stocks' from Naver Finance.
@@ -18,58 +38,20 @@ class NaverFinanceClient:
         """
         url = "https://finance.naver.com/sise/sise_rise.naver"
         try:
-            res = requests.get(url, headers=self.headers)
-            soup = BeautifulSoup(res.text, 'html.parser')
-            
-            stocks = []
-            table = soup.select_one('table.type_2')
-            if not table: return []
-            
-            rows = table.find_all('tr')
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) < 10: continue
-                
-                try:
-                    name_tag = cols[1].find('a')
-                    if not name_tag: continue
-                    name = name_tag.text.strip()
-                    code = name_tag['href'].split('=')[-1]
-                    
-                    price_txt = cols[2].text.strip().replace(',', '')
-                    diff_rate_txt = cols[4].text.strip().replace('%', '').replace('+', '').replace('-', '')
-                    volume_txt = cols[6].text.strip().replace(',', '')
-                    
-                    if not price_txt or not diff_rate_txt or not volume_txt: continue
-                    
-                    current_price = int(price_txt)
-                    diff_rate = float(diff_rate_txt)
-                    volume = int(volume_txt)
-                    
-                    # Basic Filter: > 3% rise
-                    if diff_rate >= 3.0:
-                         stocks.append({
-                            'code': code,
-                            'name': name,
-                            'price': current_price,
-                            'diff_rate': diff_rate,
-                            'volume': volume
-                        })
-                except ValueError:
-                    continue
-                    
-            return stocks[:limit]
+            res = fetch.get(url, headers=self.headers)
+            return parse_rising(res.text)[:limit]
         except Exception as e:
             print(f"Error fetching rising stocks: {e}")
             return []
 
+    @timed('uprise.history')
     def get_history(self, code, period=750): # ~3 years
         """
         Fetches daily OHLCV from fchart.stock.naver.com (XML).
         """
         url = f"https://fchart.stock.naver.com/sise.nhn?symbol={code}&timeframe=day&count={period}&requestType=0"
         try:
-            res = requests.get(url, headers=self.headers)
+            res = fetch.get(url, headers=self.headers)
             root = ET.fromstring(res.text)
             
             history = []
@@ -89,6 +71,7 @@ class NaverFinanceClient:
             print(f"Error fetching history for {code}: {e}")
             return []
 
+    @timed('uprise.fundamentals')
     def get_fundamentals(self, code):
         """
         Fetches basic fundamentals from Naver Finance Main Page.
@@ -98,8 +81,7 @@ class NaverFinanceClient:
         """
         url = f"https://finance.naver.com/item/main.naver?code={code}"
         try:
-            res = requests.get(url, headers=self.headers)
-            soup = BeautifulSoup(res.text, 'html.parser')
+            soup = fetch.get_soup(url, headers=self.headers)
             
             data = {}
             
@@ -180,32 +162,159 @@ class NaverFinanceClient:
                         if recent_val is not None:
                             data[found_key] = recent_val
 
+            if self.pit_store is not None and analysis_div:
+                try:
+                    self.pit_store.record(code, parse_period_series(analysis_div))
+                except Exception as e:
+                    print(f"Error recording fundamentals for {code}: {e}")
+
             return data
             
         except Exception as e:
             print(f"Error fetching fundamentals for {code}: {e}")
             return {}
 
+@timed('parse.rising')
+def parse_rising(html):
+    """
+    Rows of the sise_rise table.type_2 that rose 3% or more:
+    [{code, name, price, diff_rate, volume}] in page order.
+    """
+    stocks = []
+    for _, cols in tables.rows(html, 'type_2', first=True):
+        if len(cols) < 10: continue
+        name_tag = tables.link(cols[1])
+        if not name_tag or name_tag[0] is None: continue
+        price_txt = tables.text(cols[2]).replace(',', '')
+        diff_rate_txt = tables.text(cols[4]).replace('%', '').replace('+', '').replace('-', '')
+        volume_txt = tables.text(cols[6]).replace(',', '')
+        if not price_txt or not diff_rate_txt or not volume_txt: continue
+        try:
+            stock = {'code': name_tag[0].split('=')[-1], 'name': name_tag[1], 'price': int(price_txt),
+                     'diff_rate': float(diff_rate_txt), 'volume': int(volume_txt)}
+        except ValueError:
+            continue
+        # Basic Filter: > 3% rise
+        if stock['diff_rate'] >= MIN_RISE_RATE:
+            stocks.append(stock)
+    return stocks
+
+def parse_rising_soup(html):
+    """
+    Reference BeautifulSoup version of parse_rising (parsecheck.py).
+    """
+    soup = fetch.parse_html(html)
+
+    stocks = []
+    table = soup.select_one('table.type_2')
+    if not table: return []
+
+    rows = table.find_all('tr')
+    for row in rows:
+        cols = row.find_all('td')
+        if len(cols) < 10: continue
+
+        try:
+            name_tag = cols[1].find('a')
+            if not name_tag: continue
+            name = name_tag.text.strip()
+            code = name_tag['href'].split('=')[-1]
+
+            price_txt = cols[2].text.strip().replace(',', '')
+            diff_rate_txt = cols[4].text.strip().replace('%', '').replace('+', '').replace('-', '')
+            volume_txt = cols[6].text.strip().replace(',', '')
+
+            if not price_txt or not diff_rate_txt or not volume_txt: continue
+
+            current_price = int(price_txt)
+            diff_rate = float(diff_rate_txt)
+            volume = int(volume_txt)
+
+            # Basic Filter: > 3% rise
+            if diff_rate >= MIN_RISE_RATE:
+                 stocks.append({
+                    'code': code,
+                    'name': name,
+                    'price': current_price,
+                    'diff_rate': diff_rate,
+                    'volume': volume
+                })
+        except ValueError:
+            continue
+    return stocks
+
+class VerdictCache:
+    """
+    Persistent financial-health verdicts keyed by code and reporting period.
+    Loss makers keep showing up in the rising list; once a code failed
+    check_financial_health it is rejected from here without any request
+    until a new filing could change the numbers (common.periods).
+    """
+    def __init__(self, cache=None, recheck_days=3):
+        self.cache = cache or JsonCache('verdicts')
+        self.recheck_days = recheck_days
+
+    def get(self, code, today=None):
+        """
+        Returns {'passed', 'fundamentals', 'period', 'checked'} or None when
+        unknown or stale.
+        """
+        doc = self.cache.get(code)
+        if doc is None: return None
+        if needs_refresh(None, doc['checked'], today, self.recheck_days): return None
+        return doc
+
+    def put(self, code, passed, fundamentals, today=None):
+        today = today or datetime.date.today()
+        doc = {
+            'code': code,
+            'passed': passed,
+            'fundamentals': fundamentals,
+            'period': latest_period(today),
+            'checked': today.isoformat(),
+        }
+        self.cache.put(code, doc)
+        return doc
+
 class StockAnalyzer:
+    # Rule parameters (shared with backtest.py)
+    VOLUME_AVG_DAYS = 20
+    VOLUME_SPIKE_RATIO = 200.0   # % of the 20-day average
+    SAFE_ZONE_POSITION = 0.30    # lower 30% of the 3-year range
+    BREAKOUT_DAYS = 6
+
     def __init__(self, client):
         self.client = client
 
+    @timed('uprise.filter.volume')
     def check_volume_spike(self, stock_info, history):
         """
         Checks if current volume is > 200% of 20-day average.
         """
-        if len(history) < 20: return False
+        if len(history) < self.VOLUME_AVG_DAYS: return False
         
         # Calculate 20-day avg volume (excluding today)
-        recent_20 = history[-21:-1]
+        recent_20 = history[-(self.VOLUME_AVG_DAYS + 1):-1]
         if not recent_20: return False
         
         avg_vol = sum([d['volume'] for d in recent_20]) / len(recent_20)
         if avg_vol == 0: return False
         
         ratio = (stock_info['volume'] / avg_vol) * 100
-        return ratio >= 200.0
+        return ratio >= self.VOLUME_SPIKE_RATIO
 
+    @timed('uprise.filter.intraday_volume')
+    def check_intraday_volume_spike(self, stock_info, history, ratio):
+        """
+        Same 200% rule, but against the average volume traded by this time
+        of day in earlier sessions (common.intraday) rather than whole
+        days, which makes a morning reading comparable. Falls back to the
+        daily check when there are no minute bars to compare with.
+        """
+        if ratio is None: return self.check_volume_spike(stock_info, history)
+        return ratio >= self.VOLUME_SPIKE_RATIO
+
+    @timed('uprise.filter.safe_zone')
     def check_safe_zone(self, stock_info, history):
         """
         Checks if current price is in lower 30% of 3-year range.
@@ -220,8 +329,9 @@ class StockAnalyzer:
         if max_price == min_price: return False
         
         position = (current - min_price) / (max_price - min_price)
-        return position <= 0.30
+        return position <= self.SAFE_ZONE_POSITION
 
+    @timed('uprise.filter.fundamentals')
     def check_financial_health(self, fundamentals):
         """
         Checks for deficits or bad fundamentals.
@@ -246,6 +356,7 @@ class StockAnalyzer:
         
         return True
 
+    @timed('uprise.filter.breakout')
     def check_pullback(self, history):
         """
         Checks for Pullback Signals.
@@ -264,7 +375,7 @@ class StockAnalyzer:
         # User said: "Break resistance of 6 days drop" -> roughly > 6-day High?
         
         # Let's implement Resistance Breakout first as it's easier without numpy/pandas
-        recent_6 = history[-7:-1] 
+        recent_6 = history[-(self.BREAKOUT_DAYS + 1):-1] 
         max_high_6 = max([d['high'] for d in recent_6])
         current_close = history[-1]['close']
         
@@ -272,13 +383,189 @@ class StockAnalyzer:
         
         return is_breakout
 
+def chart_verdicts(analyzer, stock, history):
+    """
+    The rules that only look at the daily chart: {volume, safe_zone, signal}.
+    """
+    return {
+        'volume': analyzer.check_volume_spike(stock, history),
+        'safe_zone': analyzer.check_safe_zone(stock, history),
+        'signal': analyzer.check_pullback(history),
+    }
+
+def bar_key(stock):
+    """
+    The stock's newest daily bar as the listing shows it: session date,
+    price and volume. While it is unchanged (after the close, halted
+    stocks) so is the chart the verdicts were computed from.
+    """
+    return f"{schedule.last_session()}|{stock.get('price')}|{stock.get('volume')}"
+
+def uprise_memo():
+    """
+    SignalMemo for the chart verdicts of scan_pipeline(); a change to the
+    StockAnalyzer rules or their parameters starts from scratch.
+    """
+    return SignalMemo('uprise', rule_version(StockAnalyzer, chart_verdicts))
+
+def scan_pipeline(client, analyzer, verdicts=None, batch=1, workers=1, stats=None, intraday=None, memo=None):
+    """
+    The uprise rules as a common.pipeline.Pipeline. Each filter declares
+    the data it needs; the pipeline orders them by observed cost and
+    rejection rate (a cached deficit verdict costs nothing, a chart fetch
+    and a main page fetch cost one request each).
+
+    With an IntradayBook the volume spike is judged on minute bars against
+    the same time of day in earlier sessions. With a SignalMemo the chart
+    verdicts of a bar seen before come back without fetching the chart.
+    """
+    def load_history(stock, data):
+        return None if data['memo'] else client.get_history(stock['code'])
+
+    def load_chart(stock, data):
+        if data['memo']: return data['memo']
+        # Fetch errors come back empty and are not remembered
+        if not data['history']: return None
+        chart = chart_verdicts(analyzer, stock, data['history'])
+        if memo: memo.put(stock['code'], bar_key(stock), chart)
+        return chart
+
+    def load_minutes(stock, data):
+        intraday.update(stock['code'])
+        return intraday.volume_ratio(stock['code'])
+
+    def load_fundamentals(stock, data):
+        verdict = data['verdict']
+        if verdict: return verdict['fundamentals']
+        fundamentals = client.get_fundamentals(stock['code'])
+        # Fetch errors come back empty and are not remembered
+        if verdicts and fundamentals:
+            verdicts.put(stock['code'], analyzer.check_financial_health(fundamentals), fundamentals)
+        return fundamentals
+
+    sources = [
+        Source('verdict', lambda stock, data: verdicts.get(stock['code']) if verdicts else None, cost=0.001),
+        Source('memo', lambda stock, data: memo.get(stock['code'], bar_key(stock)) if memo else None, cost=0.001),
+        Source('history', load_history, cost=0.3, needs=('memo',)),
+        Source('chart', load_chart, cost=0.001, needs=('history',)),
+        Source('fundamentals', load_fundamentals, cost=0.4, needs=('verdict',)),
+    ]
+    filters = [
+        # Known deficit companies are rejected before any request
+        Filter('known_deficit', lambda stock, d: not (d['verdict'] and not d['verdict']['passed']),
+               needs=('verdict',), pass_rate=0.9),
+        # If volume is 0 (pre-market) the spike check fails (strict mode)
+        Filter('volume', lambda stock, d: bool(d['chart']) and d['chart']['volume'],
+               needs=('chart',), pass_rate=0.2),
+        Filter('safe_zone', lambda stock, d: bool(d['chart']) and d['chart']['safe_zone'],
+               needs=('chart',), pass_rate=0.3),
+        Filter('fundamentals', lambda stock, d: analyzer.check_financial_health(d['fundamentals']),
+               needs=('fundamentals',), pass_rate=0.7),
+    ]
+    if intraday is not None:
+        sources.append(Source('minutes', load_minutes, cost=0.3))
+        filters[1] = Filter('intraday_volume', lambda stock, d: bool(d['chart']) and
+                            (d['chart']['volume'] if d['minutes'] is None else
+                             analyzer.check_intraday_volume_spike(stock, d['history'], d['minutes'])),
+                            needs=('minutes', 'chart'), pass_rate=0.2)
+    return Pipeline('uprise', sources, filters, batch=batch, workers=workers, stats=stats)
+
+
+def prioritize(stocks, key=None):
+    """
+    Highest diff_rate / volume first, so a deadline cuts the least
+    interesting candidates. key=None keeps the list order.
+    """
+    if not key: return list(stocks)
+    return sorted(stocks, key=lambda s: -(s.get(key) or 0))
+
+
+def iter_scan(client, analyzer, stocks, verdicts=None, pipeline=None, deadline=None):
+    """
+    Runs the filter pipeline over the rising list and yields each candidate
+    as soon as it passes (stock dict plus 'fundamentals' and 'signal').
+    With a common.deadline.Deadline, stocks not decided in time end up in
+    deadline.unchecked.
+    """
+    pipeline = pipeline or scan_pipeline(client, analyzer, verdicts)
+    for stock, data in pipeline.run(stocks, deadline):
+        # Pullback Signal (For Alert)
+        stock['fundamentals'] = data['fundamentals']
+        stock['signal'] = data['chart']['signal']
+        if data.get('minutes') is not None:
+            stock['volume_ratio'] = round(data['minutes'], 1)
+        yield stock
+
+def rising_rows(rows):
+    """
+    sise_market_sum listing rows that would be on the rising list: the same
+    MIN_RISE_RATE cut as parse_rising, and a price and volume to check
+    ('-' cells parse as None).
+    """
+    return [dict(r) for r in rows
+            if r.get('diff_rate') is not None and r['diff_rate'] >= MIN_RISE_RATE
+            and r.get('price') is not None and r.get('volume') is not None]
+
+def sweep(rows):
+    """
+    Full-market sweep entry point (sweep.py): the uprise rules over
+    sise_market_sum listing rows, which carry the same price / diff_rate /
+    volume fields as the rising list.
+    """
+    stocks = rising_rows(rows)
+    if not stocks: return
+    client = NaverFinanceClient(pit_store=PointInTimeStore())
+    analyzer = StockAnalyzer(client)
+    verdicts = VerdictCache()
+    pipeline = scan_pipeline(client, analyzer, verdicts, memo=uprise_memo())
+    yield from iter_scan(client, analyzer, stocks, verdicts, pipeline)
+
+# Columns of the tabular formats (--format csv/parquet)
+FIELDS = ['code', 'name', 'price', 'diff_rate', 'volume', 'volume_ratio', 'signal'] + [f"fundamentals.{k}" for k in TARGETS.values()]
+
 def main():
-    print("=== Uprise 스캐너: 진정한 급등주 & 눌림목 포착 ===")
-    client = NaverFinanceClient()
+    parser = argparse.ArgumentParser(description='Uprise Scanner')
+    parser.add_argument('--no-verdict-cache', action='store_true', help='Re-check fundamentals of every candidate')
+    parser.add_argument('--no-memo', action='store_true', help='Re-check the chart rules even for bars seen before')
+    parser.add_argument('--batch', type=int, default=1, help='Candidates evaluated together per filter stage (1: decide one by one)')
+    parser.add_argument('--workers', type=int, default=1, help='Concurrent fetches within a batch')
+    parser.add_argument('--intraday', action='store_true',
+                        help='Judge the volume spike on minute bars against the same time of day in earlier sessions')
+    add_deadline_argument(parser)
+    parser.add_argument('--priority', choices=['listing', 'diff_rate', 'volume'], default=None,
+                        help='Order candidates are checked in (default: diff_rate with --deadline, else listing)')
+    output.add_arguments(parser)
+    args = output.parse_args(parser)
+    deadline = Deadline(args.deadline)
+    priority = args.priority or ('diff_rate' if args.deadline else 'listing')
+    key = None if priority == 'listing' else priority
+
+    client = NaverFinanceClient(pit_store=PointInTimeStore())
     analyzer = StockAnalyzer(client)
+    verdicts = None if args.no_verdict_cache else VerdictCache()
+    intraday = None
+    if args.intraday:
+        from common.intraday import IntradayBook   # numpy
+        intraday = IntradayBook()
+    memo = None if args.no_memo else uprise_memo()
+    pipeline = scan_pipeline(client, analyzer, verdicts, args.batch, args.workers, intraday=intraday, memo=memo)
+
+    if args.format != 'text':
+        # Candidates are written as they pass; progress messages go to stderr
+        with output.open_writer(args, FIELDS) as writer, redirect_stdout(sys.stderr):
+            with deadline.active():
+                rising_stocks = prioritize(client.get_rising_stocks(limit=50), key)
+            for c in iter_scan(client, analyzer, rising_stocks, verdicts, pipeline, deadline):
+                writer.write(c)
+        deadline.warn()
+        if deadline.partial: sys.exit(EXIT_PARTIAL)
+        return
+
+    print("=== Uprise 스캐너: 진정한 급등주 & 눌림목 포착 ===")
     
     # 1. Get Candidates
-    rising_stocks = client.get_rising_stocks(limit=50)
+    with deadline.active():
+        rising_stocks = prioritize(client.get_rising_stocks(limit=50), key)
     print(f"상승 종목 {len(rising_stocks)}개 탐색 중...")
     
     # Show Top 5 Rising Stocks regardless of criteria
@@ -288,43 +575,20 @@ def main():
              print(f"- [{s['code']}] {s['name']} : {s['price']}원 ({s['diff_rate']}%) | 거래량: {s['volume']}")
         print("-" * 50)
     
-    final_candidates = []
-    
-    for stock in rising_stocks:
-        code = stock['code']
-        # print(f"Analyzing {stock['name']}...")
-        
-        # 2. History Check (Volume & Safe Zone & Pullback)
-        history = client.get_history(code)
-        if not history: continue
-        
-        # Volume Spike
-        # If volume is 0 (pre-market), we might skip this check or fail it.
-        # Strict mode: fail.
-        if not analyzer.check_volume_spike(stock, history): continue
-        
-        # Safe Zone (Psychological Low)
-        if not analyzer.check_safe_zone(stock, history): continue
-        
-        # 3. Financial Health (Deficit Check)
-        fundamentals = client.get_fundamentals(code)
-        if not analyzer.check_financial_health(fundamentals): 
-            # print(f"  -> Skipped {stock['name']} due to financials.")
-            continue
-            
-        # 4. Pullback Signal (For Alert)
-        is_pullback_signal = analyzer.check_pullback(history)
-        
-        stock['fundamentals'] = fundamentals
-        stock['signal'] = is_pullback_signal
-        
-        final_candidates.append(stock)
+    print(f"필터 순서: {' -> '.join(f.name for f in pipeline.order())}")
+    final_candidates = list(iter_scan(client, analyzer, rising_stocks, verdicts, pipeline, deadline))
         
     print(f"\n스캔 완료. '진정한 급등주' {len(final_candidates)}개 발견.\n")
+    if deadline.partial:
+        deadline.warn(sys.stdout)
+        print(f"   미확인 종목: {', '.join(s['name'] for s in deadline.unchecked)}\n")
     
     for c in final_candidates:
         print(f"[{c['code']}] {c['name']} | 현재가: {c['price']} (+{c['diff_rate']}%)")
-        print(f"   거래량: {c['volume']} (거래량 폭증!)")
+        if 'volume_ratio' in c:
+            print(f"   거래량: {c['volume']} (같은 시각 평균의 {c['volume_ratio']:.0f}%, 거래량 폭증!)")
+        else:
+            print(f"   거래량: {c['volume']} (거래량 폭증!)")
         
         fund = c.get('fundamentals', {})
         print(f"   재무상태: 영업이익 {fund.get('operating_income','?')} | PER {fund.get('PER','?')} | PBR {fund.get('PBR','?')}")
@@ -334,6 +598,7 @@ def main():
         else:
             print("   (눌림목 관찰 중...)")
         print("-" * 40)
+    if deadline.partial: sys.exit(EXIT_PARTIAL)
 
 if __name__ == "__main__":
     main()
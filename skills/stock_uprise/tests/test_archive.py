@@ -0,0 +1,97 @@
+
+import sys
+import os
+import tempfile
+import unittest
+
+import requests
+from requests.adapters import BaseAdapter
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from scanner import NaverFinanceClient
+from common import fetch, archive
+from common.archive import Archive, ArchiveMiss
+
+RISE_URL = "https://finance.naver.com/sise/sise_rise.naver"
+ROW = ('<tr><td>1</td><td><a href="/item/main.naver?code={code}">{name}</a></td><td>{price}</td><td>0</td>'
+       '<td>+{rate}%</td><td>0</td><td>{volume}</td><td>0</td><td>0</td><td>0</td></tr>')
+
+def rise_page(rows):
+    body = ''.join(ROW.format(**r) for r in rows)
+    return f'<html><body><table class="type_2">{body}</table></body></html>'.encode('euc-kr')
+
+class PageAdapter(BaseAdapter):
+    """
+    Serves one fixed EUC-KR page for every URL, like finance.naver.com.
+    """
+    def __init__(self, body):
+        super().__init__()
+        self.body = body
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        res = requests.Response()
+        res.status_code = 200
+        res._content = self.body
+        res.encoding = 'euc-kr'
+        res.headers['Content-Type'] = 'text/html;charset=EUC-KR'
+        res.url = request.url
+        res.request = request
+        return res
+
+    def close(self):
+        pass
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.archive = Archive(self.tmp.name, segment_bytes=100)
+        self.adapter = PageAdapter(rise_page([
+            {'code': '005930', 'name': '삼성전자', 'price': '70,000', 'rate': '5.00', 'volume': '1,000'},
+            {'code': '000660', 'name': 'SK하이닉스', 'price': '150,000', 'rate': '1.00', 'volume': '500'},
+        ]))
+        s = requests.Session()
+        s.mount('https://', self.adapter)
+        self.session = fetch.session
+        fetch.session = lambda: s
+
+    def tearDown(self):
+        fetch.session = self.session
+        archive.use(None)
+        self.archive.close()
+        self.tmp.cleanup()
+
+    def test_record_then_reparse_offline(self):
+        archive.use('record', self.archive)
+        live = NaverFinanceClient().get_rising_stocks()
+        fetch.get("https://finance.naver.com/item/main.naver?code=005930")
+        self.assertEqual(self.adapter.calls, 2)
+        self.assertEqual(len(self.archive.segments()), 2)   # rotated past segment_bytes
+
+        # Same parser over the archived page: no request at all
+        archive.use('replay', Archive(self.tmp.name))
+        self.assertEqual(NaverFinanceClient().get_rising_stocks(), live)
+        self.assertEqual(live[0]['name'], '삼성전자')
+        self.assertEqual(self.adapter.calls, 2)
+        self.assertRaises(ArchiveMiss, fetch.get, "https://finance.naver.com/never/fetched")
+
+    def test_scan_and_torn_index(self):
+        for i in range(5):
+            self.archive.put(f"{RISE_URL}?page={i}", f"{RISE_URL}?page={i}", f"<p>{i}</p>".encode(), fetched=1000 + i)
+        self.archive.close()
+        name = self.archive.segments()[-1]
+        with open(os.path.join(self.tmp.name, name + '.idx'), 'a', encoding='utf-8') as f:
+            f.write('{"url": "torn')   # crash before the index line was complete
+
+        pages = list(Archive(self.tmp.name).scan(since=1001, workers=2))
+        self.assertEqual([text for _, text in pages], ['<p>1</p>', '<p>2</p>', '<p>3</p>', '<p>4</p>'])
+        self.assertEqual(len(list(self.archive.entries(match='*page=3'))), 1)
+        self.assertEqual(self.archive.stats()['pages'], 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+
+import sys
+import os
+import unittest
+
+import numpy as np
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from scanner import StockAnalyzer
+from backtest import rule_masks, forward_outcomes
+
+class TestBacktestRules(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        n = 400
+        self.close = np.round(np.cumprod(1 + rng.normal(0, 0.04, n)) * 10000)
+        self.high = self.close * (1 + np.abs(rng.normal(0, 0.01, n)))
+        self.volume = rng.lognormal(10, 1.2, n)
+        self.analyzer = StockAnalyzer(None)
+
+    def test_vectorized_rules_match_live_checks(self):
+        masks = rule_masks(self.close[:, None], self.high[:, None], self.volume[:, None])
+        history = [{'close': c, 'high': h, 'volume': v} for c, h, v in zip(self.close, self.high, self.volume)]
+
+        checked = 0
+        for t in range(21, len(history)):
+            window = history[max(0, t + 1 - 750):t + 1]
+            info = {'price': self.close[t], 'volume': self.volume[t]}
+            rising = (self.close[t] / self.close[t - 1] - 1) * 100 >= 3.0
+            expected = (rising and self.analyzer.check_volume_spike(info, window)
+                        and self.analyzer.check_safe_zone(info, window))
+            self.assertEqual(bool(masks['safe_zone'][t, 0]), expected, f"day {t}")
+            self.assertEqual(bool(masks['breakout'][t, 0]), expected and self.analyzer.check_pullback(window))
+            checked += expected
+        self.assertGreater(checked, 0)
+
+    def test_fundamentals_mask_excludes_codes(self):
+        close = np.repeat(self.close[:, None], 2, axis=1)
+        high = np.repeat(self.high[:, None], 2, axis=1)
+        volume = np.repeat(self.volume[:, None], 2, axis=1)
+        masks = rule_masks(close, high, volume, fundamentals=np.array([True, False]))
+        self.assertTrue(masks['safe_zone'][:, 1].any())
+        self.assertFalse(masks['fundamentals'][:, 1].any())
+
+    def test_forward_outcomes(self):
+        close = np.array([[100.0], [110.0], [90.0], [120.0]])
+        low = np.array([[95.0], [105.0], [80.0], [115.0]])
+        ret, mdd = forward_outcomes(close, low, horizons=(2,))[2]
+        self.assertAlmostEqual(ret[0, 0], -0.10)
+        self.assertAlmostEqual(mdd[0, 0], -0.20)
+        self.assertTrue(np.isnan(ret[3, 0]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+
+import sys
+import os
+import time
+import tempfile
+import unittest
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from scanner import prioritize
+from common import fetch
+from common.cache import JsonCache
+from common.deadline import Deadline, DeadlineExceeded
+from common.fetch import HostLimiter
+from common.pipeline import Source, Filter, Pipeline
+
+class TestDeadline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.stats = JsonCache('pipeline', root=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_pipeline_stops_and_reports_unchecked(self):
+        sources = [Source('slow', lambda item, d: time.sleep(0.1) or item)]
+        filters = [Filter('even', lambda item, d: d['slow'] % 2 == 0, needs=('slow',))]
+        deadline = Deadline(0.25)
+        passed = [x for x, _ in Pipeline('slow', sources, filters, stats=self.stats).run(range(10), deadline)]
+        self.assertTrue(deadline.partial)
+        self.assertEqual(passed, [0])
+        # 0 passed, 1 was rejected; 2 was still loading at the deadline
+        self.assertEqual(deadline.unchecked, list(range(2, 10)))
+
+        unbounded = Deadline()
+        self.assertEqual([x for x, _ in Pipeline('slow', sources, filters, stats=self.stats).run(range(4), unbounded)], [0, 2])
+        self.assertFalse(unbounded.partial)
+
+    def test_fetch_respects_deadline(self):
+        deadline = Deadline(10)
+        deadline.cancel()
+        with deadline.active():
+            self.assertRaises(DeadlineExceeded, fetch.get, 'https://deadline.invalid/x')
+        self.assertRaises(DeadlineExceeded, deadline.timeout, 5)
+        self.assertEqual(Deadline(100).timeout(5), 5)
+
+    def test_limiter_wait_is_bounded(self):
+        lim = HostLimiter(rate=1, max_concurrency=1)
+        self.assertTrue(lim.acquire(0.1))
+        start = time.monotonic()
+        self.assertFalse(lim.acquire(0.1))   # slot taken, no token either
+        self.assertLess(time.monotonic() - start, 0.5)
+        lim.release(None, 0.0)   # a cut attempt does not shrink the window
+        self.assertEqual(lim.limit, 1)
+
+    def test_each_and_priority(self):
+        deadline = Deadline(0.05)
+        seen = []
+        for x in deadline.each(range(100)):
+            seen.append(x)
+            time.sleep(0.01)
+        self.assertEqual(seen + deadline.unchecked, list(range(100)))
+        stocks = [{'code': 'a', 'diff_rate': 3.0, 'volume': 9}, {'code': 'b', 'diff_rate': 12.0, 'volume': 1}]
+        self.assertEqual([s['code'] for s in prioritize(stocks, 'diff_rate')], ['b', 'a'])
+        self.assertEqual([s['code'] for s in prioritize(stocks, 'volume')], ['a', 'b'])
+        self.assertEqual([s['code'] for s in prioritize(stocks)], ['a', 'b'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+
+import sys
+import os
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import BaseAdapter
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import scanner  # noqa: F401  (puts skills/ on sys.path)
+from common import fetch
+from common.fetch import HostLimiter, SingleFlight, normalize_url
+from common.deadline import Deadline, DeadlineExceeded
+
+class ScriptedAdapter(BaseAdapter):
+    """
+    Answers with the given status codes in order (last one repeats).
+    """
+    def __init__(self, statuses, delay=0.0):
+        super().__init__()
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        if self.delay: time.sleep(self.delay)
+        status = self.statuses[min(self.calls, len(self.statuses) - 1)]
+        self.calls += 1
+        res = requests.Response()
+        res.status_code = status
+        res._content = b'ok'
+        res.url = request.url
+        res.request = request
+        return res
+
+    def close(self):
+        pass
+
+class TestHostLimiter(unittest.TestCase):
+    def test_aimd_window(self):
+        lim = HostLimiter(rate=100, max_concurrency=8)
+        self.assertEqual(lim.limit, 4)
+        for _ in range(4):
+            lim.acquire()
+            lim.release(200, 0.1)
+        self.assertEqual(lim.limit, 5)
+
+        lim.acquire()
+        lim.release(503, 0.1)
+        self.assertEqual(lim.limit, 2.5)
+        self.assertEqual(lim.rate, 50)
+
+        lim.acquire()
+        lim.release(200, 1.0)   # latency spike
+        self.assertEqual(lim.limit, 2.5 * 0.75)
+
+    def test_concurrency_is_capped(self):
+        lim = HostLimiter(rate=1000, max_concurrency=4)
+        peak = [0]
+        def work(_):
+            lim.acquire()
+            peak[0] = max(peak[0], lim.in_flight)
+            time.sleep(0.01)
+            lim.release(200, 0.01)
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(work, range(40)))
+        self.assertLessEqual(peak[0], lim.max_concurrency)
+
+    def test_token_rate(self):
+        lim = HostLimiter(rate=50, max_concurrency=4)
+        start = time.monotonic()
+        for _ in range(60):   # 50 burst tokens, then 10 more at 50/s
+            lim.acquire()
+            lim.release(200, 0.0)
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_shared_limits(self):
+        fetch.share_limits(4)   # four sweep workers on one host
+        try:
+            lim = fetch.limiter_for('finance.naver.com')
+            self.assertEqual((lim.base_rate, lim.max_concurrency), (2.5, 2))
+            self.assertEqual(fetch.limiter_for('share.test').max_concurrency, 1)
+            # up to max_sharing() processes, the strictest host stays within its cap
+            self.assertEqual(fetch.max_sharing(), fetch.HOST_LIMITS['navercomp.wisereport.co.kr'][1])
+            self.assertLessEqual(fetch.limiter_for('navercomp.wisereport.co.kr').max_concurrency * fetch.max_sharing(),
+                                 fetch.HOST_LIMITS['navercomp.wisereport.co.kr'][1])
+        finally:
+            fetch.share_limits(1)
+        self.assertEqual(fetch.limiter_for('finance.naver.com').base_rate, 10.0)
+
+class TestGet(unittest.TestCase):
+    def setUp(self):
+        self.backoff = fetch.BACKOFF
+        fetch.BACKOFF = 0.01
+        self.adapter = ScriptedAdapter([503, 429, 200])
+        s = requests.Session()
+        s.mount('https://', self.adapter)
+        self.session = fetch.session
+        fetch.session = lambda: s
+
+    def tearDown(self):
+        fetch.BACKOFF = self.backoff
+        fetch.session = self.session
+        fetch._limiters.pop('retry.test', None)
+
+    def test_retries_throttled_responses(self):
+        res = fetch.get('https://retry.test/page')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.adapter.calls, 3)
+        self.assertLess(fetch.limiter_for('retry.test').rate, fetch.DEFAULT_LIMIT[0])
+
+    def test_gives_up_after_retries(self):
+        res = fetch.get('https://retry.test/page', retries=1)
+        self.assertEqual(res.status_code, 429)
+        self.assertEqual(self.adapter.calls, 2)
+
+    def test_other_errors_release_the_slot(self):
+        class Broken(BaseAdapter):
+            def send(self, request, **kwargs):
+                raise requests.exceptions.ChunkedEncodingError('truncated body')
+            def close(self):
+                pass
+        s = requests.Session()
+        s.mount('https://', Broken())
+        fetch.session = lambda: s
+        limiter = fetch.limiter_for('retry.test')
+        for _ in range(int(limiter.limit) + 1):
+            self.assertRaises(requests.exceptions.ChunkedEncodingError, fetch.get, 'https://retry.test/page')
+        self.assertEqual(limiter.in_flight, 0)
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.adapter = ScriptedAdapter([200], delay=0.2)
+        s = requests.Session()
+        s.mount('https://', self.adapter)
+        self.session = fetch.session
+        fetch.session = lambda: s
+
+    def tearDown(self):
+        fetch.session = self.session
+        fetch._limiters.pop('flight.test', None)
+
+    def test_normalize_url(self):
+        self.assertEqual(normalize_url('HTTPS://Flight.Test/list.naver?&page=1&b=2#top'),
+                         'https://flight.test/list.naver?b=2&page=1')
+
+    def test_concurrent_callers_share_request_and_parse(self):
+        parsed = []
+        def parse(text):
+            parsed.append(text)
+            return {'text': text}
+        urls = ['https://flight.test/main.naver?code=1'] * 4 + ['https://flight.test/main.naver?&code=1'] * 4
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda u: fetch.get_parsed(u, parse), urls))
+        self.assertEqual(self.adapter.calls, 1)
+        self.assertEqual(len(parsed), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+
+        # finished flights are not cached
+        fetch.get('https://flight.test/main.naver?code=1')
+        self.assertEqual(self.adapter.calls, 2)
+
+    def test_errors_reach_every_waiter(self):
+        flight = SingleFlight()
+        def boom():
+            time.sleep(0.1)
+            raise ValueError('down')
+        def call(_):
+            try:
+                flight.do('k', boom)
+            except ValueError as e:
+                return str(e)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            self.assertEqual(list(pool.map(call, range(4))), ['down'] * 4)
+
+    def test_followers_keep_their_own_deadline(self):
+        flight = SingleFlight()
+        runs = []
+        def fetch_page():
+            runs.append(1)
+            time.sleep(0.1)
+            if len(runs) == 1: raise DeadlineExceeded('leader out of time')
+            return 'page'
+        def call(seconds, delay=0.0):
+            time.sleep(delay)
+            with Deadline(seconds).active():
+                try:
+                    return flight.do('k', fetch_page)
+                except DeadlineExceeded:
+                    return 'timeout'
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            leader = pool.submit(call, 0.05)
+            patient = pool.submit(call, 5.0, 0.02)
+            hasty = pool.submit(call, 0.03, 0.02)
+            # the follower with time left runs the page again; the hasty one gives up waiting
+            self.assertEqual((leader.result(), patient.result(), hasty.result()), ('timeout', 'page', 'timeout'))
+        self.assertEqual(len(runs), 2)
+
+if __name__ == '__main__':
+    unittest.main()
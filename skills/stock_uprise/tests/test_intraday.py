@@ -0,0 +1,109 @@
+
+import sys
+import os
+import datetime
+import tempfile
+import unittest
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from scanner import StockAnalyzer, scan_pipeline, iter_scan
+from common import intraday, schedule
+from common.cache import JsonCache
+from common.intraday import MinuteRing, IntradayBook, volume_ratio, SESSION_MINUTES
+
+def session(day, volumes, start=900):
+    """
+    Minute rows of one day from 09:00, one per volume.
+    """
+    rows = []
+    for i, v in enumerate(volumes):
+        hhmm = (start // 100 + (start % 100 + i) // 60) * 100 + (start % 100 + i) % 60
+        rows.append((day * 10000 + hhmm, 100, 100, 100, 100, v))
+    return rows
+
+class StubClient:
+    def get_history(self, code):
+        # daily volume is flat: a 500 reading never looks like a spike against it
+        return [{'close': 2000, 'high': 2000, 'volume': 1000}] + [{'close': 1000, 'high': 1100, 'volume': 1000}] * 21
+
+    def get_fundamentals(self, code):
+        return {'operating_income': 10}
+
+class StubBook:
+    def __init__(self, ratios):
+        self.ratios = ratios
+        self.updated = []
+
+    def update(self, code):
+        self.updated.append(code)
+
+    def volume_ratio(self, code):
+        return self.ratios.get(code)
+
+class TestIntraday(unittest.TestCase):
+    def test_ring_is_bounded_and_ordered(self):
+        ring = MinuteRing(5)
+        ring.extend(session(20240304, [1, 2, 3, 4, 5, 6, 7]))
+        ring.append((202403040906, 100, 100, 100, 100, 9))   # forming minute revised
+        ring.append((202403040901, 100, 100, 100, 100, 0))   # old, ignored
+        cols = ring.columns()
+        self.assertEqual(len(ring), 5)
+        self.assertEqual(list(cols['stamp'] % 10000), [902, 903, 904, 905, 906])
+        self.assertEqual(list(cols['volume']), [3, 4, 5, 6, 9])
+
+    def test_ratio_compares_same_time_of_day(self):
+        # earlier days trade 10 a minute all day; today 30 a minute for 3 minutes
+        rows = session(20240301, [10] * 60) + session(20240304, [10] * 60) + session(20240305, [30] * 3)
+        ring = MinuteRing(200)
+        ring.extend(rows)
+        self.assertAlmostEqual(volume_ratio(ring.columns()), 300.0)
+        self.assertIsNone(volume_ratio(MinuteRing(10).columns()))
+
+        ring = MinuteRing(10)
+        ring.extend(session(20240305, [30] * 3))
+        self.assertIsNone(volume_ratio(ring.columns()))   # nothing to compare with
+
+    def test_book_fetches_only_new_minutes(self):
+        book = IntradayBook(baseline_days=1, max_codes=2)
+        self.assertEqual(book.capacity, SESSION_MINUTES * 2)
+        now = datetime.datetime(2024, 3, 5, 10, 0)
+        self.assertEqual(book.missing(None, now), book.capacity)
+        self.assertEqual(book.missing(202403050955, now), 7)
+        self.assertEqual(book.missing(202403041530, now), book.capacity)   # new day: reload
+
+        # the gap is measured on the KST clock of the bar stamps, not the host's
+        requested = []
+        fetch_minutes, clock = intraday.fetch_minutes, schedule.now
+        intraday.fetch_minutes = lambda code, count: requested.append(count) or []
+        schedule.now = lambda: now
+        try:
+            book.ring('k').extend(session(20240305, [10] * 40))   # up to 09:39
+            book.update('k')
+        finally:
+            intraday.fetch_minutes, schedule.now = fetch_minutes, clock
+        self.assertEqual(requested, [23])
+
+        for code in ('a', 'b', 'c'):
+            book.ring(code)
+        self.assertNotIn('a', book)   # least recently used dropped
+        self.assertIsNone(book.volume_ratio('a'))
+
+    def test_intraday_volume_filter(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            client = StubClient()
+            analyzer = StockAnalyzer(client)
+            book = StubBook({'000001': 320.0, '000002': 90.0})
+            pipeline = scan_pipeline(client, analyzer, stats=JsonCache('pipeline', root=tmp), intraday=book)
+            stocks = [{'code': c, 'price': 1200, 'volume': 500} for c in ('000001', '000002', '000003')]
+            found = list(iter_scan(client, analyzer, stocks, pipeline=pipeline))
+        # 000003 has no minute bars: the daily comparison applies and rejects it
+        self.assertEqual([c['code'] for c in found], ['000001'])
+        self.assertEqual(found[0]['volume_ratio'], 320.0)
+        self.assertIn('intraday_volume', [f.name for f in pipeline.order()])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,13 +2,16 @@
 import sys
 import os
 import unittest
+import tempfile
+import datetime
 
 # Add parent dir to path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
-from scanner import StockAnalyzer
+from scanner import StockAnalyzer, VerdictCache
+from common.cache import JsonCache
 
 class MockClient:
     pass
@@ -110,5 +113,28 @@ class TestStockUprise(unittest.TestCase):
         history[-1]['close'] = 104
         self.assertFalse(self.analyzer.check_pullback(history))
 
+class TestVerdictCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.verdicts = VerdictCache(JsonCache('verdicts', root=self.tmp.name))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_deficit_verdict_lasts_until_next_filing_window(self):
+        checked = datetime.date(2025, 6, 1)  # after the Q1 deadline (5/15)
+        self.verdicts.put('000001', False, {'operating_income': -10}, today=checked)
+
+        verdict = self.verdicts.get('000001', today=datetime.date(2025, 6, 29))
+        self.assertFalse(verdict['passed'])
+        self.assertEqual(verdict['period'], '2025/03')
+        self.assertEqual(verdict['fundamentals']['operating_income'], -10)
+
+        # Q2 ended -> the company may file again, verdict expires
+        self.assertIsNone(self.verdicts.get('000001', today=datetime.date(2025, 7, 2)))
+
+    def test_unknown_code(self):
+        self.assertIsNone(self.verdicts.get('999999'))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,74 @@
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from scanner import StockAnalyzer
+from common.cache import JsonCache
+from common.metrics import Metrics, METRICS
+
+class TestMetrics(unittest.TestCase):
+    def test_stages_requests_and_caches(self):
+        m = Metrics()
+        with m.stage('parse'):
+            pass
+        double = m.timed('calc')(lambda x: x * 2)
+        self.assertEqual(double(4), 8)
+        m.request('finance.naver.com', 200, 1000, 0.1)
+        m.request('finance.naver.com', 'error', 0, 0.5)
+        m.request('finance.naver.com', 200, 500, 0.1, retry=True)
+        m.cache('verdicts', True)
+        m.cache('verdicts', False)
+
+        snap = m.snapshot()
+        self.assertEqual(snap['stages']['parse']['calls'], 1)
+        self.assertEqual(snap['stages']['calc']['calls'], 1)
+        host = snap['requests']['finance.naver.com']
+        self.assertEqual((host['requests'], host['bytes'], host['retries'], host['errors']), (3, 1500, 1, 1))
+        self.assertEqual(host['status'], {'200': 2, 'error': 1})
+        self.assertEqual(snap['caches']['verdicts'], {'hits': 1, 'misses': 1})
+
+        prom = m.prometheus()
+        self.assertIn('naver_stocks_http_responses_total{host="finance.naver.com",status="200"} 2', prom)
+        self.assertIn('naver_stocks_cache_misses_total{cache="verdicts"} 1', prom)
+        self.assertIn('verdicts', m.summary())
+
+    def test_dump_formats(self):
+        m = Metrics()
+        m.add_stage('scan', 1.5)
+        root = tempfile.mkdtemp()
+        try:
+            m.dump(os.path.join(root, 'run.json'))
+            with open(os.path.join(root, 'run.json'), encoding='utf-8') as f:
+                self.assertEqual(json.load(f)['stages']['scan']['seconds'], 1.5)
+            m.dump(os.path.join(root, 'run.prom'))
+            with open(os.path.join(root, 'run.prom'), encoding='utf-8') as f:
+                self.assertIn('naver_stocks_stage_seconds_total{stage="scan"} 1.500000', f.read())
+        finally:
+            shutil.rmtree(root)
+
+    def test_wired_into_cache_and_filters(self):
+        root = tempfile.mkdtemp()
+        METRICS.reset()
+        try:
+            cache = JsonCache('probe', root=root)
+            cache.get('a')
+            cache.put('a', {'x': 1})
+            cache.get('a')
+            StockAnalyzer(None).check_financial_health({'PER': 5.0})
+        finally:
+            shutil.rmtree(root)
+        snap = METRICS.snapshot()
+        self.assertEqual(snap['caches']['probe'], {'hits': 1, 'misses': 1})
+        self.assertEqual(snap['stages']['uprise.filter.fundamentals']['calls'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+
+import sys
+import os
+import tempfile
+import unittest
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from scanner import StockAnalyzer, VerdictCache, scan_pipeline, iter_scan, rising_rows
+from common.memo import SignalMemo
+from common.cache import JsonCache
+from common.pipeline import Source, Filter, Pipeline
+
+# 21 quiet days in the lower part of a 1000-2000 range, then a breakout bar
+HISTORY = ([{'close': 2000, 'high': 2000, 'volume': 100}]
+           + [{'close': 1000, 'high': 1100, 'volume': 100}] * 20
+           + [{'close': 1200, 'high': 1200, 'volume': 500}])
+
+class StubClient:
+    def __init__(self, fundamentals):
+        self.fundamentals = fundamentals
+        self.calls = []
+
+    def get_history(self, code):
+        self.calls.append(('history', code))
+        return HISTORY
+
+    def get_fundamentals(self, code):
+        self.calls.append(('fundamentals', code))
+        return self.fundamentals.get(code, {})
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.stats = JsonCache('pipeline', root=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_order_follows_cost_and_rejection(self):
+        sources = [Source('page', lambda item, d: item, cost=1.0)]
+        filters = [
+            Filter('slow_strict', lambda item, d: item > 5, needs=('page',), pass_rate=0.1),
+            Filter('free_lenient', lambda item, d: item > 0, pass_rate=0.9),
+            Filter('free_strict', lambda item, d: item % 2 == 0, pass_rate=0.5),
+        ]
+        p = Pipeline('t', sources, filters, stats=self.stats)
+        self.assertEqual([f.name for f in p.order()], ['free_strict', 'free_lenient', 'slow_strict'])
+
+        # Observed: free_strict never rejects -> it moves behind free_lenient
+        self.assertEqual([x for x, _ in p.run([0, 2, 4, 6, 8, 10] * 10)], [6, 8, 10] * 10)
+        self.assertEqual([f.name for f in p.order()], ['free_lenient', 'free_strict', 'slow_strict'])
+
+        # Stats survive into the next run
+        again = Pipeline('t', sources, filters, stats=self.stats)
+        self.assertEqual([f.name for f in again.order()], [f.name for f in p.order()])
+
+    def test_batched_run_matches_streaming(self):
+        sources = [Source('double', lambda item, d: item * 2)]
+        filters = [Filter('big', lambda item, d: d['double'] > 6, needs=('double',))]
+        streamed = [x for x, _ in Pipeline('a', sources, filters, stats=self.stats).run(range(10))]
+        batched = [x for x, _ in Pipeline('b', sources, filters, batch=4, workers=3, stats=self.stats).run(range(10))]
+        self.assertEqual(streamed, batched)
+        self.assertEqual(streamed, [4, 5, 6, 7, 8, 9])
+
+    def test_uprise_scan(self):
+        client = StubClient({'000001': {'operating_income': 10, 'PER': 8},
+                             '000002': {'operating_income': -5, 'PER': -3}})
+        analyzer = StockAnalyzer(client)
+        verdicts = VerdictCache(JsonCache('verdicts', root=self.tmp.name))
+        stocks = [{'code': '000001', 'price': 1200, 'volume': 500},
+                  {'code': '000002', 'price': 1200, 'volume': 500},
+                  {'code': '000003', 'price': 1200, 'volume': 100}]   # no volume spike
+
+        pipeline = scan_pipeline(client, analyzer, verdicts, stats=self.stats)
+        found = list(iter_scan(client, analyzer, [dict(s) for s in stocks], verdicts, pipeline))
+        self.assertEqual([c['code'] for c in found], ['000001'])
+        self.assertTrue(found[0]['signal'])
+        # the spike failed before any fundamentals request for 000003
+        self.assertNotIn(('fundamentals', '000003'), client.calls)
+
+        # Second run: the deficit verdict rejects 000002 before any request
+        client.calls = []
+        pipeline = scan_pipeline(client, analyzer, verdicts, stats=self.stats)
+        found = list(iter_scan(client, analyzer, [dict(s) for s in stocks], verdicts, pipeline))
+        self.assertEqual([c['code'] for c in found], ['000001'])
+        self.assertFalse([c for c in client.calls if c[1] == '000002'])
+
+    def test_sweep_rows_get_the_rising_cut(self):
+        client = StubClient({code: {'operating_income': 10, 'PER': 8} for code in ('000001', '000002', '000003')})
+        analyzer = StockAnalyzer(client)
+        rows = [{'code': '000001', 'price': 1200.0, 'diff_rate': 4.2, 'volume': 500.0},
+                {'code': '000002', 'price': 1200.0, 'diff_rate': -1.5, 'volume': 500.0},   # spike and safe zone, but falling
+                {'code': '000003', 'price': None, 'diff_rate': None, 'volume': None}]     # '-' cells
+        stocks = rising_rows(rows)
+        self.assertEqual([s['code'] for s in stocks], ['000001'])
+        pipeline = scan_pipeline(client, analyzer, stats=self.stats)
+        self.assertEqual([c['code'] for c in iter_scan(client, analyzer, stocks, pipeline=pipeline)], ['000001'])
+
+    def test_memo_skips_unchanged_charts(self):
+        client = StubClient({'000001': {'operating_income': 10, 'PER': 8}})
+        analyzer = StockAnalyzer(client)
+        cache = JsonCache('memo-uprise', root=os.path.join(self.tmp.name, 'memo'))
+        stocks = [{'code': '000001', 'price': 1200, 'volume': 500},
+                  {'code': '000003', 'price': 1200, 'volume': 100}]
+
+        def scan(version, stocks):
+            client.calls = []
+            pipeline = scan_pipeline(client, analyzer, stats=self.stats, memo=SignalMemo('uprise', version, cache))
+            return [(c['code'], c['signal']) for c in iter_scan(client, analyzer, [dict(s) for s in stocks], pipeline=pipeline)]
+
+        self.assertEqual(scan('v1', stocks), [('000001', True)])
+        self.assertEqual(len([c for c in client.calls if c[0] == 'history']), 2)
+        # same bars: same result without a single chart request
+        self.assertEqual(scan('v1', stocks), [('000001', True)])
+        self.assertFalse([c for c in client.calls if c[0] == 'history'])
+        # a new bar (more volume) or changed rules recompute
+        scan('v1', [dict(stocks[1], volume=150)])
+        self.assertEqual(client.calls, [('history', '000003')])
+        scan('v2', stocks[:1])
+        self.assertIn(('history', '000001'), client.calls)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from bs4 import BeautifulSoup
+
+# Add parent dir to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from backtest import pit_health
+from common.cop_analysis import parse_period_series
+from common.pit_store import PointInTimeStore
+
+COP_HTML = """
+<div class="section cop_analysis"><table>
+<thead>
+<tr><th>주요재무정보</th><th>최근 연간 실적</th><th>최근 분기 실적</th></tr>
+<tr><th>2023.12</th><th>2024.12</th><th>2025.12<br/>(E)</th><th>2025.03</th><th>2025.06</th></tr>
+</thead>
+<tbody>
+<tr><th>영업이익</th><td>1,200</td><td>-300</td><td>900</td><td>50</td><td>80</td></tr>
+<tr><th>PER(배)</th><td>12.5</td><td>-</td><td>10.0</td><td>11.0</td><td>9.5</td></tr>
+</tbody>
+</table></div>
+"""
+
+class TestCopAnalysis(unittest.TestCase):
+    def test_estimates_are_skipped(self):
+        div = BeautifulSoup(COP_HTML, 'html.parser').select_one('div.cop_analysis')
+        series = parse_period_series(div)
+        self.assertEqual(series['operating_income'], {'2023/12': 1200.0, '2024/12': -300.0, '2025/03': 50.0, '2025/06': 80.0})
+        self.assertEqual(series['PER'], {'2023/12': 12.5, '2025/03': 11.0, '2025/06': 9.5})
+
+class TestPointInTimeStore(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = PointInTimeStore(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_first_crawl_is_backfilled_to_filing_deadlines(self):
+        self.store.record('000001', {'PER': {'2024/12': 10.0, '2025/03': 12.0}}, observed='2025-06-01')
+        tl = self.store.compile()
+        values, periods = tl.as_of(['000001'] * 4, [20250330, 20250331, 20250515, 20250601], 'PER')
+        # annual report due 03-31, Q1 report due 05-15
+        self.assertTrue(np.isnan(values[0]))
+        self.assertEqual(values[1:].tolist(), [10.0, 12.0, 12.0])
+        self.assertEqual(periods[1:].tolist(), [202412, 202503, 202503])
+
+    def test_live_values_and_restatements(self):
+        self.store.record('000001', {'PER': {'2025/03': 12.0}}, observed='2025-06-01')
+        self.assertEqual(self.store.record('000001', {'PER': {'2025/03': 12.0}}, observed='2025-07-01'), 0)
+        self.store.record('000001', {'PER': {'2025/03': 13.0, '2025/06': 8.0}}, observed='2025-08-10')
+        self.store.record('000001', {'PER': {'2025/06': 7.5}}, observed='2025-09-01')
+
+        values, _ = self.store.compile().as_of('000001', np.array([20250601, 20250809, 20250810, 20250901]), 'PER')
+        self.assertEqual(values.tolist(), [12.0, 12.0, 8.0, 7.5])
+
+    def test_reopened_store_reuses_log(self):
+        self.store.record('000001', {'ROE': {'2025/03': 5.0}}, observed='2025-06-01')
+        again = PointInTimeStore(self.root)
+        self.assertEqual(again.record('000001', {'ROE': {'2025/03': 5.0}}, observed='2025-06-02'), 0)
+        values, _ = again.compile().as_of(['000001', '999999'], 20250601, 'ROE')
+        self.assertEqual(values[0], 5.0)
+        self.assertTrue(np.isnan(values[1]))
+
+    def test_health_mask_matches_deficit_rule(self):
+        self.store.record('000001', {'operating_income': {'2025/03': 100.0}, 'PER': {'2025/03': 10.0}}, observed='2025-05-20')
+        self.store.record('000001', {'operating_income': {'2025/06': -20.0}}, observed='2025-08-14')
+        self.store.record('000002', {'debt_ratio': {'2025/03': 80.0}}, observed='2025-05-20')
+
+        dates = np.array([20250501, 20250520, 20250814])
+        mask = pit_health(self.store.compile(), ['000001', '000002', '000003'], dates)
+        expected = [[False, False, False],
+                    [True, True, False],
+                    [False, True, False]]
+        self.assertEqual(mask.tolist(), expected)
+
+if __name__ == '__main__':
+    unittest.main()
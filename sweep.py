@@ -0,0 +1,248 @@
+"""
+Full-market sweep of a skill's rules, sharded over worker processes and hosts.
+
+    python main.py sweep run uprise --market ALL --shards 32 --workers 4
+    python main.py sweep run technical --queue /mnt/shared/sweep --workers 0
+    python main.py sweep work --queue /mnt/shared/sweep        (on each extra host)
+    python main.py sweep run technical --queue /mnt/shared/sweep  (again: resumes)
+
+The coordinator fetches the listing once, splits it into shards (by code
+hash or by market) and puts them on a common.workqueue.WorkQueue. Local
+worker processes and `sweep work` on any host that sees the queue
+directory claim shards, run the skill's `sweep(rows)` and write the
+records back. Failed shards are retried, shards of a dead worker are
+re-queued when their lease expires, and the merged result is in listing
+order no matter which worker finished first. The local workers split the
+per-host request limits of common.fetch between them, so a sweep is no
+harder on Naver than a single run; a `sweep work` on another host has its
+own (--share splits it too).
+"""
+import os
+import sys
+import time
+import zlib
+import socket
+import argparse
+import multiprocessing
+from contextlib import redirect_stdout
+
+import main as cli
+
+sys.path.append(cli.SKILLS_DIR)
+from common import fetch, output
+from common.paths import data_dir
+from common.workqueue import WorkQueue
+from common.checkpoint import Checkpoint
+
+# rule -> main.py command whose module provides sweep(rows) and FIELDS
+RULES = ('uprise', 'technical')
+POLL = 1.0   # seconds between queue checks
+CHUNK = 25   # rows per checkpointed step within a shard
+
+
+def shard_rows(rows, shards, by='hash'):
+    """
+    Splits listing rows into [(shard id, rows)]. 'hash' spreads codes by a
+    stable CRC32 (same split on every host and run); 'market' keeps each
+    market in its own shards, `shards` spread over the markets.
+    """
+    groups = {}
+    if by == 'market':
+        markets = sorted({r.get('market') or '-' for r in rows})
+        per_market = max(1, shards // len(markets)) if markets else 1
+        for r in rows:
+            n = zlib.crc32(r['code'].encode()) % per_market
+            groups.setdefault(f"{r.get('market') or '-'}-{n:04d}", []).append(r)
+    else:
+        for r in rows:
+            n = zlib.crc32(r['code'].encode()) % max(1, shards)
+            groups.setdefault(f"{n:04d}", []).append(r)
+    return sorted(groups.items())
+
+
+def run_rows(rule, rows):
+    return list(cli.load(rule).sweep(rows))
+
+
+def run_shard(doc, checkpoint=None, heartbeat=None, runner=None):
+    """
+    Runs one shard in chunks of CHUNK rows. With a checkpoint, every
+    finished chunk is logged, and a retried shard (on any host sharing the
+    queue) skips the chunks an earlier attempt already finished.
+    heartbeat() is called after every chunk (the worker renews its lease).
+    """
+    runner = runner or run_rows
+    payload = doc['payload']
+    rows = payload['rows']
+    chunks = [rows[i:i + CHUNK] for i in range(0, len(rows), CHUNK)]
+    done = {}
+    if checkpoint:
+        _, done = checkpoint.start(range(len(chunks)), {'shard': doc['id']})
+    records = []
+    for i, chunk in enumerate(chunks):
+        part = done[i] if i in done else runner(payload['rule'], chunk)
+        if checkpoint and i not in done:
+            checkpoint.record(i, part)
+        records += part
+        if heartbeat: heartbeat()
+    if checkpoint: checkpoint.close()
+    return records
+
+
+def work(queue_root, worker=None, lease=600, max_attempts=3, share=1, runner=None):
+    """
+    Claims and runs shards until the queue is closed and drained. `share`
+    is the number of worker processes on this host splitting the per-host
+    request limits. Returns the number of shards this worker completed.
+    """
+    fetch.share_limits(share)
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    queue = WorkQueue(queue_root, lease, max_attempts)
+    done = 0
+    while True:
+        doc = queue.claim(worker)
+        if doc is None:
+            if queue.finished(): return done
+            time.sleep(POLL)
+            continue
+        checkpoint = Checkpoint(os.path.join(queue_root, 'checkpoints', f"{doc['id']}.log"))
+        try:
+            with redirect_stdout(sys.stderr):
+                records = run_shard(doc, checkpoint, lambda: queue.renew(doc['id']), runner)
+        except Exception as e:
+            checkpoint.close()
+            print(f"[{worker}] shard {doc['id']} failed: {e}", file=sys.stderr)
+            queue.fail(doc['id'], f"{type(e).__name__}: {e}")
+            continue
+        queue.complete(doc['id'], records)
+        try:
+            os.remove(checkpoint.path)
+        except OSError:
+            pass
+        done += 1
+
+
+def merge(rows, results):
+    """
+    Records of every shard, in listing order.
+    """
+    position = {r['code']: i for i, r in enumerate(rows)}
+    records = [rec for shard_id in sorted(results) for rec in (results[shard_id] or [])]
+    return sorted(records, key=lambda rec: position.get(rec.get('code'), len(position)))
+
+
+def run_sweep(rule, rows, shards=16, by='hash', workers=None, queue_root=None,
+              lease=600, max_attempts=3, progress=True, runner=None):
+    """
+    Coordinates one sweep. workers=0 runs no local workers (remote hosts
+    only); the local workers split the per-host request limits. Pointing
+    queue_root at the queue of an interrupted sweep resumes it: finished
+    shards are kept, failed ones are retried, and shards cut off mid-way
+    continue from their chunk checkpoints. runner(rule, rows) replaces
+    run_rows in the workers and must be picklable (module-level).
+    Returns {'records', 'shards', 'failed': {shard id: doc}, 'queue'}.
+    """
+    if rule not in RULES:
+        raise ValueError(f"unknown rule {rule!r} (choose from {', '.join(RULES)})")
+    workers = os.cpu_count() if workers is None else workers
+    if workers > fetch.max_sharing():
+        # more processes than the strictest host has connections would exceed its cap
+        print(f"작업자 {workers}개 -> {fetch.max_sharing()}개 (호스트 동시 연결 한도)", file=sys.stderr)
+        workers = fetch.max_sharing()
+    queue_root = queue_root or data_dir('sweep', f"{rule}-{time.strftime('%Y%m%d-%H%M%S')}")
+    queue = WorkQueue(queue_root, lease, max_attempts)
+
+    parts = shard_rows(rows, shards, by)
+    resumed = queue.closed()
+    if resumed:
+        retried = queue.retry_failed()
+        print(f"이전 스윕 재개 ({queue_root}): 완료 {queue.status()['done']}/{len(parts)} 샤드, "
+              f"재시도 {len(retried)}", file=sys.stderr)
+    for shard_id, part in parts:
+        if not queue.known(shard_id):
+            queue.put(shard_id, {'rule': rule, 'rows': part})
+    queue.close()
+
+    procs = [multiprocessing.Process(target=work, args=(queue_root, f"local-{i}", lease, max_attempts,
+                                                        workers, runner))
+             for i in range(workers)]
+    for p in procs: p.start()
+
+    last = None
+    try:
+        while not queue.finished():
+            for shard_id in queue.requeue_expired():
+                print(f"shard {shard_id}: lease expired, re-queued", file=sys.stderr)
+            status = queue.status()
+            if progress and status != last:
+                print(f"  shards {status['done']}/{len(parts)} done, {status['running']} running, "
+                      f"{status['failed']} failed", file=sys.stderr)
+                last = status
+            if procs and not any(p.is_alive() for p in procs) and queue.ids('pending'):
+                # every local worker died; finish the rest here
+                work(queue_root, 'coordinator', lease, max_attempts, runner=runner)
+            time.sleep(POLL)
+    finally:
+        for p in procs: p.join()
+
+    return {'records': merge(rows, queue.results()), 'shards': len(parts),
+            'failed': queue.failures(), 'queue': queue_root}
+
+
+def load_rows(market):
+    from common.universe import MARKETS, fetch_market_listing
+    markets = list(MARKETS) if market == 'ALL' else [market]
+    return [row for m in markets for row in fetch_market_listing(m)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sharded full-market sweep')
+    sub = parser.add_subparsers(dest='mode', required=True)
+
+    run = sub.add_parser('run', help='Shard the universe, run local workers and merge the results')
+    run.add_argument('rule', choices=RULES)
+    run.add_argument('--market', choices=['KOSPI', 'KOSDAQ', 'ALL'], default='ALL')
+    run.add_argument('--shards', type=int, default=16)
+    run.add_argument('--by', choices=['hash', 'market'], default='hash', help='Shard by code hash or by market')
+    run.add_argument('--workers', type=int, default=None,
+                     help=f"Local worker processes (0: remote workers only; default: CPU count, at most {fetch.max_sharing()})")
+    run.add_argument('--queue', type=str, default=None, help='Queue directory (shared with remote workers)')
+    run.add_argument('--lease', type=int, default=600, help='Seconds before a claimed shard is re-queued')
+    run.add_argument('--attempts', type=int, default=3, help='Attempts per shard before it is reported as failed')
+    output.add_arguments(run)
+
+    join = sub.add_parser('work', help='Join a sweep as a worker')
+    join.add_argument('--queue', type=str, required=True)
+    join.add_argument('--lease', type=int, default=600)
+    join.add_argument('--attempts', type=int, default=3)
+    join.add_argument('--share', type=int, default=1,
+                      help=f"Worker processes on this host splitting the request limits (at most {fetch.max_sharing()} keep every host's connection cap)")
+
+    args = parser.parse_args()
+    if args.mode == 'work':
+        done = work(args.queue, lease=args.lease, max_attempts=args.attempts, share=args.share)
+        print(f"{done} shards completed.", file=sys.stderr)
+        return
+    output.check_args(run, args)
+
+    with redirect_stdout(sys.stderr):
+        rows = load_rows(args.market)
+    print(f"{len(rows)}개 종목을 {args.shards}개 샤드로 나눠 '{args.rule}' 스윕 시작...", file=sys.stderr)
+    result = run_sweep(args.rule, rows, args.shards, args.by, args.workers, args.queue, args.lease, args.attempts)
+
+    if result['failed']:
+        print(f"실패한 샤드 {len(result['failed'])}개 (큐: {result['queue']}): {', '.join(sorted(result['failed']))}",
+              file=sys.stderr)
+    if args.format == 'text':
+        print(f"=== {args.rule} 스윕 결과: {len(result['records'])}건 ({result['shards']} 샤드) ===")
+        for rec in result['records']:
+            score = f" | 점수 {rec['score']} ({rec['verdict']})" if 'score' in rec else ''
+            print(f"[{rec['code']}] {rec.get('name') or ''}{score}")
+        return
+    with output.open_writer(args, cli.load(args.rule).FIELDS) as writer:
+        for rec in result['records']:
+            writer.write(rec)
+
+
+if __name__ == "__main__":
+    main()
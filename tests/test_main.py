@@ -0,0 +1,43 @@
+
+import os
+import sys
+import subprocess
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import main
+
+HEAVY = ('pandas', 'numpy', 'bs4', 'requests')
+
+PROBE = """
+import sys, main
+try:
+    main.main(sys.argv[1:])
+except SystemExit:
+    pass
+print('loaded:' + ','.join(m for m in %r if m in sys.modules))
+""" % (HEAVY,)
+
+def loaded_after(*argv):
+    out = subprocess.run([sys.executable, '-c', PROBE, *argv], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return out.strip().splitlines()[-1][len('loaded:'):]
+
+class TestMain(unittest.TestCase):
+    def test_every_command_resolves(self):
+        for command, (skill, module, _) in main.COMMANDS.items():
+            base = ROOT if skill is None else os.path.join(main.SKILLS_DIR, skill)
+            path = os.path.join(base, *module.split('.')) + '.py'
+            self.assertTrue(os.path.exists(path), command)
+
+    def test_unknown_command(self):
+        self.assertEqual(main.main(['no-such-skill']), 2)
+
+    def test_help_does_not_load_heavy_modules(self):
+        for command in ('uprise', 'fundamental', 'technical', 'event', 'statements', 'alert'):
+            self.assertEqual(loaded_after(command, '--help'), '', command)
+
+if __name__ == '__main__':
+    unittest.main()
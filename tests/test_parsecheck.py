@@ -0,0 +1,106 @@
+
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import parsecheck
+from common.archive import Archive
+
+# Shaped like the live pages, with the usual noise: attribute soup,
+# entities, comments, nested spans, header/spacer rows, unquoted classes.
+# (Cells are closed: html.parser nests unclosed <td>s, browsers do not.)
+MARKET_SUM = """
+<table class="type_2" summary="코스피">
+<thead><tr><th>N</th><th>종목명</th></tr></thead>
+<tr><td colspan="13" class="blank_08"></td></tr>
+<tr onMouseOver="mouseOver(this)">
+  <td class="no">1</td><td><a href="/item/main.naver?code=005930" class='tltle'>삼성&amp;전자</a></td>
+  <td class="number">70,000</td><td class="number"><img src="up.gif"><span class="tah p11 red02">
+  1,000</span></td><td class="number"><span class="tah p11 red01">+1.45%</span></td>
+  <td class="number">100</td><td class="number">4,000,000</td><td class="number">5,969,782</td>
+  <td class="number">50.00</td><td class="number">10,000,000</td><td class="number">20.00</td>
+  <td class="number"><!-- ROE -->8.50</td><td class="center"><a href="#"><img></a></td></tr>
+<tr><td class="no">2</td><td><a class="tltle" href="/item/main.naver?code=000660">SK하이닉스</a></td>
+  <td class="number">150,000</td><td>0</td><td>-0.50%</td><td>5,000</td><td>1,000,000</td><td>728,002</td>
+  <td>50.00</td><td>3,000,000</td><td>N/A</td><td>-5.00</td><td></td></tr>
+</table>
+<table class="Nnavi"><tr><td class="pgR"><a href="?page=2">다음</a></td>
+<td class="pgRR"><a href="/sise/sise_market_sum.naver?sosok=0&amp;page=45">맨뒤</a></td></tr></table>
+"""
+
+RISING = """
+<table class="type_2"><tr><th>N</th></tr>
+<tr><td>1</td><td><a href="/item/main.naver?code=111111" class="tltle">급등&nbsp;주</a></td><td>1,230</td>
+<td><span>30</span></td><td><span class="tah p11 red01">
+  +29.95%
+</span></td><td>1,200</td><td>4,567,890</td><td>0</td><td>0</td><td>0</td><td>0</td></tr>
+<tr><td>2</td><td><a href="/item/main.naver?code=222222">보합주</a></td><td>500</td><td>0</td><td>+1.00%</td>
+<td>0</td><td>10</td><td>0</td><td>0</td><td>0</td></tr>
+<tr><td>3</td><td>무링크</td><td>500</td><td>0</td><td>+5.00%</td><td>0</td><td>10</td><td>0</td><td>0</td><td>0</td></tr>
+<tr><td>4</td><td><a href="/item/main.naver?code=333333">거래정지</a></td><td>500</td><td>0</td><td>+5.00%</td>
+<td>0</td><td></td><td>0</td><td>0</td><td>0</td></tr>
+</table>
+<table class="type_2"><tr><td>1</td><td><a href="/item/main.naver?code=999999">둘째표</a></td><td>1</td><td>0</td>
+<td>+9.00%</td><td>0</td><td>1</td><td>0</td><td>0</td><td>0</td></tr></table>
+"""
+
+REPORTS = """
+<table class="type_1" summary="종목분석 리포트">
+<tr><th>종목명</th><th>제목</th></tr>
+<tr><td colspan="6" class="blank_07"></td></tr>
+<tr><td style="padding-left:10"><a href="/item/main.naver?code=005930" class="stock_item" title="삼성전자">삼성전자</a></td>
+<td><a href="company_read.naver?nid=1&amp;page=1">HBM 회복 &lt;기대&gt;</a></td><td>미래에셋증권</td>
+<td class="file"><a href="x.pdf"><img></a></td><td class="date">24.03.04</td><td class="date">1234</td></tr>
+<tr><td><a href="/item/main.naver?code=000660">SK하이닉스</a></td><td>제목 없음</td><td>KB</td><td></td><td>24.03.04</td><td>1</td></tr>
+</table>
+"""
+
+THEME = """
+<table class="type_5" summary="테마 종목">
+<tr><th>종목명</th></tr>
+<tr><td class="name"><div class="name_area"><a href="/item/main.naver?code=035420">NAVER</a> <span class="dot">*</span></div></td>
+<td class="info_txt">설명</td><td class="number">180,500</td></tr>
+<tr><td class="name"><a href="/item/main.naver?code=035720">카카오</a></td><td></td><td>-</td></tr>
+</table>
+"""
+
+PAGES = {
+    'market_sum': ('https://finance.naver.com/sise/sise_market_sum.naver?sosok=0&page=1', MARKET_SUM),
+    'rising': ('https://finance.naver.com/sise/sise_rise.naver', RISING),
+    'reports': ('https://finance.naver.com/research/company_list.naver?&page=1', REPORTS),
+    'theme': ('https://finance.naver.com/sise/sise_group_detail.naver?type=theme&no=42', THEME),
+}
+
+class TestParseCheck(unittest.TestCase):
+    def test_fast_parsers_match_soup(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            archive = Archive(tmp)
+            for url, html in PAGES.values():
+                archive.put(url, url, html.encode('euc-kr'), encoding='euc-kr')
+            archive.close()
+            for name in parsecheck.PARSERS:
+                report = parsecheck.check(name, parsecheck.archived_pages(Archive(tmp), name))
+                self.assertEqual(report['pages'], 1, name)
+                self.assertEqual(report['diverged'], [], name)
+
+        fast, _ = parsecheck.parser_pair('market_sum')
+        rows, last_page = fast(MARKET_SUM)
+        self.assertEqual(last_page, 45)
+        self.assertEqual([r['name'] for r in rows], ['삼성&전자', 'SK하이닉스'])
+        self.assertEqual((rows[0]['ROE'], rows[1]['diff_rate'], rows[1]['PER']), (8.5, -0.5, None))
+        fast, _ = parsecheck.parser_pair('rising')
+        self.assertEqual(fast(RISING), [{'code': '111111', 'name': '급등\xa0주', 'price': 1230,
+                                         'diff_rate': 29.95, 'volume': 4567890}])
+
+    def test_divergence_is_reported(self):
+        _, reference = parsecheck.parser_pair('theme')
+        broken = lambda html: reference(html)[1:]
+        report = parsecheck.check('theme', [('u', THEME)], fast=broken)
+        self.assertEqual(report['diverged'], ['u'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date, datetime
+
+import requests
+from requests.adapters import BaseAdapter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import scheduler
+from common import fetch, schedule
+from common.schedule import FreshStore, KST
+
+QUOTE_URL = "https://finance.naver.com/item/main.naver?code=005930"
+BARS_URL = "https://fchart.stock.naver.com/sise.nhn?symbol=005930&timeframe=day&count=750&requestType=0"
+
+class FlakyAdapter(BaseAdapter):
+    """
+    Answers 200 with a counter page, or fails every request when down.
+    """
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.down = False
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        if self.down:
+            raise requests.ConnectionError("naver is down")
+        res = requests.Response()
+        res.status_code = 200
+        res._content = f"<p>{self.calls}</p>".encode()
+        res.encoding = 'utf-8'
+        res.url = request.url
+        res.request = request
+        return res
+
+    def close(self):
+        pass
+
+def stamp(*args):
+    return datetime(*args, tzinfo=KST).timestamp()
+
+class TestCalendar(unittest.TestCase):
+    def test_sessions_and_holidays(self):
+        self.assertFalse(schedule.is_trading_day(date(2025, 1, 28)))   # 설날
+        self.assertFalse(schedule.is_trading_day(date(2024, 12, 31)))  # 연말 휴장
+        self.assertEqual(schedule.next_trading_day(date(2025, 1, 24)), date(2025, 1, 31))
+        self.assertEqual(schedule.session_state(datetime(2024, 3, 4, 8, 30)), 'pre')
+        self.assertEqual(schedule.session_state(datetime(2024, 3, 4, 15, 35)), 'open')   # closing prices settling
+        self.assertEqual(schedule.session_state(datetime(2024, 3, 4, 15, 45)), 'closed')
+        self.assertEqual(schedule.session_state(datetime(2024, 3, 9, 11, 0)), 'closed')   # Saturday
+        self.assertEqual(schedule.next_open(datetime(2024, 3, 8, 16, 0)), datetime(2024, 3, 11, 9, 0))
+        self.assertEqual(schedule.last_session(datetime(2024, 3, 11, 8, 0)), date(2024, 3, 8))
+        self.assertEqual(schedule.last_session(datetime(2024, 3, 11, 9, 0)), date(2024, 3, 11))
+
+    def test_tier_expiry(self):
+        self.assertEqual(schedule.tier_for(fetch.normalize_url(BARS_URL)), 'daily')
+        self.assertEqual(schedule.tier_for(QUOTE_URL), 'realtime')
+        self.assertIsNone(schedule.tier_for("https://example.com/"))
+
+        in_session = datetime(2024, 3, 4, 10, 0)
+        self.assertEqual(schedule.expires_at('realtime', in_session), datetime(2024, 3, 4, 10, 1))
+        self.assertEqual(schedule.expires_at('daily', datetime(2024, 3, 4, 15, 35)), datetime(2024, 3, 4, 15, 40))
+        # after the close everything price-like is good until the next open (over the weekend)
+        self.assertEqual(schedule.expires_at('daily', datetime(2024, 3, 8, 18, 0)), datetime(2024, 3, 11, 9, 0))
+        self.assertEqual(schedule.expires_at('rare', in_session), datetime(2024, 3, 11, 10, 0))
+        self.assertEqual(schedule.expires_at('quarterly', datetime(2024, 7, 1)), datetime(2024, 7, 4))      # filing window
+        self.assertEqual(schedule.expires_at('quarterly', datetime(2024, 8, 20)), datetime(2024, 10, 1))   # until the quarter ends
+
+    def test_next_run(self):
+        self.assertEqual(scheduler.next_run(datetime(2024, 3, 4, 7, 0)), (datetime(2024, 3, 4, 8, 0), 'prewarm'))
+        self.assertEqual(scheduler.next_run(datetime(2024, 3, 4, 12, 0)), (datetime(2024, 3, 4, 16, 0), 'close'))
+        self.assertEqual(scheduler.next_run(datetime(2024, 3, 8, 17, 0)), (datetime(2024, 3, 11, 8, 0), 'prewarm'))
+
+class TestFreshCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = FreshStore(self.tmp.name)
+        self.adapter = FlakyAdapter()
+        s = requests.Session()
+        s.mount('https://', self.adapter)
+        self.session, self.now = fetch.session, schedule.now
+        fetch.session = lambda: s
+        schedule.use(self.store)
+
+    def tearDown(self):
+        fetch.session, schedule.now = self.session, self.now
+        schedule.use(None)
+        self.tmp.cleanup()
+
+    def test_valid_copy_is_served_without_request(self):
+        self.store.put(BARS_URL, fetch.normalize_url(BARS_URL), b"<p>friday</p>", 'daily', 'utf-8',
+                       fetched=stamp(2024, 3, 8, 18, 0))
+        schedule.now = lambda: datetime(2024, 3, 10, 12, 0)   # Sunday
+        self.assertEqual(fetch.get(BARS_URL).text, "<p>friday</p>")
+        self.assertEqual(self.adapter.calls, 0)
+
+        schedule.now = lambda: datetime(2024, 3, 11, 9, 5)    # Monday session: expired
+        self.assertEqual(fetch.get(BARS_URL).text, "<p>1</p>")
+        self.assertEqual(self.adapter.calls, 1)
+        header, body = self.store.get(fetch.normalize_url(BARS_URL))
+        self.assertEqual((header['tier'], body), ('daily', b"<p>1</p>"))
+
+    def test_stale_copy_stands_in_for_failures(self):
+        self.store.put(QUOTE_URL, fetch.normalize_url(QUOTE_URL), b"<p>old</p>", 'realtime', 'utf-8',
+                       fetched=stamp(2024, 3, 4, 10, 0))
+        schedule.now = lambda: datetime(2024, 3, 4, 11, 0)
+        self.adapter.down = True
+        self.assertEqual(fetch.get(QUOTE_URL, retries=0).text, "<p>old</p>")
+        self.assertRaises(requests.ConnectionError, fetch.get, QUOTE_URL + "1", retries=0)
+
+if __name__ == '__main__':
+    unittest.main()
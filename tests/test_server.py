@@ -0,0 +1,91 @@
+
+import os
+import sys
+import json
+import time
+import threading
+import unittest
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from server import SkillService, make_server, number
+
+class CountingService(SkillService):
+    """
+    SkillService with network-free endpoints.
+    """
+    def __init__(self, ttl):
+        super().__init__(ttl=ttl, workers=4)
+        self.calls = 0
+        self.routes['/echo'] = self.echo
+        self.routes['/broken'] = self.broken
+
+    def echo(self, value, delay='0'):
+        time.sleep(number('delay', delay, float))
+        self.calls += 1
+        return {'value': value, 'calls': self.calls}
+
+    def broken(self):
+        return int('not a number')   # a parse error inside a skill
+
+class TestSkillService(unittest.TestCase):
+    def test_results_are_reused_within_ttl(self):
+        service = CountingService(ttl=60)
+        self.assertEqual(service.call('/echo', {'value': 'a'})['calls'], 1)
+        self.assertEqual(service.call('/echo', {'value': 'a'})['calls'], 1)
+        self.assertEqual(service.call('/echo', {'value': 'b'})['calls'], 2)
+        service.close()
+
+    def test_concurrent_requests_share_one_run(self):
+        service = CountingService(ttl=0)
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(lambda _: service.call('/echo', {'value': 'x', 'delay': '0.2'}), range(6)))
+        self.assertEqual(service.calls, 1)
+        self.assertTrue(all(r['calls'] == 1 for r in results))
+        service.close()
+
+class TestHttp(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.service = CountingService(ttl=60)
+        cls.server = make_server('127.0.0.1', 0, cls.service)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.close()
+
+    def get(self, path):
+        try:
+            with urllib.request.urlopen(self.base + path) as res:
+                return res.status, json.loads(res.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_endpoints(self):
+        status, body = self.get('/health')
+        self.assertEqual(status, 200)
+        self.assertIn('/technical', body['endpoints'])
+
+        self.assertEqual(self.get('/echo?value=%ED%95%9C'), (200, {'value': '한', 'calls': 1}))
+        self.assertEqual(self.get('/nope')[0], 404)
+        self.assertEqual(self.get('/echo?bogus=1')[0], 400)
+        self.assertEqual(self.get('/echo?value=a&delay=soon')[0], 400)
+        status, body = self.get('/broken')
+        self.assertEqual(status, 500)
+        self.assertIn('ValueError', body['error'])
+
+        status, body = self.get('/metrics')
+        self.assertEqual(status, 200)
+        self.assertIn('service', body['caches'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+
+import os
+import sys
+import time
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import sweep
+from common.workqueue import WorkQueue
+from common.checkpoint import Checkpoint
+
+ROWS = [{'code': f"{i:06d}", 'market': 'KOSPI' if i % 3 else 'KOSDAQ'} for i in range(60)]
+
+def fake_rows(rule, rows):
+    # every third code "passes"; slow enough for workers to interleave
+    time.sleep(0.01)
+    return [{'code': r['code']} for r in rows if int(r['code']) % 3 == 0]
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_shards_cover_every_row_once(self):
+        for by in ('hash', 'market'):
+            parts = sweep.shard_rows(ROWS, 8, by)
+            codes = [r['code'] for _, part in parts for r in part]
+            self.assertEqual(sorted(codes), [r['code'] for r in ROWS])
+            self.assertEqual(parts, sweep.shard_rows(ROWS, 8, by))   # same split on every run
+        for shard_id, part in sweep.shard_rows(ROWS, 8, 'market'):
+            self.assertEqual(len({r['market'] for r in part}), 1)
+
+    def test_queue_retries_and_expires(self):
+        q = WorkQueue(self.tmp.name, lease=60, max_attempts=2)
+        q.put('a', {'n': 1})
+        q.close()
+        doc = q.claim('w1')
+        self.assertEqual(doc['payload'], {'n': 1})
+        self.assertIsNone(q.claim('w2'))
+
+        q.fail('a', 'boom')   # back to pending
+        self.assertEqual(q.status()['pending'], 1)
+        q.claim('w2')
+        self.assertEqual(q.requeue_expired(now=time.time() + 120), ['a'])   # second attempt lost its lease
+        self.assertEqual(q.status(), {'pending': 0, 'running': 0, 'done': 0, 'failed': 1})
+        self.assertEqual(len(q.failures()['a']['errors']), 2)
+        self.assertTrue(q.finished())
+
+    def test_renewed_lease_and_late_completion(self):
+        q = WorkQueue(self.tmp.name, lease=60, max_attempts=1)
+        q.put('a', {'n': 1})
+        q.close()
+        q.claim('w1')
+        os.utime(q.path('running', 'a'), (time.time() - 120, time.time() - 120))
+        self.assertTrue(q.renew('a'))   # still making progress
+        self.assertEqual(q.requeue_expired(), [])
+
+        # a lease lost anyway: the first worker's late result wins and the parked copy goes
+        self.assertEqual(q.requeue_expired(now=time.time() + 120), ['a'])
+        self.assertFalse(q.renew('a'))
+        q.complete('a', ['ok'])
+        self.assertEqual(q.status(), {'pending': 0, 'running': 0, 'done': 1, 'failed': 0})
+        self.assertEqual(q.results(), {'a': ['ok']})
+
+    def test_run_merges_in_listing_order(self):
+        result = sweep.run_sweep('uprise', ROWS, shards=6, workers=3, queue_root=self.tmp.name,
+                                 progress=False, runner=fake_rows)
+        self.assertEqual([r['code'] for r in result['records']], [r['code'] for r in ROWS if int(r['code']) % 3 == 0])
+        self.assertEqual(result['shards'], 6)
+        self.assertEqual(result['failed'], {})
+
+    def test_retried_shard_resumes_from_chunk_checkpoint(self):
+        calls = []
+        def flaky(rule, rows):
+            calls.append(rows[0]['code'])
+            if len(calls) == 2: raise ConnectionError('network blip')
+            return fake_rows(rule, rows)
+
+        doc = {'id': '0000', 'payload': {'rule': 'uprise', 'rows': ROWS}}
+        path = os.path.join(self.tmp.name, 'shard.log')
+        original = sweep.run_rows
+        sweep.run_rows = flaky
+        try:
+            with self.assertRaises(ConnectionError):
+                sweep.run_shard(doc, Checkpoint(path))
+            records = sweep.run_shard(doc, Checkpoint(path))
+        finally:
+            sweep.run_rows = original
+        # chunk 0 ran once, chunk 1 failed once then ran, chunk 2 ran once
+        self.assertEqual(calls, ['000000', '000025', '000025', '000050'])
+        self.assertEqual(records, fake_rows('uprise', ROWS))
+
+if __name__ == '__main__':
+    unittest.main()